@@ -0,0 +1,84 @@
+# bench_capture_source.py
+# Sensing latency of the two PresentMon capture sources, from "row written by
+# PresentMon" to "row parsed by the controller":
+#   csv  : PresentMon -output_file, tailed back with iter_frame_batches (FileWatcher)
+#   pipe : PresentMon -output_stdout, read with iter_pipe_batches
+# The fake PresentMon prints the perf_counter() origin of its TimeInSeconds column
+# (--announce-clock), so each row's write time is known in our clock. CPU is this
+# process only (the reader side).
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from frame_tail import iter_frame_batches, iter_pipe_batches  # noqa: E402
+
+FAKE = str(REPO / "PresentMon" / "fake_presentmon.py")
+
+
+def run_source(source: str, fps: float, seconds: float, flush_frames: int):
+    args = [sys.executable, FAKE, "--fps", str(fps), "--duration", str(seconds), "--jitter", "0",
+            "--flush-frames", str(flush_frames), "--announce-clock"]
+    csv_path = None
+    if source == "pipe":
+        pm = subprocess.Popen(args + ["-output_stdout"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    else:
+        fd, csv_path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        os.remove(csv_path)
+        pm = subprocess.Popen(args + ["-output_file", csv_path], stderr=subprocess.PIPE)
+    t0 = float(pm.stderr.readline().decode().strip().split("=", 1)[1])
+
+    stop = threading.Event()
+
+    def stop_after_exit():
+        pm.wait()
+        time.sleep(0.5)  # let the tail pick up the last rows
+        stop.set()
+
+    threading.Thread(target=stop_after_exit, daemon=True).start()
+    if source == "pipe":
+        batches = iter_pipe_batches(pm.stdout, "TimeInSeconds", dropped_column=None, stop=stop)
+    else:
+        batches = iter_frame_batches(csv_path, "TimeInSeconds", from_end=False, dropped_column=None, stop=stop)
+
+    lat_ms = []
+    cpu0 = time.process_time()
+    for times, _ in batches:
+        arrived = time.perf_counter()
+        lat_ms.extend(1000.0 * (arrived - (t0 + t)) for t in times)
+    cpu_s = time.process_time() - cpu0
+    if csv_path:
+        os.remove(csv_path)
+    return lat_ms, cpu_s
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Row-to-controller latency: CSV tail vs stdout pipe.")
+    ap.add_argument("--fps", type=float, default=240.0)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--flush-frames", type=int, default=1, help="Rows per PresentMon flush")
+    args = ap.parse_args()
+
+    print(f"fps {args.fps:g}, {args.seconds:g}s, flush every {args.flush_frames} row(s)")
+    for source in ("csv", "pipe"):
+        lat, cpu_s = run_source(source, args.fps, args.seconds, args.flush_frames)
+        if len(lat) < 2:
+            print(f"  {source:<5s} no rows")
+            continue
+        q = statistics.quantiles(lat, n=100)
+        print(f"  {source:<5s} rows {len(lat):>6d}  p50 {q[49]:7.3f} ms  p90 {q[89]:7.3f} ms  "
+              f"p99 {q[98]:7.3f} ms  max {max(lat):7.3f} ms  reader CPU {cpu_s * 1000 / args.seconds:6.1f} ms/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench_file_watch.py
+# Append-to-wake latency of the FileWatcher backends vs the old fixed-sleep loop.
+# A writer thread appends one timestamped row at random intervals; the reader
+# tails the file and records how long each row took to be noticed. A second phase
+# leaves the file idle and counts how often each reader wakes up for nothing.
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from file_watch import make_watcher  # noqa: E402
+from frame_tail import LineTailer  # noqa: E402
+
+LEGACY_SLEEP_S = 0.05  # iter_fps_from_presentmon's old readline() back-off
+
+
+def writer(path: str, count: int, lo_ms: float, hi_ms: float, seed: int, done: threading.Event):
+    rng = random.Random(seed)
+    with open(path, "a", encoding="utf-8") as w:
+        for _ in range(count):
+            time.sleep(rng.uniform(lo_ms, hi_ms) / 1000.0)
+            w.write(f"{time.perf_counter_ns()},16.6\n")
+            w.flush()
+    done.set()
+
+
+def reader(path: str, backend: str, stop: threading.Event, latencies: list, wakeups: list):
+    watcher = make_watcher(path, backend=backend) if backend != "sleep" else None
+    with open(path, "rb") as f:
+        tail = LineTailer(f)
+        tail.skip_to_end()
+        while not stop.is_set():
+            lines = tail.read_lines()
+            now = time.perf_counter_ns()
+            for ln in lines:
+                latencies.append((now - int(ln.split(",", 1)[0])) / 1e6)
+            if lines:
+                continue
+            wakeups.append(now)
+            if watcher is None:
+                time.sleep(LEGACY_SLEEP_S)
+            else:
+                watcher.wait(0.25)
+    if watcher is not None:
+        watcher.close()
+
+
+def run(backend: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "frames.csv")
+        open(path, "w").close()
+        latencies, wakeups = [], []
+        stop, done = threading.Event(), threading.Event()
+        rt = threading.Thread(target=reader, args=(path, backend, stop, latencies, wakeups), daemon=True)
+        rt.start()
+        time.sleep(0.1)
+        writer(path, args.rows, args.min_gap_ms, args.max_gap_ms, args.seed, done)
+        time.sleep(0.3)
+
+        # Idle phase: nothing is written, count empty wake-ups
+        idle_start = time.perf_counter_ns()
+        time.sleep(args.idle_s)
+        idle_wakes = sum(1 for t in wakeups if t >= idle_start)
+        stop.set()
+        with open(path, "a") as w:  # nudge event-driven readers out of wait()
+            w.write("0,0\n")
+        rt.join(timeout=2.0)
+
+    lat = sorted(latencies[:args.rows])
+    return {
+        "backend": backend,
+        "rows": len(lat),
+        "p50": statistics.median(lat),
+        "p95": lat[int(0.95 * (len(lat) - 1))],
+        "max": lat[-1],
+        "idle_wakes_per_s": idle_wakes / args.idle_s,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare file-change watcher latency with sleep polling.")
+    ap.add_argument("--backends", nargs="*", default=["sleep", "poll", "auto"],
+                    help="sleep = old 50 ms loop, poll = PollingWatcher, auto/inotify/win32 = OS events")
+    ap.add_argument("--rows", type=int, default=200)
+    ap.add_argument("--min-gap-ms", type=float, default=2.0)
+    ap.add_argument("--max-gap-ms", type=float, default=40.0)
+    ap.add_argument("--idle-s", type=float, default=2.0)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    print(f"{'backend':<14s} {'rows':>5s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s} {'idle wakes/s':>13s}")
+    for backend in args.backends:
+        r = run(backend, args)
+        name = backend
+        if backend == "auto":
+            with make_watcher(str(REPO), any_file=True) as w:
+                name = f"auto({w.backend})"
+        print(f"{name:<14s} {r['rows']:>5d} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['max']:>8.2f} {r['idle_wakes_per_s']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# bench_frame_tail.py
+# Rows/sec of the old readline()+csv.reader([line]) tail loop vs the chunked
+# LineTailer, replayed against the checked-in FrameView logs. The file is grown
+# in random-sized slices (often cutting a row in half) to mimic a live writer.
+
+import argparse
+import csv
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from frame_tail import ColumnProjector, LineTailer, find_column, parse_frame_times  # noqa: E402
+
+
+def slices(data: bytes, rng: random.Random, mean_bytes: int):
+    pos = 0
+    while pos < len(data):
+        n = max(1, int(rng.expovariate(1.0 / mean_bytes)))
+        yield data[pos:pos + n]
+        pos += n
+
+
+def run_legacy(path: str, body: bytes, ms_idx: int, rng: random.Random, mean_bytes: int):
+    """Per-line loop as it was in iter_fps_from_presentmon (minus the sleeps)."""
+    frames = bad = 0
+    t0 = time.perf_counter()
+    with open(path, "ab") as w, open(path, "r", newline="", encoding="utf-8") as f:
+        f.seek(0, os.SEEK_END)
+        for chunk in slices(body, rng, mean_bytes):
+            w.write(chunk)
+            w.flush()
+            while True:
+                pos = f.tell()
+                line = f.readline()
+                if not line:
+                    f.seek(pos)
+                    break
+                row = next(csv.reader([line]))
+                if len(row) <= ms_idx:
+                    bad += 1
+                    continue
+                try:
+                    ms = float(row[ms_idx])
+                    if ms > 0:
+                        frames += 1
+                except ValueError:
+                    bad += 1
+    return frames, bad, time.perf_counter() - t0
+
+
+def run_tailer(path: str, body: bytes, ms_idx: int, rng: random.Random, mean_bytes: int):
+    frames = 0
+    t0 = time.perf_counter()
+    projector = ColumnProjector([ms_idx])
+    with open(path, "ab") as w, open(path, "rb") as f:
+        tail = LineTailer(f)
+        tail.skip_to_end()
+        for chunk in slices(body, rng, mean_bytes):
+            w.write(chunk)
+            w.flush()
+            lines = tail.read_lines()
+            if lines:
+                frames += len(parse_frame_times(lines, projector))
+    return frames, 0, time.perf_counter() - t0
+
+
+def bench_log(log: str, mean_bytes: int, seed: int):
+    with open(log, "rb") as f:
+        header_line = f.readline()
+        body = f.read()
+    header = next(csv.reader([header_line.decode("utf-8")]))
+    ms_idx = find_column(header, "MsBetweenPresents")
+    rows = body.count(b"\n")
+
+    print(f"\n{os.path.basename(log)}  ({rows} rows, {len(header)} cols, ~{mean_bytes} B/append)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn in (("legacy readline", run_legacy), ("chunked tailer", run_tailer)):
+            path = os.path.join(tmp, f"{name.split()[0]}.csv")
+            with open(path, "wb") as w:
+                w.write(header_line)
+            frames, bad, dt = fn(path, body, ms_idx, random.Random(seed), mean_bytes)
+            print(f"  {name:<16s} {frames / dt:>10.0f} rows/s   frames={frames:<6d} bad_reads={bad}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the chunked CSV tailer against the per-line loop.")
+    ap.add_argument("--logs", nargs="*", default=sorted(glob.glob(str(REPO / "FrameView" / "FrameView_*_Log.csv"))))
+    ap.add_argument("--append-bytes", type=int, default=2048, help="Mean bytes per simulated writer flush")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    for log in args.logs:
+        bench_log(log, args.append_bytes, args.seed)
+
+
+if __name__ == "__main__":
+    main()
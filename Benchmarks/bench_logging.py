@@ -0,0 +1,92 @@
+# bench_logging.py
+# Frame-loop throughput with controller logging off, printed inline (the old
+# behaviour) and queued through ControlLog's background thread.
+# The console is simulated by a sink that costs --console-ms per write, which is
+# roughly what a Windows console charges for a print; every tick logs (verbose,
+# update_interval_s = 0) so this is the worst case for the loop.
+
+import argparse
+import glob
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from ctrl_log import ControlLog, describe_update  # noqa: E402
+from hd2_firerate_controller import Config, RateController  # noqa: E402
+from replay import iter_log_batches  # noqa: E402
+
+
+class SlowConsole:
+    """Discards text but blocks like a slow terminal."""
+
+    def __init__(self, write_ms: float):
+        self.write_s = write_ms / 1000.0
+        self.writes = 0
+        self.lines = 0
+
+    def write(self, text: str):
+        self.writes += 1
+        self.lines += text.count("\n")
+        if self.write_s:
+            time.sleep(self.write_s)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def run_loop(batches, cfg: Config, mode: str, console: SlowConsole):
+    ctrl = RateController(cfg)
+    log = ControlLog(cfg.verbose_each_update, cfg.change_eps, cfg.log_coalesce_s, console=console) \
+        if mode == "queued" else None
+    prev_rate = None
+    t0 = time.perf_counter()
+    for now, ms_batch, dropped in batches:
+        ctrl.push(ms_batch, dropped)
+        t = ctrl.tick(now)
+        if t is None:
+            continue
+        if mode == "print":
+            msg = describe_update(prev_rate, t.rate, t.smoothed_fps, cfg)
+            if msg:
+                print(msg, file=console)
+        elif mode == "queued":
+            log.update(prev_rate, t.rate, t.smoothed_fps)
+        prev_rate = t.rate
+    loop_s = time.perf_counter() - t0
+    dropped_records = 0
+    if log is not None:
+        log.close()
+        dropped_records = log.dropped
+    return loop_s, ctrl.window.total_frames, dropped_records
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Frame-loop throughput with logging off / inline / queued.")
+    ap.add_argument("--logs", nargs="*", default=sorted(glob.glob(str(REPO / "FrameView" / "FrameView_*_Log.csv"))))
+    ap.add_argument("--console-ms", type=float, default=1.0, help="Simulated cost of one console write")
+    ap.add_argument("--batch-ms", type=float, default=10.0)
+    ap.add_argument("--coalesce-s", type=float, default=1.0)
+    args = ap.parse_args()
+
+    cfg = Config(verbose_each_update=True, update_interval_s=0.0, log_coalesce_s=args.coalesce_s)
+    for log_path in args.logs:
+        batches = list(iter_log_batches(log_path, args.batch_ms))
+        print(f"\n{os.path.basename(log_path)}  ({len(batches)} batches, console {args.console_ms:g} ms/write)")
+        base = None
+        for mode in ("off", "print", "queued"):
+            console = SlowConsole(args.console_ms)
+            loop_s, frames, dropped = run_loop(batches, cfg, mode, console)
+            rate = len(batches) / loop_s
+            base = base or rate
+            print(f"  {mode:<7s} {rate:>10.0f} batches/s  {frames / loop_s:>11.0f} frames/s  "
+                  f"({100 * rate / base:5.1f}% of off)  console writes {console.writes:>5d}  "
+                  f"lines {console.lines:>5d}  dropped {dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench_projection.py
+# ColumnProjector vs csv.reader on the wide FrameView sample logs.
+# First checks that the projected fields are identical to what the csv module
+# produces for every row (plus a few hand-made quoted rows), then times both.
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from frame_tail import ColumnProjector  # noqa: E402
+
+COLUMN_SETS = [
+    ["MsBetweenPresents", "Dropped"],
+    ["MsBetweenPresents", "Dropped", "TimeInSeconds"],
+    ["Application", "ProcessID", "MsBetweenPresents", "GPU0Util(%)"],
+]
+
+
+def csv_fields(lines, indices):
+    need = max(indices)
+    for row in csv.reader(lines):
+        if len(row) > need:
+            yield tuple(row[i] for i in indices)
+
+
+def verify(lines, header, names) -> int:
+    proj = ColumnProjector.from_header(header, names)
+    want = list(csv_fields(lines, proj.indices))
+    got = list(proj.project(lines))
+    if got != want:
+        bad = next(i for i, (a, b) in enumerate(zip(got, want)) if a != b) if len(got) == len(want) else "length"
+        raise SystemExit(f"[FAIL] {names}: projector differs from csv module at row {bad}")
+    return len(got)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the column projection parser against csv.reader.")
+    ap.add_argument("--logs", nargs="*", default=sorted(glob.glob(str(REPO / "FrameView" / "FrameView_*_Log.csv"))))
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    for log in args.logs:
+        with open(log, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        lines = text.splitlines()
+        header = next(csv.reader([lines[0]]))
+        rows = lines[1:]
+
+        # Quoted rows must come out exactly as the csv module sees them
+        quoted = [",".join(f'"{v},x"' if i == 0 else v for i, v in enumerate(r.split(","))) for r in rows[:20]]
+        quoted += ['"He said ""hi"""' + r[r.index(","):] for r in rows[:5]]
+
+        print(f"\n{os.path.basename(log)}  ({len(rows)} rows x {len(header)} cols)")
+        for names in COLUMN_SETS:
+            n = verify(rows, header, names) + verify(quoted, header, names)
+            proj = ColumnProjector.from_header(header, names)
+            t_csv = best_of(lambda: sum(1 for _ in csv_fields(rows, proj.indices)), args.repeat)
+            t_proj = best_of(lambda: sum(1 for _ in proj.project(rows)), args.repeat)
+            print(f"  {'+'.join(names):<52s} identical ({n} rows)  "
+                  f"csv {len(rows) / t_csv:>9.0f} rows/s  proj {len(rows) / t_proj:>10.0f} rows/s  "
+                  f"x{t_csv / t_proj:.1f}")
+
+
+if __name__ == "__main__":
+    main()
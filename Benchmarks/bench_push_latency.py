@@ -0,0 +1,146 @@
+# bench_push_latency.py
+# End-to-end latency from "frame row written" to "fire-rate value received".
+# A writer thread appends PresentMon-style rows at --fps; the pipeline thread tails
+# them (LineTailer + FileWatcher), runs Ema -> fps_to_rate and publishes through
+# a bridge; a receiver thread records when each value arrives.
+#   udp / pipe : push transports, receiver = bridge_receiver.py classes
+#   file       : today's path, update_interval_s gating + a 200 ms reader poll like the Lua timer
+# Each published value carries the write time of the newest row it was computed
+# from, so the number reported covers file detection, parse, control and transport.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from bridge import make_bridge  # noqa: E402
+from bridge_receiver import make_receiver  # noqa: E402
+from file_watch import make_watcher  # noqa: E402
+from frame_tail import LineTailer  # noqa: E402
+from hd2_firerate_controller import Config, Ema, fps_to_rate  # noqa: E402
+
+LUA_POLL_S = 0.200
+
+
+def frame_writer(path: str, fps: float, seconds: float):
+    period = 1.0 / fps
+    end = time.perf_counter() + seconds
+    nxt = time.perf_counter()
+    with open(path, "a", encoding="utf-8") as w:
+        while nxt < end:
+            nxt += period
+            time.sleep(max(0.0, nxt - time.perf_counter()))
+            w.write(f"{1000.0 * period:.3f},{time.perf_counter():.9f}\n")
+            w.flush()
+
+
+def pipeline(path: str, bridge, cfg: Config, gate_s: float, stop: threading.Event, sent: dict):
+    ema = Ema(cfg.ema_alpha)
+    last_write = 0.0
+    with open(path, "rb") as f, make_watcher(path) as watcher:
+        tail = LineTailer(f)
+        tail.skip_to_end()
+        while not stop.is_set():
+            lines = tail.read_lines()
+            if not lines:
+                watcher.wait(0.1)
+                continue
+            written_at = 0.0
+            for ln in lines:
+                ms, written_at = ln.split(",")
+                smoothed = ema.update(1000.0 / float(ms))
+            written_at = float(written_at)
+            now = time.perf_counter()
+            if now - last_write >= gate_s:
+                rate = fps_to_rate(smoothed, cfg)
+                # nudge so every publish is a distinct value the file poller can match
+                rate += (len(sent) % 1000) * 1e-3
+                sent[round(rate, 3)] = written_at
+                bridge.write(rate, written_at)
+                last_write = now
+
+
+def push_receiver(rx, stop: threading.Event, lat: list):
+    while not stop.is_set():
+        got = rx.recv(0.1)
+        if got is not None:
+            sample, now = got
+            lat.append((now - sample.observed) * 1000.0)
+
+
+def file_receiver(path: str, stop: threading.Event, sent: dict, lat: list):
+    last = None
+    while not stop.is_set():
+        time.sleep(LUA_POLL_S)
+        try:
+            with open(path, "r", encoding="utf-8") as r:
+                v = round(float(r.read()), 3)
+        except (OSError, ValueError):
+            continue
+        if v != last and v in sent:
+            lat.append((time.perf_counter() - sent[v]) * 1000.0)
+        last = v
+
+
+def run(transport: str, args, tmp: str) -> list:
+    csv_path = os.path.join(tmp, f"frames_{transport}.csv")
+    with open(csv_path, "w") as w:
+        w.write("MsBetweenPresents,WrittenAt\n")
+    cfg = Config()
+    stop, sent, lat = threading.Event(), {}, []
+
+    if transport == "file":
+        target = os.path.join(tmp, "hd2_fire_rate.txt")
+        rx_thread = threading.Thread(target=file_receiver, args=(target, stop, sent, lat), daemon=True)
+        gate_s, rx = cfg.update_interval_s, None
+    else:
+        target = "127.0.0.1:47811" if transport == "udp" else os.path.join(tmp, "bench.fifo")
+        rx = make_receiver(transport, target)
+        rx_thread = threading.Thread(target=push_receiver, args=(rx, stop, lat), daemon=True)
+        gate_s = 0.0 if args.every_frame else cfg.update_interval_s
+
+    bridge = make_bridge(transport, target)
+    pipe_thread = threading.Thread(target=pipeline, args=(csv_path, bridge, cfg, gate_s, stop, sent), daemon=True)
+    rx_thread.start()
+    pipe_thread.start()
+    time.sleep(0.1)
+    frame_writer(csv_path, args.fps, args.seconds)
+    time.sleep(0.5)
+    stop.set()
+    pipe_thread.join(1.0)
+    rx_thread.join(1.0)
+    bridge.close()
+    if rx is not None:
+        rx.close()
+    return lat
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Frame-observed to value-received latency per bridge transport.")
+    ap.add_argument("--transports", nargs="*", default=["file", "udp", "pipe"] if os.name != "nt" else ["file", "udp"])
+    ap.add_argument("--fps", type=float, default=240.0)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--every-frame", action="store_true",
+                    help="Push transports publish on every frame instead of every update_interval_s")
+    args = ap.parse_args()
+
+    print(f"{'transport':<10s} {'values':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for transport in args.transports:
+            lat = sorted(run(transport, args, tmp))
+            if not lat:
+                print(f"{transport:<10s} {'0':>7s}  (nothing received)")
+                continue
+            p95 = lat[int(0.95 * (len(lat) - 1))]
+            print(f"{transport:<10s} {len(lat):>7d} {statistics.median(lat):>8.2f} {p95:>8.2f} {lat[-1]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench_session_stats.py
+# SessionStats (LogHistogram sketch) vs exact statistics.
+# For every sample FrameView log and frame-time column, compares Avg / 1% Low /
+# 0.1% Low / Min / Max FPS from the sketch against exact values from the sorted
+# column (frame_stats' linear-interpolated percentiles), then times a synthetic
+# hour-long 144 FPS session fed in tailer-sized batches, as one sketch and as
+# merged one-minute interval sketches.
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from frame_cache import load_columns  # noqa: E402
+from frame_stats import _percentile_sorted  # noqa: E402
+from frame_tail import MAX_FRAME_MS  # noqa: E402
+from session_stats import LOW_01PCT, LOW_1PCT, SessionStats  # noqa: E402
+
+COLUMNS = ["MsBetweenDisplayChange", "MsBetweenPresents"]
+MAX_REL_ERR = 0.025   # LogHistogram buckets are 2^(1/16) wide: +-2.2% around the bucket's geometric middle
+
+
+def exact_fps(ms):
+    s = sorted(x for x in ms if 0 < x < MAX_FRAME_MS)
+    return {
+        "avg": 1000.0 * len(s) / sum(s),
+        "low_1pct": 1000.0 / _percentile_sorted(s, LOW_1PCT),
+        "low_01pct": 1000.0 / _percentile_sorted(s, LOW_01PCT),
+        "min": 1000.0 / s[-1],
+        "max": 1000.0 / s[0],
+    }
+
+
+def compare(label: str, ms) -> float:
+    st = SessionStats(label)
+    st.add(ms)
+    got, want = st.fps(), exact_fps(ms)
+    worst = 0.0
+    cells = []
+    for key in ("avg", "low_1pct", "low_01pct", "min", "max"):
+        err = abs(got[key] - want[key]) / want[key]
+        worst = max(worst, err)
+        cells.append(f"{key} {got[key]:8.3f}/{want[key]:8.3f} ({100 * err:4.2f}%)")
+    print(f"  {label:<42s} n={st.count:<6d} " + "  ".join(cells))
+    return worst
+
+
+def synthetic(minutes: int, fps: float, seed: int = 1):
+    rnd = random.Random(seed)
+    base = 1000.0 / fps
+    for _ in range(minutes):
+        minute = []
+        for _ in range(int(60 * fps)):
+            ms = rnd.gauss(base, 0.08 * base)
+            if rnd.random() < 0.002:
+                ms *= rnd.uniform(3, 12)   # hitches
+            minute.append(max(0.5, ms))
+        yield minute
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--logs", nargs="*", default=sorted(glob.glob(str(REPO / "FrameView" / "FrameView_*_Log.csv"))))
+    ap.add_argument("--minutes", type=int, default=60)
+    args = ap.parse_args()
+
+    print("[ACCURACY] sketch / exact FPS")
+    worst = 0.0
+    for log in args.logs:
+        cols = load_columns(log, COLUMNS)
+        for name in COLUMNS:
+            worst = max(worst, compare(f"{os.path.basename(log)[10:30]} {name}", list(cols[name])))
+    print(f"  worst relative error {100 * worst:.2f}%  ({'OK' if worst <= MAX_REL_ERR else 'FAIL'})")
+
+    minutes = list(synthetic(args.minutes, 144.0))
+    frames = sum(len(m) for m in minutes)
+    whole = SessionStats("synthetic")
+    merged = SessionStats("synthetic")
+    t0 = time.perf_counter()
+    for m in minutes:
+        for i in range(0, len(m), 4):          # ~4 frames per tailer read at 144 FPS
+            whole.add(m[i:i + 4])
+    t1 = time.perf_counter()
+    for m in minutes:
+        window = SessionStats("synthetic")
+        window.add(m)
+        merged.merge(window)
+    same = (whole.frames.counts == merged.frames.counts
+            and abs(whole.frames.total - merged.frames.total) < 1e-9 * whole.frames.total)
+    print(f"[STREAM] {args.minutes} min @ 144 FPS = {frames} frames: {1e6 * (t1 - t0) / frames:.2f} µs/frame, "
+          f"{len(whole.frames.counts)} buckets/sketch; interval merge {'identical' if same else 'DIFFERS'}")
+    all_ms = [x for m in minutes for x in m]
+    worst_syn = compare("synthetic hour", all_ms)
+    if worst > MAX_REL_ERR or worst_syn > MAX_REL_ERR or not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
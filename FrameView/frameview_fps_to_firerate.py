@@ -2,12 +2,16 @@
 # Reads FPS from NVIDIA FrameView per-frame logs and writes a smoothed fire-rate
 # to C:\Users\Public\hd2_fire_rate.txt for Cheat Engine to pick up.
 
-import csv
-import glob
 import os
-import time
+import sys
 import subprocess
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ctrl_log import ControlLog  # noqa: E402
+from file_watch import LogDirectory  # noqa: E402
+from frame_source import FrameViewCsvSource  # noqa: E402
+from frame_stats import FrameWindow  # noqa: E402
+
 # ---------- CONFIG ----------
 FRAMEVIEW_EXE = r"C:\Program Files\NVIDIA Corporation\FrameView\FrameView_x64.exe"
 BENCHMARK_DIR = r"C:\Users\Gaming\Documents\FrameView"
@@ -20,8 +24,8 @@ BASE_RATE = 2000
 MIN_RATE = 400
 MAX_RATE = 4000
 EMA_ALPHA = 0.2           # smoothing factor for FPS
-POLL_INTERVAL = 0.20      # seconds; aligns with CE poll cadence
-RESCAN_EVERY = 3.0        # if no new data arrives for this many seconds, look for a newer log
+POLL_INTERVAL = 0.20      # seconds; idle heartbeat when no file-change event arrives
+RESCAN_EVERY = 3.0        # max wait on BENCHMARK_DIR events while no log exists yet
 # ---------------------------
 
 
@@ -38,16 +42,6 @@ def ensure_frameview_running():
         print("[WARN] FrameView executable not found. Check FRAMEVIEW_EXE path.")
 
 
-def latest_frameview_log(benchmark_dir: str, app_exe_name: str) -> str | None:
-    """Find the newest per-frame log CSV for the target app."""
-    pattern = os.path.join(benchmark_dir, f"FrameView_{app_exe_name}_*_Log.csv")
-    candidates = glob.glob(pattern)
-    if not candidates:
-        return None
-    # choose most recently modified
-    return max(candidates, key=os.path.getmtime)
-
-
 def clamp(x: float, lo: float, hi: float) -> float:
     return lo if x < lo else hi if x > hi else x
 
@@ -71,83 +65,6 @@ def write_rate(path: str, rate: int):
             f.write(str(rate))
 
 
-def stream_fps_from_log(log_path: str):
-    """
-    Tail the per-frame CSV, yielding FPS values as new rows arrive.
-    FPS is computed as 1000.0 / MsBetweenPresents for non-dropped frames.
-    """
-    # We’ll open once and keep the file handle; re-open if file rotates.
-    last_pos = 0
-    header = None
-    ms_idx = None
-    dropped_idx = None
-
-    while True:
-        if not os.path.exists(log_path):
-            # Log disappeared (rotation?). Give caller a chance to pick a new one.
-            time.sleep(POLL_INTERVAL)
-            yield None
-            continue
-
-        with open(log_path, "r", encoding="utf-8", errors="ignore", newline="") as f:
-            # If file shrunk, reset
-            size = os.path.getsize(log_path)
-            if last_pos > size:
-                last_pos = 0
-
-            f.seek(last_pos, os.SEEK_SET)
-            reader = csv.reader(f)
-
-            # Initialize header if needed
-            if header is None:
-                try:
-                    header = next(reader)
-                except StopIteration:
-                    # no data yet
-                    last_pos = f.tell()
-                    yield None
-                    continue
-
-                # locate relevant columns (case-sensitive names typical of FrameView)
-                try:
-                    ms_idx = header.index("MsBetweenPresents")
-                except ValueError:
-                    ms_idx = None
-                try:
-                    dropped_idx = header.index("Dropped")
-                except ValueError:
-                    dropped_idx = None
-
-                # If header line was just read, continue to next lines in the same pass.
-
-            had_new_data = False
-            for row in reader:
-                had_new_data = True
-                # Ignore dropped frames if column exists and is "1"
-                if dropped_idx is not None and len(row) > dropped_idx and row[dropped_idx].strip() == "1":
-                    continue
-
-                ms = None
-                if ms_idx is not None and len(row) > ms_idx:
-                    raw = row[ms_idx].strip()
-                    try:
-                        ms = float(raw)
-                    except ValueError:
-                        ms = None
-
-                if ms and ms > 0.0:
-                    fps = 1000.0 / ms
-                    yield fps
-
-            last_pos = f.tell()
-
-            if not had_new_data:
-                # No new lines; let caller know
-                yield None
-
-        time.sleep(POLL_INTERVAL)
-
-
 def main():
     print("[INFO] Starting FrameView FPS → FireRate controller.")
     ensure_frameview_running()
@@ -155,45 +72,51 @@ def main():
 
     ema = None
     last_written = None
-    last_data_time = 0.0
+    window = FrameWindow()
+    log = ControlLog()  # console writes happen on its thread, not between frames
 
+    logs = LogDirectory(BENCHMARK_DIR, f"FrameView_{GAME_EXE_NAME}_*_Log.csv")
     current_log = None
-    last_rescan = 0.0
+    source = None
+    announced_wait = False
 
     try:
         while True:
-            now = time.time()
-
-            # (Re)acquire or refresh the current log file
-            if current_log is None or (now - last_rescan) >= RESCAN_EVERY:
-                new_log = latest_frameview_log(BENCHMARK_DIR, GAME_EXE_NAME)
-                if new_log and new_log != current_log:
-                    print(f"[INFO] Using log: {new_log}")
-                    current_log = new_log
-                    # Reset data timers so we don’t immediately rescan again
-                    last_data_time = now
-                last_rescan = now
+            # Cheap check: one stat() of BENCHMARK_DIR unless a file was added/removed
+            new_log = logs.newest()
+            if new_log and new_log != current_log:
+                print(f"[INFO] Using log: {new_log}")
+                if source is not None:
+                    source.close()
+                # Rotation/truncation of this log is handled by the source; newer logs are picked up here
+                source = FrameViewCsvSource(new_log, idle_s=POLL_INTERVAL).start()
+                current_log = new_log
 
             if not current_log:
-                print("[WAIT] No FrameView per-frame log found yet. Start a benchmark in FrameView...")
-                time.sleep(POLL_INTERVAL)
+                if not announced_wait:
+                    print("[WAIT] No FrameView per-frame log found yet. Start a benchmark in FrameView...")
+                    announced_wait = True
+                logs.wait(RESCAN_EVERY)
                 continue
 
-            # Tail FPS from the current log
-            for measurement in stream_fps_from_log(current_log):
-                now = time.time()
-                if measurement is None:
-                    # No new data this tick; if stale too long, force a rescan (maybe a new log rolled)
-                    if (now - last_data_time) >= RESCAN_EVERY:
-                        current_log = None
-                    break
-
-                last_data_time = now
-                fps = measurement
+            # Tail FPS from the current log (one source per log, so its read position survives).
+            # Each batch is everything read since the last one, so a backlog is one step.
+            # A failed read re-raises from the iterator instead of ending it quietly.
+            for batch in source:
+                if batch is None:
+                    # Idle heartbeat: switch if a newer log showed up, else keep following this one
+                    if logs.newest() != current_log:
+                        break
+                    continue
+
+                # One stats pass per batch; EMA advanced as if stepped once per frame
+                window.extend(batch.frame_ms, batch.dropped)
+                stats = window.tick()
                 if ema is None:
-                    ema = fps
+                    ema = stats.avg_fps
                 else:
-                    ema = EMA_ALPHA * fps + (1.0 - EMA_ALPHA) * ema
+                    a = 1.0 - (1.0 - EMA_ALPHA) ** stats.frames
+                    ema = a * stats.avg_fps + (1.0 - a) * ema
 
                 rate = fps_to_rate(ema)
 
@@ -201,13 +124,18 @@ def main():
                 if rate != last_written:
                     write_rate(OUTPUT_TXT, rate)
                     last_written = rate
-                    print(f"[OK] FPS~{ema:5.1f} → rate {rate}")
-
-            # small idle between scan cycles
-            time.sleep(POLL_INTERVAL)
+                    log.info(f"[OK] FPS~{ema:5.1f} → rate {rate}")
+            else:
+                print(f"[INFO] Log source ended: {current_log}")
+                break
 
     except KeyboardInterrupt:
         print("\n[INFO] Stopped.")
+    finally:
+        if source is not None:
+            source.close()
+        logs.close()
+        log.close()
 
 
 if __name__ == "__main__":
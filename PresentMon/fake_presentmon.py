@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# fake_presentmon.py
+# Synthetic PresentMon stand-in for headless testing/benchmarks on Linux.
+# Writes PresentMon-style per-frame CSV rows at a configurable frame rate with
+# optional injected stutters. Accepts the same -process_name / -output_file
+# arguments start_presentmon() passes, so it can be used as --presentmon.
+# Repeating -process_name interleaves several processes in one CSV (each gets
+# its own ProcessID; --fps may be repeated too, one per process).
+# -output_stdout streams the rows to stdout instead (the controller's pipe source).
+#
+#   python PresentMon/fake_presentmon.py -output_file /tmp/pm.csv --fps 240 --duration 10
+#   python PresentMon/fake_presentmon.py -output_file /tmp/pm.csv --fps 1000 --stutter-every 2 --stutter-ms 120
+#   python PresentMon/fake_presentmon.py -output_file /tmp/pm.csv -process_name a.exe -process_name b.exe --fps 144 --fps 60
+#   python PresentMon/fake_presentmon.py -output_stdout --fps 240 | head
+
+import argparse
+import heapq
+import random
+import signal
+import sys
+import time
+
+HEADER = [
+    "Application", "ProcessID", "SwapChainAddress", "Runtime", "SyncInterval", "PresentFlags",
+    "AllowsTearing", "PresentMode", "Dropped", "TimeInSeconds", "msInPresentAPI",
+    "msBetweenPresents", "msUntilRenderComplete", "msUntilDisplayed",
+]
+
+
+def frame_times(args, rng: random.Random, fps: float):
+    """Endless frame-time generator (ms): jittered base period plus stutters."""
+    base = 1000.0 / fps
+    next_stutter = args.stutter_every if args.stutter_every > 0 else None
+    t = 0.0
+    while True:
+        ms = max(0.05, rng.gauss(base, base * args.jitter))
+        if next_stutter is not None and t >= next_stutter:
+            ms = args.stutter_ms
+            next_stutter += args.stutter_every
+        elif args.stutter_prob and rng.random() < args.stutter_prob:
+            ms = args.stutter_ms
+        t += ms / 1000.0
+        yield ms
+
+
+def process_frames(args, rng: random.Random, index: int):
+    """(present time s, frame ms, index) for process #index."""
+    t = 0.0
+    for ms in frame_times(args, rng, args.fps[min(index, len(args.fps) - 1)]):
+        t += ms / 1000.0
+        yield t, ms, index
+
+
+def format_row(name: str, pid: int, t: float, ms: float, dropped: bool) -> str:
+    return (f"{name},{pid},0x0000023A5F2B1C70,DXGI,0,0,1,Hardware: Independent Flip,"
+            f"{int(dropped)},{t:.6f},0.120,{ms:.3f},{ms * 0.8:.3f},{ms * 1.5:.3f}\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Synthetic PresentMon CSV writer.", prefix_chars="-")
+    ap.add_argument("-output_file", "--output_file", default=None, help="CSV path (default: stdout)")
+    ap.add_argument("-process_name", "--process_name", action="append", default=None,
+                    help="Process to report (repeatable; default helldivers2.exe)")
+    ap.add_argument("-output_stdout", "--output_stdout", action="store_true", help="Write rows to stdout")
+    ap.add_argument("--fps", type=float, action="append", default=None, help="Frame rate (repeatable, per process)")
+    ap.add_argument("--jitter", type=float, default=0.05, help="Frame-time std-dev as a fraction of the period")
+    ap.add_argument("--duration", type=float, default=0.0, help="Seconds to run (0 = until killed)")
+    ap.add_argument("--stutter-every", type=float, default=0.0, help="Inject a stutter every N seconds")
+    ap.add_argument("--stutter-prob", type=float, default=0.0, help="Per-frame stutter probability")
+    ap.add_argument("--stutter-ms", type=float, default=100.0, help="Stutter frame time")
+    ap.add_argument("--drop-prob", type=float, default=0.0, help="Per-frame Dropped=1 probability")
+    ap.add_argument("--flush-frames", type=int, default=1, help="Flush every N frames (PresentMon buffers)")
+    ap.add_argument("--fast", action="store_true", help="Don't pace; write as fast as possible")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--announce-clock", action="store_true",
+                    help="Print the perf_counter() origin of TimeInSeconds to stderr (latency benchmarks)")
+    args, _unknown = ap.parse_known_args(argv)  # ignore real PresentMon flags we don't model
+    names = args.process_name or ["helldivers2.exe"]
+    args.fps = args.fps or [144.0]
+
+    rng = random.Random(args.seed)
+    out = sys.stdout if (args.output_stdout or not args.output_file) else open(args.output_file, "w", encoding="utf-8")
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(1))
+
+    out.write(",".join(HEADER) + "\n")
+    out.flush()
+    t0 = time.perf_counter()
+    if args.announce_clock:
+        print(f"t0={t0:.9f}", file=sys.stderr, flush=True)
+    n = 0
+    # Merge every process's present stream by time, like one ETW session would
+    streams = [process_frames(args, rng, i) for i in range(len(names))]
+    try:
+        for t, ms, i in heapq.merge(*streams):
+            if args.duration and t > args.duration or stop:
+                break
+            if not args.fast:
+                delay = t0 + t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            out.write(format_row(names[i], 4242 + i, t, ms, args.drop_prob and rng.random() < args.drop_prob))
+            n += 1
+            if n % args.flush_frames == 0:
+                out.flush()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        try:
+            out.flush()
+        except BrokenPipeError:
+            pass
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
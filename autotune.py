@@ -0,0 +1,338 @@
+# autotune.py
+# Parallel parameter sweep for the EMA control law over recorded sessions.
+# Replays a corpus of frame logs (PresentMon / FrameView CSV, or .hd2rec session
+# recordings) through Ema + the rate curve for every combination in a parameter
+# grid, on all cores (ProcessPoolExecutor), and ranks the configurations by
+#   jitter  how restless the rate is: sum |rate change| per second of log, as % of the mean rate
+#   lag     how long after a sustained FPS drop the rate has covered 90% of its move (s)
+#   score   jitter / baseline jitter + lag / baseline lag; the baseline is the current Config (= 2.0)
+#
+# Everything that doesn't depend on the swept knobs is done once, up front:
+#   - logs are read through the frame_cache sidecar (parsed once per log, then
+#     memory-mapped) or straight from the binary recording, and grouped into
+#     tailer batches exactly like replay.iter_log_batches
+#   - per update_interval_s, the batches go through FrameWindow once, giving the
+#     tick stream (log time, window FPS, frames) every config with that interval sees
+#   - FPS drop events are found once per log on 100 ms bins of the raw frame times
+# so a config costs one Ema.update_batch + RateCurve lookup per tick.
+#
+#   python autotune.py FrameView/FrameView_*_Log.csv
+#   python autotune.py hd2_sessions/*.hd2rec --grid ema_alpha=0.05,0.1,0.2 response_gamma=1,1.5 --top 20
+#   python autotune.py LOGS... --sample 5000 --out sweep.csv
+
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import statistics
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from control_law import Ema, RateCurve
+from frame_stats import FrameWindow
+from frame_tail import MAX_FRAME_MS
+from hd2_firerate_controller import CONFIG
+
+PARAMS = ("ema_alpha", "response_gamma", "target_fps", "update_interval_s", "min_rate", "max_rate")
+DEFAULT_GRID: Dict[str, Tuple[float, ...]] = {
+    "ema_alpha": (0.05, 0.1, 0.2, 0.3, 0.5),
+    "response_gamma": (0.8, 1.0, 1.3, 1.6, 2.0),
+    "target_fps": (50.0, 60.0, 75.0, 90.0),
+    "update_interval_s": (0.1, 0.25, 0.5),
+    "min_rate": (500.0, 1000.0, 1500.0),
+    "max_rate": (7000.0, 8500.0, 10000.0),
+}
+
+BIN_S = 0.1             # drop detection resolution
+DROP_FRACTION = 0.75    # a bin below 75% of the preceding second's median FPS...
+DROP_HOLD_S = 0.5       # ...that stays below 85% of it for this long is a drop event
+DROP_HOLD_FRACTION = 0.85
+DROP_GAP_S = 2.0        # minimum spacing between events
+LAG_CAP_S = 3.0         # a config that hasn't covered 90% of the move by then scores this
+MIN_MOVE = 0.02         # a config whose own curve moves < 2% of the rate on a drop didn't react: LAG_CAP_S
+
+
+# -----------------------------
+# Corpus
+# -----------------------------
+@dataclass
+class Trace:
+    name: str
+    t: array        # batch log time (s)
+    counts: array   # frames per batch
+    ms: array       # all frame times, batch after batch
+
+    @property
+    def span_s(self) -> float:
+        return self.t[-1] - self.t[0] if len(self.t) > 1 else 0.0
+
+
+def _batches_from_columns(ms_col, t_col, batch_ms: float):
+    # Same grouping as replay.iter_log_batches, over frame_cache columns instead of CSV text
+    step = batch_ms / 1000.0
+    clock = 0.0
+    batch_end = None
+    buf: List[float] = []
+    for i in range(len(ms_col)):
+        ms = ms_col[i]
+        if not 0 < ms < MAX_FRAME_MS:   # also NaN
+            continue
+        t = t_col[i] if t_col is not None else math.nan
+        clock = t if t == t else clock + ms / 1000.0
+        if batch_end is None:
+            batch_end = clock + step
+        elif clock >= batch_end:
+            yield batch_end, buf
+            buf = []
+            while batch_end <= clock:
+                batch_end += step
+        buf.append(ms)
+    if buf:
+        yield clock, buf
+
+
+def load_trace(path: str, batch_ms: float = 10.0) -> Trace:
+    """A log as tailer batches; CSV through its frame_cache sidecar, .hd2rec read directly."""
+    from session_record import is_recording, iter_recording_batches
+    if is_recording(path):
+        batches = ((t, ms) for t, ms, _dropped in iter_recording_batches(path))
+    else:
+        from frame_cache import column_names, load_columns
+        names = {n.lower(): n for n in column_names(path)}
+        ms_name = names.get("msbetweenpresents")
+        if ms_name is None:
+            raise RuntimeError(f"{path}: no MsBetweenPresents column")
+        t_name = names.get("timeinseconds")
+        cols = load_columns(path, [ms_name] + ([t_name] if t_name else []))
+        batches = _batches_from_columns(cols[ms_name], cols[t_name] if t_name else None, batch_ms)
+    tr = Trace(os.path.basename(path), array("d"), array("l"), array("d"))
+    for t, ms in batches:
+        tr.t.append(t)
+        tr.counts.append(len(ms))
+        tr.ms.extend(ms)
+    return tr
+
+
+def tick_stream(trace: Trace, interval_s: float) -> Tuple[array, array, array]:
+    """(log time, window avg FPS, frames) per control tick, as RateController would see them."""
+    window = FrameWindow(CONFIG.window_frames)
+    ts, fps, frames = array("d"), array("d"), array("l")
+    last = None
+    pos = 0
+    for t, n in zip(trace.t, trace.counts):
+        window.extend(trace.ms[pos:pos + n])
+        pos += n
+        if last is not None and t - last < interval_s:
+            continue
+        stats = window.tick()
+        if stats is None:
+            continue
+        last = t
+        ts.append(t)
+        fps.append(stats.avg_fps)
+        frames.append(stats.frames)
+    return ts, fps, frames
+
+
+def drop_events(trace: Trace) -> List[Tuple[float, float]]:
+    """(log time, FPS after the drop) for each sustained FPS drop, from 100 ms bins of raw frames."""
+    bins: List[Tuple[float, float]] = []   # (bin start, fps)
+    acc_ms = 0.0
+    acc_n = 0
+    start = None
+    pos = 0
+    for t, n in zip(trace.t, trace.counts):
+        acc_ms += sum(trace.ms[pos:pos + n])
+        acc_n += n
+        pos += n
+        if start is None:
+            start = t
+        if t - start >= BIN_S and acc_ms > 0:
+            bins.append((start, 1000.0 * acc_n / acc_ms))
+            start, acc_ms, acc_n = t, 0.0, 0
+    per_s = max(1, int(round(1.0 / BIN_S)))
+    hold = max(1, int(round(DROP_HOLD_S / BIN_S)))
+    events = []
+    last_event = -math.inf
+    for i in range(per_s, len(bins) - hold):
+        t, f = bins[i]
+        if t - last_event < DROP_GAP_S:
+            continue
+        ref = statistics.median(b for _, b in bins[i - per_s:i])
+        if f >= DROP_FRACTION * ref:
+            continue
+        after = [b for _, b in bins[i:i + hold]]
+        if max(after) >= DROP_HOLD_FRACTION * ref:
+            continue
+        events.append((t, statistics.fmean(after)))
+        last_event = t
+    return events
+
+
+# -----------------------------
+# Scoring (runs in the workers)
+# -----------------------------
+_STREAMS: Dict[float, List[Tuple[array, array, array]]] = {}
+_EVENTS: List[List[Tuple[float, float]]] = []
+
+
+def _init_worker(streams, events):
+    global _STREAMS, _EVENTS
+    _STREAMS, _EVENTS = streams, events
+
+
+def evaluate(params: Tuple[float, ...]) -> Tuple[Tuple[float, ...], float, float, int]:
+    """(params, jitter %/s, mean lag s over all drops, drops the config responded to in time)."""
+    cfg = replace(CONFIG, **dict(zip(PARAMS, params)))
+    curve = RateCurve(cfg)
+    moved = 0.0
+    rate_sum = 0.0
+    ticks = 0
+    span = 0.0
+    lags: List[float] = []
+    for (ts, fps, frames), events in zip(_STREAMS[cfg.update_interval_s], _EVENTS):
+        if not ts:
+            continue
+        ema = Ema(cfg.ema_alpha)
+        rates = array("d")
+        prev = None
+        for f, n in zip(fps, frames):
+            r = curve(ema.update_batch(f, n))
+            rates.append(r)
+            if prev is not None:
+                moved += abs(r - prev)
+            prev = r
+        rate_sum += sum(rates)
+        ticks += len(rates)
+        span += ts[-1] - ts[0]
+        lags += _event_lags(ts, rates, events, curve)
+    if not ticks:
+        return params, math.nan, math.nan, 0
+    mean_rate = rate_sum / ticks
+    jitter = 100.0 * moved / max(span, 1e-9) / mean_rate
+    lag = statistics.fmean(lags) if lags else math.nan
+    return params, jitter, lag, sum(1 for x in lags if x < LAG_CAP_S)
+
+
+def _event_lags(ts, rates, events, curve) -> List[float]:
+    from bisect import bisect_left
+    out = []
+    for t_ev, fps_after in events:
+        i = bisect_left(ts, t_ev)
+        if i == 0 or i >= len(ts):
+            continue
+        before = rates[i - 1]
+        goal = curve(fps_after)
+        move = goal - before
+        lag = LAG_CAP_S
+        if abs(move) < MIN_MOVE * before:
+            out.append(lag)  # clamped / flat here: every config is judged on every drop
+            continue
+        level = before + 0.9 * move
+        for j in range(i, len(ts)):
+            if ts[j] - t_ev > LAG_CAP_S:
+                break
+            if (rates[j] - level) * move >= 0:
+                lag = ts[j] - t_ev
+                break
+        out.append(lag)
+    return out
+
+
+# -----------------------------
+# Sweep
+# -----------------------------
+def parse_grid(specs: Sequence[str]) -> Dict[str, Tuple[float, ...]]:
+    grid = dict(DEFAULT_GRID)
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in PARAMS or not values:
+            raise SystemExit(f"--grid expects NAME=v1,v2,... with NAME in {', '.join(PARAMS)}; got {spec!r}")
+        grid[name] = tuple(float(v) for v in values.split(","))
+    return grid
+
+
+def candidates(grid: Dict[str, Tuple[float, ...]], sample: Optional[int] = None, seed: int = 1):
+    combos = [c for c in itertools.product(*(grid[p] for p in PARAMS))
+              if c[PARAMS.index("min_rate")] < c[PARAMS.index("max_rate")]]
+    if sample and sample < len(combos):
+        combos = random.Random(seed).sample(combos, sample)
+    return combos
+
+
+def sweep(traces: List[Trace], combos: List[Tuple[float, ...]], workers: Optional[int] = None):
+    baseline = tuple(getattr(CONFIG, p) for p in PARAMS)
+    intervals = sorted({c[PARAMS.index("update_interval_s")] for c in combos} | {CONFIG.update_interval_s})
+    streams = {iv: [tick_stream(tr, iv) for tr in traces] for iv in intervals}
+    events = [drop_events(tr) for tr in traces]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(combos) // (workers * 8))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(streams, events)) as pool:
+        results = list(pool.map(evaluate, [baseline] + combos, chunksize=chunk))
+    return results[0], results[1:], events
+
+
+def score(result, base) -> float:
+    _params, jitter, lag, _n = result
+    _bp, bj, bl, _bn = base
+    if math.isnan(jitter) or not bj:
+        return math.inf
+    if math.isnan(bl) or not bl:
+        return 2.0 * jitter / bj   # no FPS drops in the corpus: stability only
+    return jitter / bj + lag / bl
+
+
+def print_table(rows, base, top: int):
+    head = "".join(f"{p:>18s}" for p in PARAMS)
+    print(f"  {'rank':>4s}{head}{'jitter %/s':>12s}{'lag s':>8s}{'drops':>7s}{'score':>8s}")
+    for rank, r in enumerate([base] + rows[:top]):
+        params, jitter, lag, n = r
+        label = "now" if rank == 0 else str(rank)
+        cells = "".join(f"{v:>18g}" for v in params)
+        print(f"  {label:>4s}{cells}{jitter:>12.2f}{lag:>8.3f}{n:>7d}{score(r, base):>8.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sweep Config knobs over recorded sessions and rank them.")
+    ap.add_argument("logs", nargs="+", help="PresentMon / FrameView CSV logs or .hd2rec recordings")
+    ap.add_argument("--grid", nargs="*", default=[], metavar="NAME=V1,V2",
+                    help=f"Override a grid axis ({', '.join(PARAMS)})")
+    ap.add_argument("--sample", type=int, default=None, help="Score a random subset of this many configs")
+    ap.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    ap.add_argument("--batch-ms", type=float, default=10.0, help="Log time per tailer batch (CSV logs)")
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--out", default=None, help="Write every scored config to this CSV")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    traces = [load_trace(p, args.batch_ms) for p in args.logs]
+    combos = candidates(parse_grid(args.grid), args.sample)
+    t1 = time.perf_counter()
+    base, results, events = sweep(traces, combos, args.workers)
+    t2 = time.perf_counter()
+
+    frames = sum(len(tr.ms) for tr in traces)
+    print(f"[TUNE] {len(traces)} logs, {frames} frames, {sum(tr.span_s for tr in traces):.0f} s, "
+          f"{sum(map(len, events))} FPS drops; load {t1 - t0:.2f} s")
+    print(f"[TUNE] {len(combos)} configs on {args.workers or os.cpu_count()} workers in {t2 - t1:.2f} s "
+          f"({1e3 * (t2 - t1) / max(1, len(combos)):.2f} ms/config)\n")
+    if math.isnan(base[2]):
+        print("  (no FPS drops in these logs: ranked by jitter alone; add sessions with drops to judge lag)\n")
+    ranked = sorted(results, key=lambda r: score(r, base))
+    print_table(ranked, base, args.top)
+
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as w:
+            wr = csv.writer(w)
+            wr.writerow(list(PARAMS) + ["jitter_pct_per_s", "lag_s", "drops", "score"])
+            for r in ranked:
+                wr.writerow(list(r[0]) + [f"{r[1]:.4f}", f"{r[2]:.4f}", r[3], f"{score(r, base):.4f}"])
+
+
+if __name__ == "__main__":
+    main()
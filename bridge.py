@@ -0,0 +1,467 @@
+# bridge.py
+# Output transports for the fire-rate value.
+#   file -> the text bridge (temp file + os.replace), read by hd2_firerate_bridge.lua
+#   mmap -> fixed 32-byte record in a memory-mapped file, guarded by a seqlock
+#   udp  -> push one datagram per value to a localhost receiver (bridge_receiver.py)
+#   pipe -> push over a named pipe (Windows) / FIFO (POSIX) to the same receiver
+#
+# mmap record layout (little-endian):
+#   0  u32  magic  b"HD2B"
+#   4  u32  version
+#   8  u64  seq        odd while a write is in progress, even when stable
+#   16 f64  value
+#   24 f64  timestamp  writer's time.time() at publish
+# A reader copies seq, payload, seq again and retries until both seq reads match
+# and are even, so it never sees a half-written value. seq also tells a reader
+# whether anything changed since its last look; timestamp tells it how stale it is.
+#
+# text file format v2: one line "HD2 2 <seq> <value>"
+#   seq grows by one per published value (continued across controller restarts),
+#   and the writer skips values identical to the last one at the published
+#   precision, so an unchanged seq means there is nothing to do. The Lua timer
+#   then skips the memory-record write and backs off from BRIDGE_POLL_MS to
+#   BRIDGE_IDLE_MAX_MS; BridgeFileReader is the same logic in Python. A bare
+#   number (v1, FileBridge(versioned=False)) is still read, keyed by its text.
+
+import errno
+import mmap
+import os
+import re
+import socket
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+# -----------------------------
+# Text file bridge
+# -----------------------------
+FILE_VERSION = 2
+BRIDGE_POLL_MS = 200       # Lua timer interval while values change (the old fixed interval)
+BRIDGE_IDLE_MAX_MS = 1000  # slowest poll while nothing changes
+BRIDGE_IDLE_AFTER = 5      # unchanged polls before the timer starts backing off
+_FILE_V2 = re.compile(r"^HD2 (\d+) (\d+) (\S+)")
+
+
+def format_bridge_text(value: float, seq: Optional[int] = None) -> str:
+    if seq is None:
+        return f"{value:.3f}"
+    return f"HD2 {FILE_VERSION} {seq} {value:.3f}"
+
+
+def parse_bridge_text(data: str) -> Optional[Tuple[str, float]]:
+    """(change key, value) from bridge file text, or None if unreadable; the key is seq (v2) or the text (v1)."""
+    m = _FILE_V2.match(data)
+    try:
+        if m:
+            return m.group(2), float(m.group(3))
+        return data, float(data)
+    except ValueError:
+        return None
+
+
+def _read_file_seq(path: str) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as r:
+            m = _FILE_V2.match(r.read())
+    except OSError:
+        return 0
+    return int(m.group(2)) if m else 0
+
+
+def write_bridge_file(path: str, value: float, seq: Optional[int] = None) -> int:
+    """Atomically publish `value`: v2 line with `seq`, or a bare number (v1) without.
+
+    Returns how many os.replace attempts were retried (reader contention).
+    """
+    p = Path(path)
+    tmp = p.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as w:
+        w.write(format_bridge_text(value, seq))
+    try:
+        os.replace(tmp, p)
+        return 0
+    except PermissionError:
+        # Reader has the file open (Windows sharing violation); try once more
+        time.sleep(0.05)
+        os.replace(tmp, p)
+        return 1
+
+
+class Bridge:
+    """Base transport: write(value) publishes one fire-rate value.
+
+    `observed` is the time.perf_counter() at which the frame that triggered this
+    value was seen; push transports forward it so receivers can measure latency.
+    write() returns True if the value was published, False if it was skipped
+    (unchanged) or dropped, so callers only count and record real writes.
+    """
+
+    kind = "base"
+
+    def write(self, value: float, observed: Optional[float] = None) -> bool:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FileBridge(Bridge):
+    """Text bridge. Identical values (at the published precision) are not rewritten."""
+
+    kind = "file"
+
+    def __init__(self, path: str, versioned: bool = True):
+        self.path = path
+        self.versioned = versioned
+        self.skipped = 0
+        self.retries = 0   # os.replace retried because a reader held the file
+        self._last: Optional[str] = None
+        # Continue the previous writer's sequence, so a reader's last seq never matches a new value
+        self._seq = _read_file_seq(path) if versioned else 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def write(self, value: float, observed: Optional[float] = None) -> bool:
+        text = f"{value:.3f}"
+        if text == self._last:
+            self.skipped += 1
+            return False
+        if self.versioned:
+            self._seq += 1
+            self.retries += write_bridge_file(self.path, value, self._seq)
+        else:
+            self.retries += write_bridge_file(self.path, value)
+        self._last = text
+        return True
+
+
+class BridgeFileReader:
+    """Python twin of the hd2_firerate_bridge.lua timer, for headless tests.
+
+    poll() is one timer tick: read the file, skip if its change key is the one
+    already applied, otherwise "apply" the value (the Lua mr.Value write). After
+    BRIDGE_IDLE_AFTER unchanged polls, each further one doubles interval_ms up to
+    BRIDGE_IDLE_MAX_MS; a change resets it to BRIDGE_POLL_MS.
+    """
+
+    def __init__(self, path: str, apply: Optional[Callable[[float], None]] = None):
+        self.path = path
+        self.apply = apply
+        self.interval_ms = BRIDGE_POLL_MS
+        self.value: Optional[float] = None
+        self.polls = 0
+        self.applied = 0
+        self.skipped = 0
+        self.unreadable = 0
+        self._last_key: Optional[str] = None
+        self._idle = 0
+
+    def poll(self) -> Optional[float]:
+        """One tick; the value written to the memory record, or None if nothing was written."""
+        self.polls += 1
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = f.read()
+        except OSError:
+            self.unreadable += 1
+            return None
+        parsed = parse_bridge_text(data)
+        if parsed is None or not parsed[1] > 0:   # the Lua check: v and v == v and v > 0
+            self.unreadable += 1
+            return None
+        key, value = parsed
+        if key == self._last_key:
+            self.skipped += 1
+            self._idle += 1
+            if self._idle >= BRIDGE_IDLE_AFTER and self.interval_ms < BRIDGE_IDLE_MAX_MS:
+                self.interval_ms = min(BRIDGE_IDLE_MAX_MS, self.interval_ms * 2)
+            return None
+        self._last_key = key
+        self._idle = 0
+        self.interval_ms = BRIDGE_POLL_MS
+        self.value = value
+        self.applied += 1
+        if self.apply is not None:
+            self.apply(value)
+        return value
+
+    def run(self, stop: Callable[[], bool]):
+        """Poll on the adaptive interval until stop() is true."""
+        while not stop():
+            self.poll()
+            time.sleep(self.interval_ms / 1000.0)
+
+
+# -----------------------------
+# Memory-mapped seqlock bridge
+# -----------------------------
+MAGIC = b"HD2B"
+VERSION = 1
+_HDR = struct.Struct("<4sI")
+_SEQ = struct.Struct("<Q")
+_PAYLOAD = struct.Struct("<dd")
+SEQ_OFF = _HDR.size
+PAYLOAD_OFF = SEQ_OFF + _SEQ.size
+RECORD_SIZE = PAYLOAD_OFF + _PAYLOAD.size
+
+
+@dataclass
+class BridgeSample:
+    value: float
+    seq: int
+    timestamp: float
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.timestamp
+
+
+def _map_record(path: str, writable: bool):
+    mode = "r+b" if writable else "rb"
+    if writable and not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(b"\0" * RECORD_SIZE)
+    f = open(path, mode)
+    if writable and os.fstat(f.fileno()).st_size < RECORD_SIZE:
+        f.truncate(RECORD_SIZE)
+    access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+    return f, mmap.mmap(f.fileno(), RECORD_SIZE, access=access)
+
+
+class MmapBridge(Bridge):
+    """Single-writer seqlock publisher. Writing is three memcpy's, no syscalls."""
+
+    kind = "mmap"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f, self._mm = _map_record(path, writable=True)
+        magic, _ver = _HDR.unpack_from(self._mm, 0)
+        seq = _SEQ.unpack_from(self._mm, SEQ_OFF)[0] if magic == MAGIC else 0
+        # Continue the previous writer's sequence; an odd seq means it died mid-write
+        self._seq = seq + (seq & 1)
+        _SEQ.pack_into(self._mm, SEQ_OFF, self._seq)
+        _HDR.pack_into(self._mm, 0, MAGIC, VERSION)
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def write(self, value: float, observed: Optional[float] = None, timestamp: Optional[float] = None) -> bool:
+        mm = self._mm
+        _SEQ.pack_into(mm, SEQ_OFF, self._seq + 1)
+        _PAYLOAD.pack_into(mm, PAYLOAD_OFF, value, time.time() if timestamp is None else timestamp)
+        self._seq += 2
+        _SEQ.pack_into(mm, SEQ_OFF, self._seq)
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._f.close()
+            self._mm = None
+
+
+class MmapBridgeReader:
+    """Lock-free reader for MmapBridge records."""
+
+    def __init__(self, path: str, max_retries: int = 1000):
+        self.path = path
+        self.max_retries = max_retries
+        self._f, self._mm = _map_record(path, writable=False)
+        self.retries = 0  # total seqlock retries, for diagnostics
+
+    def read(self) -> Optional[BridgeSample]:
+        """Consistent snapshot, or None if the record was never written / stayed busy."""
+        mm = self._mm
+        if _HDR.unpack_from(mm, 0)[0] != MAGIC:
+            return None
+        for _ in range(self.max_retries):
+            s1 = _SEQ.unpack_from(mm, SEQ_OFF)[0]
+            if s1 & 1:
+                self.retries += 1
+                continue
+            value, ts = _PAYLOAD.unpack_from(mm, PAYLOAD_OFF)
+            s2 = _SEQ.unpack_from(mm, SEQ_OFF)[0]
+            if s1 == s2:
+                return BridgeSample(value, s1, ts) if s1 else None
+            self.retries += 1
+        return None
+
+    def read_if_new(self, last_seq: int) -> Optional[BridgeSample]:
+        s = self.read()
+        return s if s is not None and s.seq != last_seq else None
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._f.close()
+            self._mm = None
+
+
+# -----------------------------
+# Push transports (UDP / named pipe)
+# -----------------------------
+# Packet (little-endian, 40 bytes):
+#   magic b"HD2P", u32 version, u64 seq, f64 value, f64 wall time, f64 observed (perf_counter)
+PUSH_MAGIC = b"HD2P"
+_PUSH = struct.Struct("<4sIQddd")
+PUSH_SIZE = _PUSH.size
+DEFAULT_PUSH_ADDR = "127.0.0.1:47800"
+DEFAULT_PIPE = r"\\.\pipe\hd2_fire_rate" if sys.platform == "win32" else "/tmp/hd2_fire_rate.fifo"
+
+
+@dataclass
+class PushSample:
+    value: float
+    seq: int
+    timestamp: float
+    observed: float  # sender's perf_counter() when the frame was seen; 0.0 if unknown
+
+
+def pack_push(seq: int, value: float, observed: Optional[float]) -> bytes:
+    return _PUSH.pack(PUSH_MAGIC, VERSION, seq, value, time.time(), observed or 0.0)
+
+
+def unpack_push(data: bytes) -> Optional[PushSample]:
+    if len(data) < PUSH_SIZE:
+        return None
+    magic, _ver, seq, value, ts, observed = _PUSH.unpack_from(data, 0)
+    if magic != PUSH_MAGIC:
+        return None
+    return PushSample(value, seq, ts, observed)
+
+
+def parse_addr(addr: str):
+    host, _, port = addr.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+class UdpBridge(Bridge):
+    """Fire-and-forget datagram per value. Never blocks; a missing receiver just drops it."""
+
+    kind = "udp"
+
+    def __init__(self, addr: str = DEFAULT_PUSH_ADDR):
+        self.addr = parse_addr(addr)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._seq = 0
+        self.dropped = 0
+
+    def write(self, value: float, observed: Optional[float] = None) -> bool:
+        self._seq += 1
+        try:
+            self._sock.sendto(pack_push(self._seq, value, observed), self.addr)
+            return True
+        except OSError:
+            # Windows reports ICMP port-unreachable from an earlier send as an error here
+            self.dropped += 1
+            return False
+
+    def close(self):
+        self._sock.close()
+
+
+def _set_pipe_nowait(fd: int):
+    """PIPE_NOWAIT on our end of a Windows named pipe: a write into a full pipe
+    returns at once with nothing written instead of waiting for the reader."""
+    import ctypes
+    import msvcrt
+    from ctypes import wintypes
+    PIPE_NOWAIT = 0x1
+    k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    k32.SetNamedPipeHandleState.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD),
+                                            ctypes.c_void_p, ctypes.c_void_p]
+    mode = wintypes.DWORD(PIPE_NOWAIT)
+    if not k32.SetNamedPipeHandleState(msvcrt.get_osfhandle(fd), ctypes.byref(mode), None, None):
+        raise OSError(ctypes.get_last_error(), "SetNamedPipeHandleState failed")
+
+
+class PipeBridge(Bridge):
+    """Writes packets into a named pipe / FIFO owned by the receiver.
+
+    The pipe is opened lazily and never blocks (O_NONBLOCK on a FIFO,
+    PIPE_NOWAIT on Windows); while no receiver is listening, values are
+    dropped and the open is retried on the next write. A full pipe (stalled
+    receiver) drops the value but keeps the pipe.
+    """
+
+    kind = "pipe"
+
+    def __init__(self, path: str = DEFAULT_PIPE):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._seq = 0
+        self.dropped = 0
+
+    def _open(self) -> bool:
+        try:
+            if sys.platform == "win32":
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_BINARY)
+                try:
+                    _set_pipe_nowait(self._fd)
+                except OSError:
+                    os.close(self._fd)
+                    raise
+            else:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            return True
+        except OSError:
+            # No receiver yet (ENXIO on a FIFO, FileNotFoundError/busy on Windows)
+            self._fd = None
+            return False
+
+    def write(self, value: float, observed: Optional[float] = None) -> bool:
+        self._seq += 1
+        if self._fd is None and not self._open():
+            self.dropped += 1
+            return False
+        try:
+            if os.write(self._fd, pack_push(self._seq, value, observed)) == PUSH_SIZE:
+                return True
+            self.dropped += 1  # full pipe in PIPE_NOWAIT message mode: nothing was written
+            return False
+        except OSError as e:
+            self.dropped += 1
+            if e.errno != errno.EAGAIN:  # full pipe: keep it, drop this value
+                os.close(self._fd)
+                self._fd = None
+            return False
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+# -----------------------------
+# Factory
+# -----------------------------
+BRIDGE_KINDS = {
+    "file": FileBridge,
+    "mmap": MmapBridge,
+    "udp": UdpBridge,
+    "pipe": PipeBridge,
+}
+PUSH_KINDS = ("udp", "pipe")
+
+
+def make_bridge(kind: str, target: str, **opts) -> Bridge:
+    try:
+        cls = BRIDGE_KINDS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown bridge kind {kind!r}; expected one of {sorted(BRIDGE_KINDS)}") from None
+    return cls(target, **opts)
+
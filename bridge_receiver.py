@@ -0,0 +1,183 @@
+# bridge_receiver.py
+# Reference receiver for the push bridge transports (udp / pipe) in bridge.py.
+# Prints each fire-rate value the moment it lands, with the latency from the
+# controller observing the frame to this process receiving the value.
+# --forward-file optionally hands every value on to the text bridge file, so the
+# existing CE Lua timer keeps working while the controller pushes.
+
+import argparse
+import os
+import select
+import socket
+import sys
+import time
+from typing import Optional, Tuple
+
+from bridge import (DEFAULT_PIPE, DEFAULT_PUSH_ADDR, PUSH_MAGIC, PUSH_SIZE, FileBridge, PushSample, parse_addr,
+                    unpack_push)
+
+
+class UdpReceiver:
+    def __init__(self, addr: str = DEFAULT_PUSH_ADDR):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(parse_addr(addr))
+
+    def recv(self, timeout: Optional[float] = None) -> Optional[Tuple[PushSample, float]]:
+        """Next (sample, perf_counter at receipt), or None on timeout."""
+        self._sock.settimeout(timeout)
+        while True:
+            try:
+                data = self._sock.recv(256)
+            except socket.timeout:
+                return None
+            now = time.perf_counter()
+            sample = unpack_push(data)
+            if sample is not None:
+                return sample, now
+
+    def close(self):
+        self._sock.close()
+
+
+class PipeReceiver:
+    """Server end of the pipe: a FIFO on POSIX, a message-mode named pipe on Windows.
+
+    On Windows recv() blocks until a packet arrives (timeout is ignored) and
+    re-arms the pipe when the controller disconnects.
+    """
+
+    def __init__(self, path: str = DEFAULT_PIPE):
+        self.path = path
+        self._buf = b""
+        self._created = False   # FIFO made here: removed again by close()
+        if sys.platform == "win32":
+            self._init_win32()
+        else:
+            if not os.path.exists(path):
+                os.mkfifo(path)
+                self._created = True
+            try:
+                self._fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+                # Hold a write end ourselves so the FIFO doesn't report EOF between writers
+                self._keepalive = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                if self._created:
+                    os.unlink(path)
+                raise
+
+    def _init_win32(self):
+        import ctypes
+        from ctypes import wintypes
+        k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        k32.CreateNamedPipeW.restype = wintypes.HANDLE
+        k32.CreateNamedPipeW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.DWORD,
+                                         wintypes.DWORD, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p]
+        k32.ConnectNamedPipe.argtypes = [wintypes.HANDLE, ctypes.c_void_p]
+        k32.DisconnectNamedPipe.argtypes = [wintypes.HANDLE]
+        k32.ReadFile.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD,
+                                 ctypes.POINTER(wintypes.DWORD), ctypes.c_void_p]
+        k32.CloseHandle.argtypes = [wintypes.HANDLE]
+        PIPE_ACCESS_INBOUND, PIPE_TYPE_MESSAGE, PIPE_READMODE_MESSAGE = 0x1, 0x4, 0x2
+        self._k32, self._ctypes, self._wintypes = k32, ctypes, wintypes
+        self._h = k32.CreateNamedPipeW(self.path, PIPE_ACCESS_INBOUND, PIPE_TYPE_MESSAGE | PIPE_READMODE_MESSAGE,
+                                       1, 0, 64 * PUSH_SIZE, 0, None)
+        if self._h in (None, wintypes.HANDLE(-1).value):
+            raise OSError(ctypes.get_last_error(), f"CreateNamedPipeW failed for {self.path}")
+        self._connected = False
+
+    def _recv_win32(self) -> Optional[Tuple[PushSample, float]]:
+        ERROR_PIPE_CONNECTED = 535
+        buf = self._ctypes.create_string_buffer(PUSH_SIZE)
+        n = self._wintypes.DWORD(0)
+        while True:
+            if not self._connected:
+                ok = self._k32.ConnectNamedPipe(self._h, None)
+                if not ok and self._ctypes.get_last_error() != ERROR_PIPE_CONNECTED:
+                    raise OSError(self._ctypes.get_last_error(), "ConnectNamedPipe failed")
+                self._connected = True
+            if not self._k32.ReadFile(self._h, buf, PUSH_SIZE, self._ctypes.byref(n), None):
+                # Writer went away: re-arm for the next controller run
+                self._k32.DisconnectNamedPipe(self._h)
+                self._connected = False
+                continue
+            now = time.perf_counter()
+            sample = unpack_push(buf.raw[:n.value])
+            if sample is not None:
+                return sample, now
+
+    def recv(self, timeout: Optional[float] = None) -> Optional[Tuple[PushSample, float]]:
+        if sys.platform == "win32":
+            return self._recv_win32()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            while len(self._buf) < PUSH_SIZE:
+                left = None if deadline is None else max(0.0, deadline - time.monotonic())
+                ready, _, _ = select.select([self._fd], [], [], left)
+                if not ready:
+                    return None
+                self._buf += os.read(self._fd, 64 * PUSH_SIZE)
+            now = time.perf_counter()
+            sample = unpack_push(self._buf[:PUSH_SIZE])
+            if sample is not None:
+                self._buf = self._buf[PUSH_SIZE:]
+                return sample, now
+            # Not a packet boundary (a foreign write to the FIFO): resync on the next magic
+            i = self._buf.find(PUSH_MAGIC, 1)
+            self._buf = self._buf[i:] if i > 0 else self._buf[1 - len(PUSH_MAGIC):]
+
+    def close(self):
+        if sys.platform == "win32":
+            self._k32.CloseHandle(self._h)
+        else:
+            os.close(self._fd)
+            os.close(self._keepalive)
+            if self._created:
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+                self._created = False
+
+
+def make_receiver(transport: str, target: Optional[str] = None):
+    if transport == "udp":
+        return UdpReceiver(target or DEFAULT_PUSH_ADDR)
+    if transport == "pipe":
+        return PipeReceiver(target or DEFAULT_PIPE)
+    raise ValueError(f"Unknown push transport {transport!r}; expected 'udp' or 'pipe'")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Reference receiver for the udp/pipe fire-rate bridge.")
+    ap.add_argument("--transport", choices=("udp", "pipe"), default="udp")
+    ap.add_argument("--target", default=None, help=f"host:port for udp (default {DEFAULT_PUSH_ADDR}) "
+                                                   f"or pipe path (default {DEFAULT_PIPE})")
+    ap.add_argument("--forward-file", default=None, help="Also write each value to this text bridge file")
+    ap.add_argument("--quiet", action="store_true", help="Don't print every value")
+    args = ap.parse_args()
+
+    rx = make_receiver(args.transport, args.target)
+    forward = FileBridge(args.forward_file) if args.forward_file else None
+    print(f"[RECV] Listening on {args.transport} {args.target or ''}".rstrip())
+    last_seq = 0
+    try:
+        while True:
+            got = rx.recv(1.0)
+            if got is None:
+                continue
+            sample, now = got
+            if forward is not None:
+                forward.write(sample.value)
+            if not args.quiet:
+                gap = "" if sample.seq == last_seq + 1 or last_seq == 0 else f"  (missed {sample.seq - last_seq - 1})"
+                lat = f"{(now - sample.observed) * 1000:7.2f} ms" if sample.observed else "      n/a"
+                print(f"[RECV] #{sample.seq:<7d} rate={sample.value:8.1f}  latency={lat}{gap}")
+            last_seq = sample.seq
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rx.close()
+
+
+if __name__ == "__main__":
+    main()
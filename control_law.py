@@ -0,0 +1,388 @@
+# control_law.py
+# Pluggable FPS -> fire-rate control laws, plus a closed-loop plant simulator
+# that scores them on step responses.
+#
+#   ema  -> EmaLinearLaw: today's behaviour (per-frame EMA of window FPS, then
+#           the response curve)
+#   pid  -> PidFeedforwardLaw: tracks frame time with a P (level) + I (trend)
+#           observer and feeds the trend forward `horizon_s` so a developing
+#           drop is acted on before the average catches up
+#
+# A law sees one WindowStats per control tick, estimates the FPS to act on and
+# maps it through its RateCurve; update() returns (rate, fps_estimate).
+# RateCurve is the fps -> rate mapping with the response_gamma power curve
+# precomputed into a table, so a tick does one lookup instead of a pow().
+#
+#   python control_law.py                       # step-response report, default Config
+#   python control_law.py --coupling 0.3 --jitter 0.15 --laws ema pid
+
+import math
+import random
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from frame_stats import FrameWindow, WindowStats
+
+CURVE_STEPS = 1024  # table points over 0..target_fps; linear interpolation between them
+
+
+# -----------------------------
+# Building blocks
+# -----------------------------
+class Ema:
+    def __init__(self, alpha: float, initial: Optional[float] = None):
+        self.alpha = alpha
+        self.value = initial
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+    def update_batch(self, x: float, n: int) -> float:
+        # Same as n per-frame updates with value x: keeps ema_alpha's per-frame time constant
+        if self.value is None:
+            self.value = x
+        elif n > 0:
+            a = 1.0 - (1.0 - self.alpha) ** n
+            self.value = a * x + (1 - a) * self.value
+        return self.value
+
+
+class RateCurve:
+    """fps -> rate, same result as hd2_firerate_controller.fps_to_rate.
+
+    Below target_fps the fraction is raised to response_gamma; that power curve
+    is tabulated once (CURVE_STEPS points, interpolated), above target it is linear.
+    """
+
+    def __init__(self, cfg, steps: int = CURVE_STEPS):
+        self.target_fps = cfg.target_fps
+        self.base_rate = cfg.base_rate
+        self.min_rate = cfg.min_rate
+        self.max_rate = cfg.max_rate
+        self.gamma = cfg.response_gamma
+        self.steps = steps
+        self._table = None if self.gamma == 1.0 else array("d", ((i / steps) ** self.gamma for i in range(steps + 1)))
+
+    def __call__(self, fps: float) -> float:
+        if fps <= 0:
+            return self.min_rate
+        frac = fps / self.target_fps
+        if frac < 1.0 and self._table is not None:
+            x = frac * self.steps
+            i = int(x)
+            t = self._table
+            frac = t[i] + (t[i + 1] - t[i]) * (x - i)
+        rate = self.base_rate * frac
+        return self.min_rate if rate < self.min_rate else self.max_rate if rate > self.max_rate else rate
+
+
+# -----------------------------
+# Laws
+# -----------------------------
+class ControlLaw:
+    """One update per control tick: window stats in, (rate, fps estimate) out.
+
+    Subclasses implement estimate(); the fps -> rate step is always self.curve.
+    """
+
+    name = "base"
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.curve = RateCurve(cfg)
+
+    def reset(self):
+        pass
+
+    def seed(self, fps: float):
+        """Start from a known FPS (warm start) instead of the first window."""
+
+    def estimate(self, stats: WindowStats, now: float) -> float:
+        raise NotImplementedError
+
+    def update(self, stats: WindowStats, now: float) -> Tuple[float, float]:
+        fps = self.estimate(stats, now)
+        return self.curve(fps), fps
+
+
+class EmaLinearLaw(ControlLaw):
+    """EMA of window FPS (per-frame alpha, see Ema.update_batch) through the response curve."""
+
+    name = "ema"
+
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.ema = Ema(cfg.ema_alpha)
+
+    def reset(self):
+        self.ema = Ema(self.cfg.ema_alpha)
+
+    def seed(self, fps: float):
+        self.ema = Ema(self.cfg.ema_alpha, fps)
+
+    def estimate(self, stats: WindowStats, now: float) -> float:
+        return self.ema.update_batch(stats.avg_fps, stats.frames)
+
+
+class PidFeedforwardLaw(ControlLaw):
+    """Frame-time observer with trend feedforward.
+
+    Each tick the window's mean frame time is compared with the prediction:
+      P  moves the level estimate by kp (kp_drop when frame time rises, so drops land fast)
+      I  integrates the residual into a trend (ms per second), decaying by trend_decay per tick
+      FF the rate is computed from level + trend * horizon_s; by default only a
+         rising trend is fed forward, so a recovery is followed, not anticipated
+    There is no separate D term: the trend state is the derivative action.
+    """
+
+    name = "pid"
+
+    def __init__(self, cfg, kp: Optional[float] = None, kp_drop: Optional[float] = None,
+                 ki: Optional[float] = None, horizon_s: Optional[float] = None,
+                 trend_decay: float = 0.5, predict_recovery: bool = False):
+        super().__init__(cfg)
+        self.kp = cfg.pid_kp if kp is None else kp
+        self.kp_drop = cfg.pid_kp_drop if kp_drop is None else kp_drop
+        self.ki = cfg.pid_ki if ki is None else ki
+        self.horizon_s = cfg.pid_horizon_s if horizon_s is None else horizon_s
+        self.trend_decay = trend_decay
+        self.predict_recovery = predict_recovery
+        self.reset()
+
+    def reset(self):
+        self.level: Optional[float] = None   # frame time estimate (ms)
+        self.trend = 0.0                      # ms per second
+        self.last: Optional[float] = None
+
+    def seed(self, fps: float):
+        self.reset()
+        self.level = 1000.0 / fps
+
+    def estimate(self, stats: WindowStats, now: float) -> float:
+        meas = stats.span_ms / stats.frames
+        if self.level is None:
+            self.level, self.last = meas, now
+            return 1000.0 / meas
+        if self.last is None:
+            # Seeded level, first window: no dt for the trend yet, level step only
+            err = meas - self.level
+            self.level = max(1e-3, self.level + (self.kp_drop if err > 0 else self.kp) * err)
+            self.last = now
+            return 1000.0 / self.level
+        dt = max(1e-3, now - self.last)
+        self.last = now
+        pred = self.level + self.trend * dt
+        err = meas - pred
+        self.level = max(1e-3, pred + (self.kp_drop if err > 0 else self.kp) * err)
+        self.trend = self.trend * self.trend_decay + self.ki * err / dt
+        ahead = self.trend * self.horizon_s
+        if ahead < 0 and not self.predict_recovery:
+            ahead = 0.0
+        return 1000.0 / max(1e-3, self.level + ahead)
+
+
+LAWS = {
+    "ema": EmaLinearLaw,
+    "pid": PidFeedforwardLaw,
+}
+
+
+def make_law(cfg, name: Optional[str] = None) -> ControlLaw:
+    name = name or cfg.control_law
+    try:
+        return LAWS[name](cfg)
+    except KeyError:
+        raise ValueError(f"Unknown control law {name!r}; expected one of {sorted(LAWS)}") from None
+
+
+# -----------------------------
+# Closed-loop plant simulator
+# -----------------------------
+# The "plant" is the game: it renders at a scenario FPS, loaded down by the fire
+# rate we ask for (more shots -> more effects -> lower FPS):
+#   fps = scenario_fps(t) / (1 + coupling * (rate / base_rate - 1))
+# Frames are generated one at a time with Gaussian jitter, batched per control
+# tick through a FrameWindow exactly like the live loop, and the law's output is
+# applied to the plant from the next frame on.
+@dataclass
+class StepMetrics:
+    label: str
+    t_step: float
+    initial: float
+    final: float
+    rise_s: float         # step -> 90% of the change (ticks quantise a 10-90% rise to ~0)
+    overshoot_pct: float  # beyond the final value, % of the step size
+    settling_s: float     # until the rate stays within `band` of the final value
+    jitter: float         # std-dev of the rate over the settled tail
+
+
+@dataclass
+class SimResult:
+    law: str
+    steps: List[StepMetrics]
+    us_per_tick: float
+    tracking_err: float   # mean |rate - curve(true fps)| over the run: lag + noise in one number
+    trace: List[Tuple[float, float, float]]  # (t, true_fps, rate)
+
+
+def step_scenario(high: float = 120.0, low: float = 40.0, t_drop: float = 3.0, t_recover: float = 8.0,
+                  duration: float = 13.0) -> Tuple[Callable[[float], float], List[Tuple[float, str]], float]:
+    def fps(t: float) -> float:
+        return low if t_drop <= t < t_recover else high
+    return fps, [(t_drop, f"drop {high:g}->{low:g}"), (t_recover, f"recover {low:g}->{high:g}")], duration
+
+
+def ramp_scenario(high: float = 120.0, low: float = 40.0, t_down: float = 3.0, t_up: float = 9.0,
+                  ramp_s: float = 3.0, duration: float = 15.0):
+    """Gradual degradation and recovery: where a trend predictor can get ahead."""
+    def fps(t: float) -> float:
+        if t < t_down:
+            return high
+        if t < t_down + ramp_s:
+            return high + (low - high) * (t - t_down) / ramp_s
+        if t < t_up:
+            return low
+        if t < t_up + ramp_s:
+            return low + (high - low) * (t - t_up) / ramp_s
+        return high
+    return fps, [(t_down, f"ramp {high:g}->{low:g}"), (t_up, f"ramp {low:g}->{high:g}")], duration
+
+
+SCENARIOS = {"step": step_scenario, "ramp": ramp_scenario}
+
+
+def simulate(law: ControlLaw, cfg, scenario=None, coupling: float = 0.1, jitter: float = 0.08,
+             seed: int = 1, band: float = 0.05) -> SimResult:
+    fps_at, steps, duration = scenario or step_scenario()
+    rng = random.Random(seed)
+    window = FrameWindow(cfg.window_frames)
+    law.reset()
+    interval = cfg.update_interval_s
+    rate = law.curve(fps_at(0.0))
+    t = 0.0
+    next_tick = interval
+    batch: List[float] = []
+    trace = []
+    cpu = 0.0
+    ticks = 0
+    err = 0.0
+    while t < duration:
+        true_fps = fps_at(t) / (1.0 + coupling * (rate / cfg.base_rate - 1.0))
+        ms = max(0.1, rng.gauss(1000.0 / true_fps, jitter * 1000.0 / true_fps))
+        t += ms / 1000.0
+        batch.append(ms)
+        if t >= next_tick:
+            window.extend(batch)
+            batch = []
+            t0 = time.perf_counter()
+            stats = window.tick()
+            rate, _fps = law.update(stats, t)
+            cpu += time.perf_counter() - t0
+            ticks += 1
+            trace.append((t, true_fps, rate))
+            err += abs(rate - law.curve(true_fps))
+            while next_tick <= t:
+                next_tick += interval
+    bounds = [s for s, _ in steps] + [duration]
+    metrics = [_step_metrics(trace, label, t_step, bounds[i + 1], bounds[i - 1] if i else 0.0, band)
+               for i, (t_step, label) in enumerate(steps)]
+    return SimResult(law.name, metrics, 1e6 * cpu / max(1, ticks), err / max(1, ticks), trace)
+
+
+def _mean_rate(trace, t0: float, t1: float) -> float:
+    xs = [r for t, _, r in trace if t0 <= t < t1]
+    return sum(xs) / len(xs) if xs else float("nan")
+
+
+def _step_metrics(trace, label: str, t_step: float, t_end: float, t_prev: float, band: float) -> StepMetrics:
+    tail = min(1.0, (t_end - t_step) / 3)
+    initial = _mean_rate(trace, max(t_prev, t_step - 1.0), t_step)
+    final = _mean_rate(trace, t_end - tail, t_end)
+    size = final - initial
+    seg = [(t - t_step, r) for t, _, r in trace if t_step <= t < t_end]
+    sign = 1.0 if size >= 0 else -1.0
+
+    def crossing(frac: float) -> float:
+        level = initial + frac * size
+        return next((dt for dt, r in seg if sign * (r - level) >= 0), math.nan)
+
+    rise = crossing(0.9)
+    peak = max(sign * (r - final) for _, r in seg) if seg else 0.0
+    overshoot = 100.0 * max(0.0, peak) / abs(size) if size else 0.0
+    outside = [dt for dt, r in seg if abs(r - final) > band * abs(size)]
+    settling = outside[-1] if outside else 0.0
+    settled = [r for dt, r in seg if dt > settling] or [final]
+    mean = sum(settled) / len(settled)
+    jit = math.sqrt(sum((r - mean) ** 2 for r in settled) / len(settled))
+    return StepMetrics(label, t_step, initial, final, rise, overshoot, settling, jit)
+
+
+def print_report(results: List[SimResult]):
+    print(f"  {'law':<5s} {'step':<18s} {'rise s':>7s} {'overshoot':>10s} {'settle s':>9s} {'jitter':>8s}")
+    for res in results:
+        for m in res.steps:
+            print(f"  {res.law:<5s} {m.label:<18s} {m.rise_s:>7.2f} {m.overshoot_pct:>9.1f}% "
+                  f"{m.settling_s:>9.2f} {m.jitter:>8.1f}")
+    print()
+    for res in results:
+        print(f"  {res.law:<5s} tracking error {res.tracking_err:7.1f}   {res.us_per_tick:6.2f} µs/tick")
+
+
+def main():
+    import argparse
+    from hd2_firerate_controller import CONFIG, fps_to_rate
+
+    ap = argparse.ArgumentParser(description="Step-response comparison of the control laws on a simulated game.")
+    ap.add_argument("--laws", nargs="+", choices=sorted(LAWS), default=sorted(LAWS))
+    ap.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS, reverse=True))
+    ap.add_argument("--high", type=float, default=120.0)
+    ap.add_argument("--low", type=float, default=40.0)
+    ap.add_argument("--coupling", type=float, default=0.1, help="FPS load from fire rate (0 = open loop)")
+    ap.add_argument("--jitter", type=float, default=0.08, help="Frame-time std-dev as a fraction")
+    ap.add_argument("--seeds", type=int, default=5, help="Average over this many noise seeds")
+    ap.add_argument("--gamma", type=float, default=None, help="Override response_gamma")
+    args = ap.parse_args()
+
+    cfg = CONFIG
+    if args.gamma is not None:
+        cfg.response_gamma = args.gamma
+
+    # The table must agree with the direct formula
+    curve = RateCurve(cfg)
+    grid = [cfg.target_fps * 1.2 * i / 5000 for i in range(1, 5001)]
+    err = max(abs(curve(f) - fps_to_rate(f, cfg)) for f in grid)
+    t0 = time.perf_counter()
+    for f in grid:
+        fps_to_rate(f, cfg)
+    t1 = time.perf_counter()
+    for f in grid:
+        curve(f)
+    t2 = time.perf_counter()
+    print(f"[CURVE] gamma={cfg.response_gamma:g}  max |table - pow| = {err:.2e}  "
+          f"pow {1e9 * (t1 - t0) / len(grid):.0f} ns  table {1e9 * (t2 - t1) / len(grid):.0f} ns")
+
+    for sc_name in args.scenarios:
+        scenario = SCENARIOS[sc_name](args.high, args.low)
+        print(f"\n[SIM] {sc_name}: {args.high:g} -> {args.low:g} -> {args.high:g} FPS, coupling {args.coupling:g}, "
+              f"jitter {args.jitter:.0%}, tick {cfg.update_interval_s:g} s, mean of {args.seeds} seeds\n")
+        results = []
+        for name in args.laws:
+            runs = [simulate(make_law(cfg, name), cfg, scenario, args.coupling, args.jitter, seed)
+                    for seed in range(1, args.seeds + 1)]
+            mean = lambda xs: sum(xs) / len(xs)  # noqa: E731
+            steps = []
+            for i, m in enumerate(runs[0].steps):
+                per = [r.steps[i] for r in runs]
+                steps.append(StepMetrics(m.label, m.t_step, *(mean([getattr(p, a) for p in per]) for a in
+                             ("initial", "final", "rise_s", "overshoot_pct", "settling_s", "jitter"))))
+            results.append(SimResult(name, steps, mean([r.us_per_tick for r in runs]),
+                                     mean([r.tracking_err for r in runs]), runs[0].trace))
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
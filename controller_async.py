@@ -0,0 +1,255 @@
+# controller_async.py
+# asyncio runtime for the fire-rate controller (hd2_firerate_controller.py --runtime async).
+#
+#   supervisor  runs PresentMon, restarts it with backoff when it exits
+#   tail        thread following the CSV (iter_frame_batches) -> frames queue
+#   control     fixed-schedule ticks on loop.time(); drains frames, decides the rate
+#   bridge      publishes the newest rate (file writes go to a worker thread)
+#   log         ControlLog's background thread (ctrl_log.py)
+#
+# Queues are bounded and drop their oldest item when full, so a stalled console
+# or a slow bridge write can only cost stale messages/values, never a late tick.
+
+import asyncio
+import signal
+import subprocess
+import threading
+import time
+from typing import Optional
+
+from bridge import PUSH_KINDS, Bridge
+from frame_tail import iter_frame_batches
+from hd2_firerate_controller import (Config, RateController, Tick, bootstrap, open_bridge, open_log, open_metrics,
+                                     presentmon_args, remove_csv, timed_write)
+from warm_start import load_state, save_state
+
+FRAMES_QUEUE = 256        # tailer batches; full only if the control task is starved
+RESTART_BACKOFF_S = (1.0, 2.0, 5.0, 10.0, 30.0)
+HEALTHY_RUN_S = 30.0      # a PresentMon run this long resets the backoff
+
+
+def put_latest(q: asyncio.Queue, item) -> bool:
+    """put_nowait that drops the oldest item when full. Returns False if something was dropped."""
+    dropped = False
+    while True:
+        try:
+            q.put_nowait(item)
+            return not dropped
+        except asyncio.QueueFull:
+            q.get_nowait()
+            dropped = True
+
+
+class AsyncController:
+    def __init__(self, cfg: Config, presentmon_exe: str, bridge: Optional[Bridge] = None):
+        self.cfg = cfg
+        self.presentmon_exe = presentmon_exe
+        self.bridge = bridge if bridge is not None else open_bridge(cfg)
+        self.metrics, self.export = open_metrics(cfg)
+        self.ctrl = RateController(cfg, self.metrics)
+        self.frames: asyncio.Queue = asyncio.Queue(FRAMES_QUEUE)
+        self.rates: asyncio.Queue = asyncio.Queue(1)     # only the newest value matters
+        self.stop = threading.Event()
+        self.reopen = threading.Event()
+        self.restarts = 0
+        self.fresh_frames = 0    # frames since the last scheduled tick (push ticks don't reset it)
+        self.tail_failed: Optional[asyncio.Future] = None
+        self.dropped_batches = 0
+        self.late_ticks = 0
+        self.clog = open_log(cfg)
+
+    # ---- helpers ----
+    def publish(self, rate: float, observed: Optional[float]):
+        put_latest(self.rates, (rate, observed))
+
+    # ---- PresentMon supervisor ----
+    async def supervise(self):
+        attempt = 0
+        proc = None
+        try:
+            while True:
+                if not self.restarts:
+                    # Only before the first launch: on a restart the tailer still holds the CSV
+                    # open, and PresentMon truncates it itself
+                    try:
+                        remove_csv(self.cfg)
+                    except OSError as e:   # Windows: open without FILE_SHARE_DELETE
+                        self.clog.info(f"[HD2] Could not remove old CSV ({e}); PresentMon will overwrite it")
+                started = time.monotonic()
+                proc = await asyncio.create_subprocess_exec(
+                    *presentmon_args(self.presentmon_exe, self.cfg),
+                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+                )
+                self.clog.info(f"[HD2] PresentMon running (pid {proc.pid})")
+                code = await proc.wait()
+                proc = None
+                if time.monotonic() - started >= HEALTHY_RUN_S:
+                    attempt = 0
+                delay = RESTART_BACKOFF_S[min(attempt, len(RESTART_BACKOFF_S) - 1)]
+                attempt += 1
+                self.restarts += 1
+                self.clog.info(f"[HD2] PresentMon exited ({code}); restarting in {delay:g}s")
+                # The new instance rewrites the CSV; make the tailer reopen it from the start
+                self.reopen.set()
+                await asyncio.sleep(delay)
+        finally:
+            if proc is not None and proc.returncode is None:
+                try:
+                    proc.send_signal(signal.SIGTERM)
+                    await asyncio.wait_for(proc.wait(), 2.0)   # reap it while the loop is still open
+                except (ProcessLookupError, asyncio.TimeoutError):
+                    pass
+
+    # ---- CSV tail (thread) ----
+    def _tail_thread(self, loop: asyncio.AbstractEventLoop):
+        def deliver(item):
+            if not put_latest(self.frames, item):
+                self.dropped_batches += 1
+
+        def fail(e: BaseException):
+            if not self.tail_failed.done():
+                self.tail_failed.set_exception(e)
+
+        try:
+            for ms_batch, dropped in iter_frame_batches(self.cfg.csv_path, stop=self.stop, reopen=self.reopen,
+                                                        metrics=self.metrics):
+                loop.call_soon_threadsafe(deliver, (time.perf_counter(), ms_batch, dropped))
+        except Exception as e:
+            # Missing column, I/O error...: without frames the controller can only go stale, so stop it
+            self.clog.info(f"[HD2] CSV tail failed: {type(e).__name__}: {e}")
+            loop.call_soon_threadsafe(fail, e)
+
+    async def watch_tail(self):
+        await self.tail_failed
+
+    # ---- control ----
+    def _push(self, item) -> float:
+        observed, ms_batch, dropped = item
+        self.ctrl.push(ms_batch, dropped)
+        self.fresh_frames += len(ms_batch)
+        return observed
+
+    def _drain(self) -> Optional[float]:
+        observed = None
+        while True:
+            try:
+                item = self.frames.get_nowait()
+            except asyncio.QueueEmpty:
+                return observed
+            observed = self._push(item)
+
+    async def control(self):
+        loop = asyncio.get_running_loop()
+        cfg = self.cfg
+        interval = cfg.update_interval_s
+        push_each_frame = cfg.push_every_frame and self.bridge.kind in PUSH_KINDS
+        next_tick = loop.time() + interval
+        observed = None
+        prev_rate: Optional[float] = None
+        t: Optional[Tick] = None
+        last_push: Optional[Tick] = None   # newest push-path tick since the last scheduled one
+        last_fps_log = 0.0
+        while True:
+            wait = next_tick - loop.time()
+            if wait > 0:
+                if not push_each_frame:
+                    await asyncio.sleep(wait)
+                    continue
+                # Push transports: forward a value per frame batch between scheduled ticks
+                try:
+                    item = await asyncio.wait_for(self.frames.get(), wait)
+                except asyncio.TimeoutError:
+                    continue
+                observed = self._push(item)          # in arrival order: this batch, then anything behind it
+                observed = self._drain() or observed
+                last_tick = self.ctrl.last_tick
+                t = self.ctrl.tick(loop.time())
+                self.ctrl.last_tick = last_tick
+                if t is not None:
+                    self.publish(t.rate, observed)
+                    last_push = t
+                continue
+
+            now = loop.time()
+            next_tick += interval
+            if next_tick <= now:
+                # Fell behind (suspend, debugger): skip missed ticks instead of bursting
+                self.late_ticks += 1
+                if self.metrics is not None:
+                    self.metrics.inc("late_ticks")
+                next_tick = now + interval
+            observed = self._drain() or observed
+            if not self.fresh_frames:
+                continue   # no new frames: ticking would re-feed the last window's stale stats to the law
+            self.fresh_frames = 0
+            if last_push is not None and not self.ctrl.window.pending:
+                # Push ticks already fed every new frame to the law and published the rate:
+                # the scheduled tick only keeps the update schedule, logs and state
+                t, last_push = last_push, None
+                self.ctrl.last_tick = now
+            else:
+                last_push = None
+                t = self.ctrl.tick(now)
+                if t is None:
+                    continue
+                self.publish(t.rate, observed)
+
+            wall = time.time()
+            if cfg.show_fps_log and wall - last_fps_log >= cfg.fps_log_interval_s:
+                self.clog.fps(t.smoothed_fps, t.stats)
+                last_fps_log = wall
+            self.clog.update(prev_rate, t.rate, t.smoothed_fps)
+            prev_rate = t.rate
+
+    # ---- outputs ----
+    async def bridge_writer(self):
+        # The text bridge can stall on the reader's sharing lock; keep it off the loop
+        threaded = self.bridge.kind not in PUSH_KINDS and self.bridge.kind != "mmap"
+        while True:
+            rate, observed = await self.rates.get()
+            if threaded:
+                await asyncio.to_thread(timed_write, self.bridge, self.metrics, rate, observed)
+            else:
+                timed_write(self.bridge, self.metrics, rate, observed)
+
+    # ---- entry ----
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        cfg = self.cfg
+        state = load_state(cfg.state_path)
+        warm = bootstrap(cfg, self.bridge, state)
+        if warm:
+            self.ctrl.seed(*warm)
+        print(f"[HD2] Starting PresentMon: {self.presentmon_exe}")
+
+        self.tail_failed = loop.create_future()
+        tail = threading.Thread(target=self._tail_thread, args=(loop,), name="csv-tail", daemon=True)
+        tasks = [asyncio.create_task(c) for c in
+                 (self.supervise(), self.control(), self.bridge_writer(), self.watch_tail())]
+        tail.start()
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self.stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            tail.join(timeout=2.0)
+            if self.ctrl.rate is not None and self.ctrl.last_tick is not None:
+                state.game_exe_name = cfg.game_exe_name
+                state.presentmon_path = self.presentmon_exe
+                state.last_fps, state.last_rate = self.ctrl.fps, self.ctrl.rate
+                save_state(cfg.state_path, state)
+            self.bridge.close()
+            self.clog.close()
+            if self.export is not None:
+                self.export.close()
+            print(f"[CTRL] stopped: {self.restarts} PresentMon restarts, {self.late_ticks} late ticks, "
+                  f"{self.dropped_batches} dropped batches, {self.clog.dropped} dropped log records")
+
+
+def run(cfg: Config, presentmon_exe: str):
+    try:
+        asyncio.run(AsyncController(cfg, presentmon_exe).run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,189 @@
+# ctrl_log.py
+# Controller logging that stays off the frame loop.
+# The loop only appends small tuples to a deque (no lock, no formatting, no
+# console). A background thread wakes every poll_s, formats them, coalesces runs
+# of RAISE/LOWER/HOLD updates into one line per coalesce interval, writes the
+# console once per wake-up and optionally appends compact JSON lines (every
+# record, uncoalesced) to a file.
+#
+#   log = ControlLog(verbose=cfg.verbose_each_update, change_eps=cfg.change_eps, json_path="ctrl.jsonl")
+#   log.update(prev_rate, rate, smoothed_fps)
+#   log.fps(smoothed_fps, stats)
+#   log.info("[HD2] ...")
+#   log.close()
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional, TextIO
+
+# -----------------------------
+# Message formatting (shared by every runtime)
+# -----------------------------
+ARROWS = {"RAISE": "↑ RAISE", "LOWER": "↓ LOWER", "HOLD": "→ HOLD"}
+
+
+def classify_update(prev_rate: Optional[float], rate: float, verbose: bool, change_eps: float) -> Optional[str]:
+    """INIT / RAISE / LOWER / HOLD, or None for jitter below change_eps when not verbose."""
+    if prev_rate is None:
+        return "INIT"
+    if verbose:
+        return "RAISE" if rate > prev_rate else ("LOWER" if rate < prev_rate else "HOLD")
+    delta = rate - prev_rate
+    if abs(delta) >= change_eps:
+        return "RAISE" if delta > 0 else "LOWER"
+    return None
+
+
+def format_update(kind: str, prev_rate: Optional[float], rate: float, smoothed: float, count: int = 1) -> str:
+    if kind == "INIT":
+        return f"INIT:  Rate={rate:7.1f}  (FPS {smoothed:6.1f})"
+    line = f"{ARROWS[kind]}: {prev_rate:7.1f} → {rate:7.1f}  (FPS {smoothed:6.1f})"
+    return line if count == 1 else f"{line}  ×{count}"
+
+
+def describe_update(prev_rate: Optional[float], rate: float, smoothed: float, cfg) -> Optional[str]:
+    """Console line for a rate decision, or None when it's jitter below change_eps."""
+    kind = classify_update(prev_rate, rate, cfg.verbose_each_update, cfg.change_eps)
+    return None if kind is None else format_update(kind, prev_rate, rate, smoothed)
+
+
+def describe_fps(smoothed: float, stats) -> str:
+    return (f"[FPS] {smoothed:6.1f}  (median {stats.median_fps:6.1f}, 1% low {stats.low_1pct_fps:6.1f}, "
+            f"dropped {stats.dropped_ratio:5.1%})")
+
+
+# -----------------------------
+# Background logger
+# -----------------------------
+_UPDATE, _FPS, _INFO, _FLUSH = range(4)
+
+
+class ControlLog:
+    """Deque-backed logger. Producers never block: a full backlog drops the record (counted)."""
+
+    def __init__(self, verbose: bool = True, change_eps: float = 10.0, coalesce_s: float = 1.0,
+                 json_path: Optional[str] = None, console: Optional[TextIO] = None,
+                 maxsize: int = 4096, poll_s: float = 0.05):
+        self.verbose = verbose
+        self.change_eps = change_eps
+        self.coalesce_s = coalesce_s
+        self.console = console if console is not None else sys.stdout
+        self.dropped = 0
+        self.written = 0
+        self.maxsize = maxsize
+        self.poll_s = poll_s
+        self._q: deque = deque()
+        self._stop = threading.Event()
+        self._json = open(json_path, "a", encoding="utf-8") if json_path else None
+        self._runs = {}  # tag -> [kind, first_prev, last_rate, last_fps, count, started]
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="ctrl-log", daemon=True)
+        self._thread.start()
+
+    # ---- producer side (hot path) ----
+    def _put(self, rec):
+        # deque.append is atomic under the GIL; the worker polls, so nothing to signal
+        if len(self._q) < self.maxsize:
+            self._q.append(rec)
+        else:
+            self.dropped += 1
+
+    def update(self, prev_rate: Optional[float], rate: float, smoothed: float, tag: Optional[str] = None):
+        """`tag` labels the line (e.g. the process in a multi-process capture); runs coalesce per tag."""
+        self._put((_UPDATE, time.time(), prev_rate, rate, smoothed, tag))
+
+    def fps(self, smoothed: float, stats, tag: Optional[str] = None):
+        self._put((_FPS, time.time(), smoothed, stats, tag))
+
+    def info(self, msg: str):
+        self._put((_INFO, time.time(), msg))
+
+    def flush(self):
+        self._put((_FLUSH, time.time()))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._thread.join(timeout=5.0)
+        if self._json is not None:
+            self._json.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- worker ----
+    def _emit_run(self, out: list, tag: Optional[str] = None):
+        run = self._runs.pop(tag, None)
+        if run is not None:
+            kind, prev, rate, fps, count, _ = run
+            line = format_update(kind, prev, rate, fps, count)
+            out.append(line if tag is None else f"[{tag}] {line}")
+
+    def _emit_runs(self, out: list, older_than: Optional[float] = None):
+        for tag in [t for t, run in self._runs.items() if older_than is None or run[5] < older_than]:
+            self._emit_run(out, tag)
+
+    def _handle(self, rec, out: list, js: list):
+        tag, ts = rec[0], rec[1]
+        if tag == _UPDATE:
+            _, _, prev, rate, fps, label = rec
+            kind = classify_update(prev, rate, self.verbose, self.change_eps)
+            if kind is None:
+                return
+            if js is not None:
+                js.append({"t": round(ts, 3), "ev": kind, "from": prev, "to": round(rate, 3), "fps": round(fps, 2),
+                           **({"tag": label} if label is not None else {})})
+            run = self._runs.get(label)
+            if run is not None and run[0] == kind and kind != "INIT" and ts - run[5] < self.coalesce_s:
+                run[2], run[3] = rate, fps
+                run[4] += 1
+                return
+            self._emit_run(out, label)
+            self._runs[label] = [kind, prev, rate, fps, 1, ts]
+            if self.coalesce_s <= 0:
+                self._emit_run(out, label)
+        elif tag == _FPS:
+            _, _, fps, stats, label = rec
+            self._emit_run(out, label)
+            line = describe_fps(fps, stats)
+            out.append(line if label is None else f"[{label}] {line}")
+            if js is not None:
+                js.append({"t": round(ts, 3), "ev": "FPS", "fps": round(fps, 2),
+                           "median": round(stats.median_fps, 2), "low1": round(stats.low_1pct_fps, 2),
+                           "dropped": round(stats.dropped_ratio, 4), "frames": stats.frames,
+                           **({"tag": label} if label is not None else {})})
+        elif tag == _INFO:
+            self._emit_runs(out)
+            out.append(rec[2])
+            if js is not None:
+                js.append({"t": round(ts, 3), "ev": "INFO", "msg": rec[2]})
+        else:  # flush
+            self._emit_runs(out)
+
+    def _worker(self):
+        q = self._q
+        while True:
+            stop = self._stop.wait(self.poll_s)
+            out, js = [], ([] if self._json is not None else None)
+            # Drain whatever piled up so the console sees one write per wake-up
+            while q:
+                self._handle(q.popleft(), out, js)
+            self._emit_runs(out, None if stop else time.time() - self.coalesce_s)
+            if out:
+                self.console.write("\n".join(out) + "\n")
+                self.console.flush()
+                self.written += len(out)
+            if js:
+                self._json.write("".join(json.dumps(r, separators=(",", ":"), ensure_ascii=False) + "\n"
+                                         for r in js))
+                self._json.flush()
+            if stop:
+                return
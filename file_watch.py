@@ -0,0 +1,295 @@
+# file_watch.py
+# Wake-on-change for the CSV tailers. Instead of sleeping a fixed poll interval
+# between reads, a tailer blocks in FileWatcher.wait() until the OS reports that
+# the watched file (or its directory) changed.
+#   Linux   -> inotify on the parent directory (works before the file exists)
+#   Windows -> FindFirstChangeNotificationW on the parent directory
+#   other   -> stat() polling, same cadence as the old sleep loops
+
+import ctypes
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+from typing import Optional
+
+POLL_INTERVAL_S = 0.05
+# How long a tailer blocks in wait() before it tries a read anyway. inotify reports
+# every append, so there the timeout is only a safety net. NTFS defers size /
+# last-write notifications for a file the writer keeps open until its cache
+# flushes (up to ~1 s), so on Windows the watcher can only speed reads up and the
+# timeout must stay at polling cadence to bound sensing latency.
+IDLE_TIMEOUT_S = 0.1 if sys.platform == "win32" else 1.0
+
+
+class FileWatcher:
+    """Base interface: wait(timeout) -> True if a change was seen, False on timeout."""
+
+    backend = "base"
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.dir = os.path.dirname(self.path) or "."
+        self.name = os.path.basename(self.path)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -----------------------------
+# Polling fallback
+# -----------------------------
+class PollingWatcher(FileWatcher):
+    backend = "poll"
+
+    def __init__(self, path: str, poll_interval: float = POLL_INTERVAL_S):
+        super().__init__(path)
+        self.poll_interval = poll_interval
+        self._last = self._sig()
+
+    def _sig(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sig = self._sig()
+            if sig != self._last:
+                self._last = sig
+                return True
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                time.sleep(min(self.poll_interval, left))
+            else:
+                time.sleep(self.poll_interval)
+
+
+# -----------------------------
+# Linux: inotify
+# -----------------------------
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_IN_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HDR = struct.Struct("iIII")
+
+
+class InotifyWatcher(FileWatcher):
+    """Watches the parent directory and filters events down to our file name.
+
+    With name=None every event in the directory counts (used for log discovery).
+    """
+
+    backend = "inotify"
+
+    def __init__(self, path: str, any_file: bool = False):
+        super().__init__(path)
+        if any_file:
+            self.dir, self.name = self.path, None
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(self.dir), _IN_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, f"inotify_add_watch failed for {self.dir}")
+        self.last_names = []
+
+    def _drain(self) -> bool:
+        hit = False
+        self.last_names = []
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return hit
+            off = 0
+            while off < len(buf):
+                _wd, _mask, _cookie, length = _EVENT_HDR.unpack_from(buf, off)
+                off += _EVENT_HDR.size
+                name = os.fsdecode(buf[off:off + length].rstrip(b"\0"))
+                off += length
+                if self.name is None or name == self.name:
+                    hit = True
+                    self.last_names.append(name)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], left)
+            if ready and self._drain():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+# -----------------------------
+# Windows: directory change notification
+# -----------------------------
+FILE_NOTIFY_CHANGE_FILE_NAME = 0x001
+FILE_NOTIFY_CHANGE_SIZE = 0x008
+FILE_NOTIFY_CHANGE_LAST_WRITE = 0x010
+WAIT_OBJECT_0 = 0x0
+INFINITE = 0xFFFFFFFF
+
+
+class WindowsDirWatcher(FileWatcher):
+    """Directory-level notification; it can't tell which file changed, so any
+    change in the folder wakes the caller, which then just tries a read.
+
+    NTFS may defer size/last-write notifications for a file another process
+    holds open, so callers wait at most IDLE_TIMEOUT_S between reads.
+    """
+
+    backend = "win32"
+
+    def __init__(self, path: str, any_file: bool = False):
+        super().__init__(path)
+        if any_file:
+            self.dir, self.name = self.path, None
+        k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        k32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        k32.FindFirstChangeNotificationW.argtypes = [ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint32]
+        k32.FindNextChangeNotification.argtypes = [ctypes.c_void_p]
+        k32.FindCloseChangeNotification.argtypes = [ctypes.c_void_p]
+        k32.WaitForSingleObject.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+        k32.WaitForSingleObject.restype = ctypes.c_uint32
+        self._k32 = k32
+        flags = FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_SIZE | FILE_NOTIFY_CHANGE_LAST_WRITE
+        self._h = k32.FindFirstChangeNotificationW(self.dir, False, flags)
+        if not self._h or self._h == ctypes.c_void_p(-1).value:
+            raise OSError(ctypes.get_last_error(), f"FindFirstChangeNotificationW failed for {self.dir}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        ms = INFINITE if timeout is None else max(0, int(timeout * 1000))
+        rc = self._k32.WaitForSingleObject(self._h, ms)
+        if rc == WAIT_OBJECT_0:
+            self._k32.FindNextChangeNotification(self._h)
+            return True
+        return False
+
+    def close(self):
+        if self._h:
+            self._k32.FindCloseChangeNotification(self._h)
+            self._h = None
+
+
+# -----------------------------
+# Factory
+# -----------------------------
+def make_watcher(path: str, backend: str = "auto", poll_interval: float = POLL_INTERVAL_S,
+                 any_file: bool = False) -> FileWatcher:
+    """Best watcher available for this platform; falls back to polling on any error.
+
+    any_file=True treats `path` as a directory and wakes on any entry in it.
+    """
+    if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path, any_file=any_file)
+        except OSError:
+            if backend == "inotify":
+                raise
+    if backend in ("auto", "win32") and sys.platform == "win32":
+        try:
+            return WindowsDirWatcher(path, any_file=any_file)
+        except OSError:
+            if backend == "win32":
+                raise
+    return PollingWatcher(path, poll_interval)
+
+
+# -----------------------------
+# Incremental directory listing
+# -----------------------------
+class LogDirectory:
+    """Newest file matching `pattern` in a folder, without re-globbing it.
+
+    A single stat() of the directory tells whether any entry was added/removed
+    since the last look; only then is it re-listed, and only names not seen
+    before get stat()'d. Old logs in a big benchmark folder cost nothing after
+    the first pass. wait() blocks on directory events while no log exists yet.
+    """
+
+    def __init__(self, directory: str, pattern: str, backend: str = "auto"):
+        self.directory = directory
+        self.pattern = pattern
+        self._backend = backend
+        self._watcher: Optional[FileWatcher] = None
+        self._dir_mtime = None
+        self._known = {}  # name -> mtime_ns when first seen
+        self._newest: Optional[str] = None
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            self._dir_mtime, self._known, self._newest = None, {}, None
+            return
+        if mtime == self._dir_mtime:
+            return
+        self._dir_mtime = mtime
+        seen = set()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not fnmatch.fnmatch(entry.name, self.pattern):
+                    continue
+                seen.add(entry.name)
+                if entry.name not in self._known:
+                    try:
+                        self._known[entry.name] = entry.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        seen.discard(entry.name)
+        for gone in set(self._known) - seen:
+            del self._known[gone]
+        if self._known:
+            name = max(self._known, key=lambda n: (self._known[n], n))
+            self._newest = os.path.join(self.directory, name)
+        else:
+            self._newest = None
+
+    def newest(self) -> Optional[str]:
+        self._refresh()
+        return self._newest
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._watcher is None:
+            if not os.path.isdir(self.directory):
+                time.sleep(timeout or POLL_INTERVAL_S)
+                return False
+            self._watcher = make_watcher(self.directory, backend=self._backend, any_file=True)
+        return self._watcher.wait(timeout)
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
@@ -0,0 +1,208 @@
+# frame_cache.py
+# Columnar sidecar cache for offline analysis of big PresentMon / FrameView logs.
+# The first load parses the CSV once (streaming, constant memory) into one .npy
+# file per numeric column; later loads memory-map only the columns asked for.
+# The cache is keyed by the source's absolute path, size and mtime, so an edited
+# or still-growing log is simply re-parsed.
+#
+#   cols = load_columns("FrameView/FrameView_Code.exe_..._Log.csv", ["MsBetweenPresents", "TimeInSeconds"])
+#   ms = cols["MsBetweenPresents"]      # numpy.memmap, or memoryview('d') without NumPy
+#
+#   python frame_cache.py LOG [LOG...] --columns MsBetweenPresents "GPU0Util(%)"
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import mmap
+import os
+import shutil
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from frame_tail import LineTailer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CACHE_DIRNAME = ".frame_cache"
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+FLUSH_ROWS = 8192            # rows buffered per column before appending to disk
+NPY_HEADER_BYTES = 128       # fixed so the row count can be patched in after streaming
+NAN = float("nan")
+
+
+# -----------------------------
+# .npy writing (1-D little-endian float64)
+# -----------------------------
+def _npy_header(rows: int) -> bytes:
+    d = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d,), }" % rows
+    pad = NPY_HEADER_BYTES - 10 - len(d) - 1
+    return b"\x93NUMPY\x01\x00" + (len(d) + pad + 1).to_bytes(2, "little") + d.encode("latin1") + b" " * pad + b"\n"
+
+
+def _to_float(s: str) -> float:
+    try:
+        return float(s)
+    except ValueError:
+        return NAN
+
+
+def _source_key(path: str) -> dict:
+    st = os.stat(path)
+    return {"source": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "version": FORMAT_VERSION}
+
+
+def cache_dir_for(path: str, cache_root: Optional[str] = None) -> str:
+    src = os.path.abspath(path)
+    root = cache_root or os.path.join(os.path.dirname(src), CACHE_DIRNAME)
+    tag = hashlib.sha1(src.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(root, f"{os.path.basename(src)}.{tag}")
+
+
+# -----------------------------
+# Build
+# -----------------------------
+def build_sidecar(path: str, out_dir: str) -> dict:
+    """Parse `path` once into per-column .npy files under out_dir. Returns the manifest."""
+    key = _source_key(path)
+    tmp_dir = out_dir + ".building"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    with open(path, "rb") as f:
+        tail = LineTailer(f, chunk_bytes=1024 * 1024)
+        header = tail.read_header(0.0) if os.path.getsize(path) else []
+        ncol = len(header)
+        files = [open(os.path.join(tmp_dir, f"c{i:03d}.npy"), "wb") for i in range(ncol)]
+        bufs = [array("d") for _ in range(ncol)]
+        numeric = [False] * ncol
+        rows = 0
+        try:
+            for fh in files:
+                fh.write(_npy_header(0))
+            while True:
+                lines = tail.read_lines() or tail.take_partial()
+                if not lines:
+                    break
+                for row in csv.reader(lines):
+                    if len(row) < ncol:
+                        row += [""] * (ncol - len(row))
+                    for i in range(ncol):
+                        v = _to_float(row[i])
+                        bufs[i].append(v)
+                        if not numeric[i] and v == v:
+                            numeric[i] = True
+                    rows += 1
+                if ncol and len(bufs[0]) >= FLUSH_ROWS:
+                    for fh, b in zip(files, bufs):
+                        b.tofile(fh)
+                        del b[:]
+            for fh, b in zip(files, bufs):
+                b.tofile(fh)
+                fh.seek(0)
+                fh.write(_npy_header(rows))
+        finally:
+            for fh in files:
+                fh.close()
+
+    columns = {}
+    for i, name in enumerate(header):
+        fname = f"c{i:03d}.npy"
+        if numeric[i] and name.strip() not in columns:
+            columns[name.strip()] = fname
+        else:
+            os.remove(os.path.join(tmp_dir, fname))  # text-only column (Application, GPU, ...)
+
+    manifest = dict(key, rows=rows, columns=columns)
+    with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as w:
+        json.dump(manifest, w, indent=1)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+# -----------------------------
+# Load
+# -----------------------------
+def _map_column(fname: str, rows: int):
+    if np is not None:
+        return np.load(fname, mmap_mode="r")
+    if rows == 0:
+        return memoryview(array("d"))
+    with open(fname, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm)[NPY_HEADER_BYTES:NPY_HEADER_BYTES + 8 * rows].cast("d")
+
+
+def open_sidecar(path: str, cache_root: Optional[str] = None, rebuild: bool = False) -> dict:
+    """Manifest for an up-to-date sidecar of `path`, building it if missing or stale."""
+    out_dir = cache_dir_for(path, cache_root)
+    mpath = os.path.join(out_dir, MANIFEST)
+    if not rebuild:
+        try:
+            with open(mpath, "r", encoding="utf-8") as r:
+                manifest = json.load(r)
+            if all(manifest.get(k) == v for k, v in _source_key(path).items()):
+                manifest["dir"] = out_dir
+                return manifest
+        except (OSError, ValueError):
+            pass
+    manifest = build_sidecar(path, out_dir)
+    manifest["dir"] = out_dir
+    return manifest
+
+
+def load_columns(path: str, columns: Sequence[str], cache_root: Optional[str] = None) -> Dict[str, object]:
+    """Memory-map the requested columns of a frame log (NaN where the CSV had NA/blank)."""
+    manifest = open_sidecar(path, cache_root)
+    lookup = {k.lower(): v for k, v in manifest["columns"].items()}
+    out = {}
+    for name in columns:
+        fname = lookup.get(name.lower())
+        if fname is None:
+            raise KeyError(f"{name!r} is not a numeric column of {path}")
+        out[name] = _map_column(os.path.join(manifest["dir"], fname), manifest["rows"])
+    return out
+
+
+def column_names(path: str, cache_root: Optional[str] = None) -> List[str]:
+    return list(open_sidecar(path, cache_root)["columns"])
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Build / load columnar sidecars for frame logs.")
+    ap.add_argument("logs", nargs="+")
+    ap.add_argument("--columns", nargs="*", default=["MsBetweenPresents", "TimeInSeconds"])
+    ap.add_argument("--cache-root", default=None, help=f"Default: <log dir>/{CACHE_DIRNAME}")
+    ap.add_argument("--rebuild", action="store_true")
+    ap.add_argument("--list", action="store_true", help="List the cached numeric columns")
+    args = ap.parse_args()
+
+    for log in args.logs:
+        t0 = time.perf_counter()
+        manifest = open_sidecar(log, args.cache_root, rebuild=args.rebuild)
+        t1 = time.perf_counter()
+        cols = load_columns(log, args.columns, args.cache_root)
+        t2 = time.perf_counter()
+        print(f"[CACHE] {os.path.basename(log)}: {manifest['rows']} rows, {len(manifest['columns'])} numeric cols  "
+              f"(open {1000 * (t1 - t0):.1f} ms, map {1000 * (t2 - t1):.2f} ms)")
+        if args.list:
+            print("  " + ", ".join(manifest["columns"]))
+        for name, col in cols.items():
+            vals = [v for v in col if v == v and not math.isinf(v)]
+            mean = sum(vals) / len(vals) if vals else NAN
+            print(f"  {name:<24s} n={len(col):<8d} mean={mean:.4g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# frame_source.py
+# One interface in front of every place frame times come from:
+#   PresentMonCsvSource  -> PresentMon -output_file, tailed (frame_tail.iter_frame_batches)
+#   PresentMonPipeSource -> PresentMon -output_stdout (frame_tail.iter_pipe_batches)
+#   FrameViewCsvSource   -> a FrameView per-frame log, read from its start
+#   ReplaySource         -> a recorded log or .hd2rec replayed fast or at its own pace (replay.iter_batches)
+#
+# A producer thread reads and parses; batches land in a bounded queue that drops
+# the OLDEST batch when full, and take() hands the consumer everything queued as
+# one merged FrameBatch. However far the controller falls behind, it catches up
+# in one step instead of walking the backlog batch by batch, and what it acts on
+# is always the newest data.
+#
+#   src = PresentMonCsvSource(cfg.csv_path).start()
+#   for batch in src:            # None = nothing arrived for idle_s
+#       if batch is not None:
+#           ctrl.push(batch.frame_ms, batch.dropped)
+#   src.close()
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from frame_tail import FrameTee, iter_frame_batches, iter_pipe_batches
+
+DEFAULT_QUEUE_BATCHES = 64   # ~64 tailer wake-ups; beyond that the oldest rows are stale anyway
+
+
+@dataclass
+class FrameBatch:
+    frame_ms: List[float]
+    dropped: int = 0
+    observed: float = 0.0           # perf_counter() when the newest rows were read
+    log_t: Optional[float] = None   # log time (s) of the newest rows, when the source has one (replay)
+    batches: int = 1                # reads merged into this batch
+
+    @property
+    def frames(self) -> int:
+        return len(self.frame_ms)
+
+
+def merge_batches(batches: List[FrameBatch]) -> FrameBatch:
+    if len(batches) == 1:
+        return batches[0]
+    ms: List[float] = []
+    dropped = 0
+    for b in batches:
+        ms.extend(b.frame_ms)
+        dropped += b.dropped
+    last = batches[-1]
+    return FrameBatch(ms, dropped, last.observed, last.log_t, sum(b.batches for b in batches))
+
+
+# -----------------------------
+# Base
+# -----------------------------
+class FrameSource:
+    """Producer thread + bounded drop-oldest queue. Subclasses implement produce()."""
+
+    name = "frames"
+
+    def __init__(self, max_batches: int = DEFAULT_QUEUE_BATCHES, idle_s: float = 0.2, metrics=None):
+        self.max_batches = max_batches
+        self.idle_s = idle_s
+        self.metrics = metrics
+        self.dropped_batches = 0
+        self.dropped_frames = 0
+        self.error: Optional[BaseException] = None
+        self._q: deque = deque()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._done = False
+        self._thread: Optional[threading.Thread] = None
+
+    def produce(self) -> Iterator[FrameBatch]:
+        raise NotImplementedError
+
+    # ---- producer ----
+    def _run(self):
+        try:
+            for batch in self.produce():
+                self.put(batch)
+                if self._stop.is_set():
+                    break
+        except BaseException as e:  # surfaced to the consumer by take()
+            self.error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def put(self, batch: FrameBatch):
+        with self._cond:
+            if len(self._q) >= self.max_batches:
+                old = self._q.popleft()
+                self.dropped_batches += old.batches
+                self.dropped_frames += old.frames
+                if self.metrics is not None:
+                    self.metrics.inc("source_dropped_frames", old.frames)
+            self._q.append(batch)
+            self._cond.notify()
+
+    def start(self) -> "FrameSource":
+        self._thread = threading.Thread(target=self._run, name=f"source-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    # ---- consumer ----
+    @property
+    def exhausted(self) -> bool:
+        return self._done and not self._q
+
+    def take(self, timeout: Optional[float] = None) -> Optional[FrameBatch]:
+        """Everything queued, merged into one batch; None after `timeout` with nothing queued."""
+        with self._cond:
+            if not self._q and not self._done:
+                self._cond.wait(timeout)
+            if not self._q:
+                if self._done and self.error is not None:
+                    err, self.error = self.error, None
+                    raise err
+                return None
+            batches = list(self._q)
+            self._q.clear()
+        batch = merge_batches(batches)
+        if self.metrics is not None:
+            self.metrics.observe("queue", time.perf_counter() - batches[0].observed)
+        return batch
+
+    def __iter__(self) -> Iterator[Optional[FrameBatch]]:
+        """Merged batches, None every idle_s without data (heartbeat); ends when the source is exhausted.
+
+        A producer that died with an exception re-raises it here once the queue
+        is drained, so a failed read never looks like a clean end of stream.
+        """
+        if self._thread is None:
+            self.start()
+        while True:
+            batch = self.take(self.idle_s)   # raises the producer's error when nothing is left
+            if batch is None and self.exhausted:
+                return
+            yield batch
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _live(pairs) -> Iterator[FrameBatch]:
+    for ms_batch, dropped in pairs:
+        yield FrameBatch(ms_batch, dropped, time.perf_counter())
+
+
+# -----------------------------
+# Implementations
+# -----------------------------
+class PresentMonCsvSource(FrameSource):
+    """Follows the CSV PresentMon writes with -output_file (appended rows only)."""
+
+    name = "presentmon-csv"
+
+    def __init__(self, csv_path: str, column: str = "msBetweenPresents", from_end: bool = True,
+                 reopen: Optional[threading.Event] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.csv_path = csv_path
+        self.column = column
+        self.from_end = from_end
+        self.reopen = reopen
+
+    def produce(self) -> Iterator[FrameBatch]:
+        return _live(iter_frame_batches(self.csv_path, self.column, from_end=self.from_end, stop=self._stop,
+                                        reopen=self.reopen, metrics=self.metrics))
+
+
+class FrameViewCsvSource(PresentMonCsvSource):
+    """A FrameView per-frame log (MsBetweenPresents), read from the first row and then followed."""
+
+    name = "frameview-csv"
+
+    def __init__(self, log_path: str, **kwargs):
+        super().__init__(log_path, "MsBetweenPresents", from_end=False, **kwargs)
+
+
+class PresentMonPipeSource(FrameSource):
+    """Rows from a PresentMon started with -output_stdout; exhausted when it exits."""
+
+    name = "presentmon-pipe"
+
+    def __init__(self, stream, tee: Optional[FrameTee] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.stream = stream
+        self.tee = tee
+
+    def produce(self) -> Iterator[FrameBatch]:
+        return _live(iter_pipe_batches(self.stream, stop=self._stop, metrics=self.metrics, tee=self.tee))
+
+    def close(self):
+        super().close()
+        if self.tee is not None:
+            self.tee.close()
+
+
+class ReplaySource(FrameSource):
+    """A recorded PresentMon/FrameView log; paced=True sleeps to the log's own timing (scaled by speed)."""
+
+    name = "replay"
+
+    def __init__(self, log_path: str, batch_ms: float = 10.0, paced: bool = False, speed: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.log_path = log_path
+        self.batch_ms = batch_ms
+        self.paced = paced
+        self.speed = speed
+
+    def produce(self) -> Iterator[FrameBatch]:
+        from replay import iter_batches
+        wall0 = time.perf_counter()
+        first_t = None
+        for t, ms_batch, dropped in iter_batches(self.log_path, self.batch_ms):
+            if self._stop.is_set():
+                return
+            if first_t is None:
+                first_t = t
+            if self.paced:
+                delay = wall0 + (t - first_t) / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield FrameBatch(ms_batch, dropped, time.perf_counter(), t)
@@ -0,0 +1,118 @@
+# frame_stats.py
+# Ring buffer of frame times with per-tick window statistics.
+# Frames are appended in batches as the tailer delivers them; once per control
+# tick the controller asks for stats over everything that arrived since the last
+# tick, computed in one pass (NumPy if available, array('d') + one sort otherwise).
+
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional; the pure-Python path gives identical numbers
+    np = None
+
+
+@dataclass
+class WindowStats:
+    frames: int
+    avg_fps: float        # time-weighted: frames / total frame time (not mean of per-frame FPS)
+    median_fps: float
+    low_1pct_fps: float   # 1000 / 99th-percentile frame time, FrameView's "1% Low"
+    dropped_ratio: float  # share of frames in the window flagged Dropped
+    span_ms: float        # total frame time covered by the window
+
+
+def _percentile_sorted(xs: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted sequence (NumPy's default method)."""
+    pos = (len(xs) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (pos - lo)
+
+
+def compute_stats(ms: Sequence[float], dropped: int = 0) -> Optional[WindowStats]:
+    """Window statistics over a batch of frame times (ms)."""
+    n = len(ms)
+    if n == 0:
+        return None
+    if np is not None:
+        a = np.asarray(ms, dtype=np.float64)
+        total = float(a.sum())
+        med, p99 = np.percentile(a, (50.0, 99.0))
+        med, p99 = float(med), float(p99)
+    else:
+        s = sorted(ms)
+        total = sum(s)
+        med = _percentile_sorted(s, 0.50)
+        p99 = _percentile_sorted(s, 0.99)
+    return WindowStats(
+        frames=n,
+        avg_fps=1000.0 * n / total if total > 0 else 0.0,
+        median_fps=1000.0 / med if med > 0 else 0.0,
+        low_1pct_fps=1000.0 / p99 if p99 > 0 else 0.0,
+        dropped_ratio=min(1.0, dropped / n),
+        span_ms=total,
+    )
+
+
+class FrameWindow:
+    """Fixed-capacity ring of frame times (ms).
+
+    extend() is called with each tailer batch; tick() returns stats over the
+    frames added since the previous tick (capped at capacity) and resets.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._ms = array("d", bytes(8 * capacity))
+        self._head = 0          # next write slot
+        self._count = 0         # valid frames in the ring
+        self._pending = 0       # frames since last tick
+        self._pending_dropped = 0
+        self.total_frames = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def extend(self, ms_batch: Sequence[float], dropped: int = 0):
+        n = len(ms_batch)
+        self._pending_dropped += dropped
+        if n == 0:
+            return
+        cap = self.capacity
+        if n >= cap:
+            self._ms[:] = array("d", ms_batch[n - cap:])
+            self._head = 0
+        else:
+            first = min(n, cap - self._head)
+            self._ms[self._head:self._head + first] = array("d", ms_batch[:first])
+            if first < n:
+                self._ms[:n - first] = array("d", ms_batch[first:])
+            self._head = (self._head + n) % cap
+        self._count = min(cap, self._count + n)
+        self._pending = min(cap, self._pending + n)
+        self.total_frames += n
+
+    def last(self, n: int) -> array:
+        """The newest n frames, oldest first, as a contiguous array('d')."""
+        n = min(n, self._count)
+        start = self._head - n
+        if start >= 0:
+            return self._ms[start:self._head]
+        return self._ms[start:] + self._ms[:self._head]
+
+    def tick(self, min_frames: int = 1) -> Optional[WindowStats]:
+        """Stats over frames since the last tick; widened to `min_frames` from history if short."""
+        n = max(self._pending, min(min_frames, self._count))
+        dropped = self._pending_dropped
+        self._pending = 0
+        self._pending_dropped = 0
+        if n == 0:
+            return None
+        return compute_stats(self.last(n), dropped)
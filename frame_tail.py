@@ -0,0 +1,493 @@
+# frame_tail.py
+# Chunked CSV tailer shared by the PresentMon / FrameView readers.
+# Reads whatever bytes have been appended since the last call in one go, keeps an
+# unfinished trailing line buffered until its newline shows up, and hands back
+# complete rows in batches instead of one readline() per frame.
+
+import csv
+import os
+import threading
+import time
+from collections import deque
+from operator import itemgetter
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from file_watch import IDLE_TIMEOUT_S, FileWatcher, make_watcher
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024  # cap per read so a huge backlog can't balloon memory
+MAX_FRAME_MS = 60_000.0  # larger values are timer wrap-around garbage (seen in the chrome sample log)
+
+ProcessKey = Tuple[str, int]  # (Application, ProcessID) as PresentMon reports them
+
+
+class LineTailer:
+    """Incremental line reader over a binary file handle.
+
+    Only complete (newline-terminated) lines are returned; a half-flushed tail is
+    held back and glued onto the next read.
+    """
+
+    def __init__(self, f: BinaryIO, encoding: str = "utf-8", chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        self.f = f
+        self.encoding = encoding
+        self.chunk_bytes = chunk_bytes
+        self._partial = b""
+        self._discard_partial = False
+        self._queued: List[str] = []  # complete lines that arrived with the header
+
+    @property
+    def pending_bytes(self) -> int:
+        return len(self._partial)
+
+    def reset(self):
+        self._partial = b""
+        self._discard_partial = False
+        self._queued = []
+
+    def skip_to_end(self):
+        """Jump to EOF; if EOF sits mid-line, drop that line once it completes."""
+        end = self.f.seek(0, os.SEEK_END)
+        self.reset()
+        if end > 0:
+            self.f.seek(end - 1)
+            self._discard_partial = self.f.read(1) != b"\n"
+
+    def read_lines(self) -> List[str]:
+        if self._queued:
+            lines, self._queued = self._queued, []
+            return lines
+        data = self.f.read(self.chunk_bytes)
+        if not data:
+            return []
+        buf = self._partial + data if self._partial else data
+        cut = buf.rfind(b"\n")
+        if cut < 0:
+            self._partial = buf
+            return []
+        self._partial = buf[cut + 1:]
+        complete = buf[:cut + 1]
+        if self._discard_partial:
+            complete = complete[complete.find(b"\n") + 1:]
+            self._discard_partial = False
+        lines = complete.decode(self.encoding, errors="replace").splitlines()
+        return [ln for ln in lines if ln]
+
+    def take_partial(self) -> List[str]:
+        """Hand out the unterminated tail as a line (for a file known to be complete)."""
+        rest, self._partial = self._partial, b""
+        return [rest.decode(self.encoding, errors="replace")] if rest.strip() else []
+
+    def read_header(self, idle_timeout: float = 0.05, watcher: Optional[FileWatcher] = None,
+                    until: Optional[Callable[[], bool]] = None) -> List[str]:
+        """Block until the first complete line is available and return it parsed.
+
+        `until()` returning True gives up the wait early; [] is returned then.
+        """
+        while True:
+            lines = self.read_lines()
+            if lines:
+                header = next(csv.reader([lines[0]]))
+                # Rows that arrived together with the header are handed out by the next read
+                self._queued = lines[1:]
+                return header
+            if until is not None and until():
+                return []
+            if watcher is not None:
+                watcher.wait(idle_timeout)
+            else:
+                time.sleep(idle_timeout)
+
+
+def find_column(header: List[str], name: str) -> Optional[int]:
+    """Case-insensitive column lookup with a loose 'contains' fallback."""
+    header_lc = [h.strip().lower() for h in header]
+    key = name.lower()
+    try:
+        return header_lc.index(key)
+    except ValueError:
+        pass
+    stem = key.rstrip("s")
+    return next((i for i, h in enumerate(header_lc) if stem in h), None)
+
+
+class ColumnProjector:
+    """Pulls a fixed set of columns out of raw CSV lines, compiled once from the header.
+
+    Quote-free lines (every PresentMon/FrameView row in practice) take a fast
+    path: str.split with maxsplit stopping right after the last wanted column,
+    so the other ~100 columns of a FrameView row are never split out. Lines
+    containing a quote fall back to the csv module, giving identical fields.
+    """
+
+    def __init__(self, indices: Sequence[int]):
+        if not indices:
+            raise ValueError("ColumnProjector needs at least one column")
+        self.indices = tuple(indices)
+        self._need = max(self.indices)
+        self._maxsplit = self._need + 1
+        if len(self.indices) == 1:
+            i = self.indices[0]
+            self._get = lambda row: (row[i],)
+        else:
+            self._get = itemgetter(*self.indices)
+
+    @classmethod
+    def from_header(cls, header: List[str], names: Sequence[str]) -> "ColumnProjector":
+        """Exact (case-insensitive) lookup of each name; KeyError lists what is missing."""
+        lc = [h.strip().lower() for h in header]
+        missing = [n for n in names if n.lower() not in lc]
+        if missing:
+            raise KeyError(f"columns not in header: {missing}")
+        return cls([lc.index(n.lower()) for n in names])
+
+    def project(self, lines: Iterable[str]) -> Iterator[tuple]:
+        get, need, maxsplit = self._get, self._need, self._maxsplit
+        for line in lines:
+            if '"' in line:
+                row = next(csv.reader([line]))
+            else:
+                row = line.split(",", maxsplit)
+            if len(row) > need:
+                yield get(row)
+
+
+def frame_projector(header: List[str], column: str = "msBetweenPresents",
+                    dropped_column: Optional[str] = "Dropped") -> ColumnProjector:
+    """Projector yielding (frame_ms,) or (frame_ms, dropped) for parse_frame_batch."""
+    ms_idx = find_column(header, column)
+    if ms_idx is None:
+        raise RuntimeError(f"Couldn't find '{column}' in CSV header:\n" + ",".join(header))
+    indices = [ms_idx]
+    if dropped_column:
+        lc = [h.strip().lower() for h in header]
+        if dropped_column.lower() in lc:
+            indices.append(lc.index(dropped_column.lower()))
+    return ColumnProjector(indices)
+
+
+def parse_frame_batch(lines: List[str], projector: ColumnProjector) -> Tuple[List[float], int]:
+    """Pull positive frame times (ms) out of a batch of raw CSV lines.
+
+    Returns (frame_times, dropped_count); dropped frames still present, so they
+    stay in the timing and are only counted.
+    """
+    out = []
+    dropped = 0
+    has_dropped = len(projector.indices) > 1
+    for fields in projector.project(lines):
+        try:
+            ms = float(fields[0])
+        except ValueError:
+            continue
+        if 0 < ms < MAX_FRAME_MS:
+            out.append(ms)
+            if has_dropped and fields[1].strip() == "1":
+                dropped += 1
+    return out, dropped
+
+
+def parse_frame_times(lines: List[str], projector: ColumnProjector) -> List[float]:
+    return parse_frame_batch(lines, projector)[0]
+
+
+def process_projector(header: List[str], column: str = "msBetweenPresents",
+                      dropped_column: Optional[str] = "Dropped") -> ColumnProjector:
+    """Projector yielding (application, process_id, frame_ms[, dropped]) for parse_process_batches."""
+    lc = [h.strip().lower() for h in header]
+    missing = [c for c in ("application", "processid") if c not in lc]
+    if missing:
+        raise RuntimeError(f"Multi-process capture needs {missing} in CSV header:\n" + ",".join(header))
+    frame = frame_projector(header, column, dropped_column)
+    return ColumnProjector([lc.index("application"), lc.index("processid")] + list(frame.indices))
+
+
+def parse_process_batches(lines: List[str], projector: ColumnProjector) -> Dict[ProcessKey, Tuple[List[float], int]]:
+    """parse_frame_batch for a capture of several processes: {(application, pid): (frame_times, dropped)}."""
+    out: Dict[ProcessKey, list] = {}
+    has_dropped = len(projector.indices) > 3
+    for fields in projector.project(lines):
+        try:
+            ms = float(fields[2])
+            pid = int(fields[1])
+        except ValueError:
+            continue
+        if not 0 < ms < MAX_FRAME_MS:
+            continue
+        entry = out.get((fields[0], pid))
+        if entry is None:
+            entry = out[(fields[0], pid)] = [[], 0]
+        entry[0].append(ms)
+        if has_dropped and fields[3].strip() == "1":
+            entry[1] += 1
+    return {key: (ms, dropped) for key, (ms, dropped) in out.items()}
+
+
+def file_replaced(path: str, f: BinaryIO) -> bool:
+    """True if `path` no longer names the file behind `f`, or was truncated below our position."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return True
+    own = os.fstat(f.fileno())
+    return (st.st_dev, st.st_ino) != (own.st_dev, own.st_ino) or st.st_size < f.tell()
+
+
+def _follow_csv(csv_path: str, compile_projector, parse, idle_timeout: float, from_end: bool,
+                watcher: Optional[FileWatcher], stop: Optional[threading.Event],
+                reopen: Optional[threading.Event], metrics) -> Iterator:
+    """Shared follow loop: compile_projector(header) once per file, parse(lines, projector) per read."""
+    own_watcher = watcher is None
+    if own_watcher:
+        watcher = make_watcher(csv_path)
+    skip_existing = from_end
+    try:
+        while not (stop and stop.is_set()):
+            if not os.path.exists(csv_path):
+                watcher.wait(idle_timeout)
+                continue
+
+            with open(csv_path, "rb") as f:
+                tail = LineTailer(f)
+                header = tail.read_header(idle_timeout, watcher, stop.is_set if stop else None)
+                if not header:
+                    return
+                projector = compile_projector(header)
+
+                if skip_existing:
+                    tail.skip_to_end()
+                    skip_existing = False
+
+                while not (stop and stop.is_set()):
+                    if metrics is None:
+                        lines = tail.read_lines()
+                        if lines:
+                            item = parse(lines, projector)
+                            if item is not None:
+                                yield item
+                            continue
+                    else:
+                        t0 = time.perf_counter()
+                        lines = tail.read_lines()
+                        if lines:
+                            t1 = time.perf_counter()
+                            item = parse(lines, projector)
+                            t2 = time.perf_counter()
+                            st = os.fstat(f.fileno())
+                            metrics.observe("detect", max(0.0, time.time() - st.st_mtime_ns / 1e9))
+                            metrics.observe("read", t1 - t0)
+                            metrics.observe("parse", t2 - t1)
+                            metrics.set("backlog_bytes", st.st_size - f.tell() + tail.pending_bytes)
+                            if item is not None:
+                                yield item
+                            continue
+                    if (reopen is not None and reopen.is_set()) or file_replaced(csv_path, f):
+                        if reopen is not None:
+                            reopen.clear()
+                        break
+                    watcher.wait(idle_timeout)
+    finally:
+        if own_watcher:
+            watcher.close()
+
+
+def iter_frame_batches(
+    csv_path: str,
+    column: str = "msBetweenPresents",
+    idle_timeout: float = IDLE_TIMEOUT_S,
+    from_end: bool = True,
+    watcher: Optional[FileWatcher] = None,
+    dropped_column: Optional[str] = "Dropped",
+    stop: Optional[threading.Event] = None,
+    reopen: Optional[threading.Event] = None,
+    metrics=None,
+) -> Iterator[Tuple[List[float], int]]:
+    """Follow a growing CSV and yield (frame_times_ms, dropped_count) batches.
+
+    Each batch holds every complete row that arrived since the previous one;
+    nothing is yielded while the file is idle. Between reads the loop blocks on
+    a FileWatcher, so it wakes as soon as the writer appends instead of after a
+    fixed sleep. `idle_timeout` bounds the wait for events the OS reports late
+    or not at all (file_watch.IDLE_TIMEOUT_S: short on Windows, where NTFS defers
+    notifications for a file held open by its writer).
+
+    If the CSV is recreated or truncated (PresentMon restarted), the new file is
+    read from its start. Truncation is seen by size, so a file rewritten past our
+    position before we look is missed; whoever restarts the writer can set
+    `reopen` to force it. Setting `stop` ends the generator at the next wake-up.
+
+    With a metrics.Metrics, each batch records the detect (file mtime -> read,
+    so only as fine as the filesystem's mtime clock), read and parse stages and
+    the unread backlog in bytes.
+    """
+    def parse(lines, projector):
+        batch, dropped = parse_frame_batch(lines, projector)
+        return (batch, dropped) if batch else None
+
+    return _follow_csv(csv_path, lambda header: frame_projector(header, column, dropped_column), parse,
+                       idle_timeout, from_end, watcher, stop, reopen, metrics)
+
+
+def iter_process_batches(
+    csv_path: str,
+    column: str = "msBetweenPresents",
+    idle_timeout: float = IDLE_TIMEOUT_S,
+    from_end: bool = True,
+    watcher: Optional[FileWatcher] = None,
+    dropped_column: Optional[str] = "Dropped",
+    stop: Optional[threading.Event] = None,
+    reopen: Optional[threading.Event] = None,
+    metrics=None,
+) -> Iterator[Dict[ProcessKey, Tuple[List[float], int]]]:
+    """Like iter_frame_batches for a multi-process capture: each read is split by (Application, ProcessID)."""
+    def parse(lines, projector):
+        return parse_process_batches(lines, projector) or None
+
+    return _follow_csv(csv_path, lambda header: process_projector(header, column, dropped_column), parse,
+                       idle_timeout, from_end, watcher, stop, reopen, metrics)
+
+
+def iter_frame_times(csv_path: str, column: str = "msBetweenPresents", **kwargs) -> Iterator[List[float]]:
+    """Like iter_frame_batches, but yields only the frame-time lists."""
+    for batch, _dropped in iter_frame_batches(csv_path, column, dropped_column=None, **kwargs):
+        yield batch
+
+
+# -----------------------------
+# Pipe source (PresentMon -output_stdout)
+# -----------------------------
+class PipeReader:
+    """Non-blocking read() over a subprocess pipe.
+
+    A helper thread sits in the blocking os.read() (which returns as soon as any
+    bytes are there) and queues the chunks; read() only ever hands out what has
+    already arrived, and wait() doubles as the FileWatcher for LineTailer. Same
+    code on Windows, where anonymous pipes can't be select()ed.
+    """
+
+    def __init__(self, stream, chunk_bytes: int = 64 * 1024):
+        self._fd = stream.fileno()
+        self.chunk_bytes = chunk_bytes
+        self._chunks: deque = deque()
+        self._ready = threading.Event()
+        self.eof = False
+        self._thread = threading.Thread(target=self._pump, name="pipe-reader", daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        while True:
+            try:
+                data = os.read(self._fd, self.chunk_bytes)
+            except OSError:
+                data = b""
+            if not data:
+                self.eof = True
+                self._ready.set()
+                return
+            self._chunks.append(data)
+            self._ready.set()
+
+    def read(self, n: int = -1) -> bytes:
+        self._ready.clear()
+        parts = []
+        size = 0
+        while self._chunks and (n < 0 or size < n):
+            parts.append(self._chunks.popleft())
+            size += len(parts[-1])
+        return b"".join(parts)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._chunks or self.eof:
+            return True
+        return self._ready.wait(timeout)
+
+    @property
+    def drained(self) -> bool:
+        return self.eof and not self._chunks
+
+
+class FrameTee:
+    """Sampled on-disk copy of piped frame rows: the header plus every Nth row."""
+
+    def __init__(self, path: str, every: int = 1):
+        self.path = path
+        self.every = max(1, every)
+        self._f = open(path, "w", encoding="utf-8", newline="")
+        self._n = 0
+
+    def write_header(self, header: List[str]):
+        self._f.write(",".join(header) + "\n")
+
+    def write(self, lines: List[str]):
+        every = self.every
+        if every == 1:
+            self._f.write("\n".join(lines) + "\n")
+            return
+        skip = (-self._n) % every
+        picked = lines[skip::every]
+        if picked:
+            self._f.write("\n".join(picked) + "\n")
+        self._n += len(lines)
+
+    def close(self):
+        self._f.close()
+
+
+def _follow_pipe(stream, compile_projector, parse, idle_timeout: float, stop: Optional[threading.Event],
+                 metrics, tee: Optional[FrameTee]) -> Iterator:
+    """Read CSV rows straight from a pipe until EOF (the writer exited) or `stop`."""
+    reader = PipeReader(stream)
+    tail = LineTailer(reader)
+    header = tail.read_header(idle_timeout, reader, lambda: reader.drained or bool(stop and stop.is_set()))
+    if not header:
+        return
+    projector = compile_projector(header)
+    if tee is not None:
+        tee.write_header(header)
+    while not (stop and stop.is_set()):
+        t0 = time.perf_counter()
+        lines = tail.read_lines()
+        if not lines:
+            if reader.drained:
+                lines = tail.take_partial()
+                if not lines:
+                    return
+            else:
+                reader.wait(idle_timeout)
+                continue
+        t1 = time.perf_counter()
+        item = parse(lines, projector)
+        if metrics is not None:
+            metrics.observe("read", t1 - t0)
+            metrics.observe("parse", time.perf_counter() - t1)
+        if tee is not None:
+            tee.write(lines)
+        if item is not None:
+            yield item
+
+
+def iter_pipe_batches(
+    stream,
+    column: str = "msBetweenPresents",
+    idle_timeout: float = IDLE_TIMEOUT_S,
+    dropped_column: Optional[str] = "Dropped",
+    stop: Optional[threading.Event] = None,
+    metrics=None,
+    tee: Optional[FrameTee] = None,
+    split_processes: bool = False,
+) -> Iterator:
+    """iter_frame_batches for a PresentMon started with -output_stdout.
+
+    Yields (frame_times_ms, dropped_count) batches, or with split_processes the
+    {(Application, ProcessID): batch} dicts of iter_process_batches. Ends when
+    the pipe closes. `tee` keeps a sampled CSV copy on disk.
+    """
+    if split_processes:
+        def parse(lines, projector):
+            return parse_process_batches(lines, projector) or None
+        compile_projector = lambda header: process_projector(header, column, dropped_column)  # noqa: E731
+    else:
+        def parse(lines, projector):
+            batch, dropped = parse_frame_batch(lines, projector)
+            return (batch, dropped) if batch else None
+        compile_projector = lambda header: frame_projector(header, column, dropped_column)  # noqa: E731
+    return _follow_pipe(stream, compile_projector, parse, idle_timeout, stop, metrics, tee)
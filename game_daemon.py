@@ -0,0 +1,140 @@
+# game_daemon.py
+# Game-lifecycle supervisor (hd2_firerate_controller.py --daemon).
+#
+#   idle      one process scan every daemon_poll_s (process_watch); no PresentMon,
+#             no tailer, no log/metrics threads
+#   session   the game is running: bootstrap the bridge, start PresentMon + a
+#             FrameSource + the controller (run_frames). If PresentMon dies while
+#             the game is still up it is restarted with backoff and a fresh source.
+#   teardown  the game exited (a thread blocks on the game process itself):
+#             PresentMon stopped, state saved, bridge/log/metrics closed; back to idle
+#
+# A CSV truncated or recreated under a running session is picked up by the
+# tailer itself (frame_tail.file_replaced); a PresentMon restart always starts
+# a fresh CSV with a fresh source.
+#
+#   python hd2_firerate_controller.py --daemon
+
+import signal
+import subprocess
+import threading
+import time
+from typing import Optional
+
+from controller_async import HEALTHY_RUN_S, RESTART_BACKOFF_S
+from hd2_firerate_controller import (Config, RateController, bootstrap, close_summary, open_bridge,
+                                     open_frame_source, open_log, open_metrics, open_recorder, open_summary,
+                                     run_frames, start_presentmon)
+from process_watch import ProcessWatcher, ProcInfo
+from warm_start import load_state, save_state
+
+
+def stop_presentmon(pm: subprocess.Popen, timeout: float = 3.0):
+    """SIGTERM (TerminateProcess on Windows), then kill if it hangs."""
+    if pm.poll() is not None:
+        return
+    try:
+        pm.send_signal(signal.SIGTERM)
+        pm.wait(timeout)
+    except subprocess.TimeoutExpired:
+        pm.kill()
+        pm.wait()
+    except OSError:
+        pass
+
+
+class GameDaemon:
+    def __init__(self, cfg: Config, presentmon_exe: str, watcher: Optional[ProcessWatcher] = None):
+        self.cfg = cfg
+        self.presentmon_exe = presentmon_exe
+        self.watcher = watcher or ProcessWatcher()
+        self.stop = threading.Event()
+        self.sessions = 0
+        self.restarts = 0
+
+    def run(self):
+        cfg = self.cfg
+        print(f"[DAEMON] Watching for {cfg.game_exe_name} (scan every {cfg.daemon_poll_s:g}s, "
+              f"{self.watcher.backend.backend})")
+        try:
+            while not self.stop.is_set():
+                game = self.watcher.wait_for_start(cfg.game_exe_name, interval_s=cfg.daemon_poll_s, stop=self.stop)
+                if game is None:
+                    break
+                self.session(game)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop.set()
+            print(f"[DAEMON] stopped after {self.sessions} sessions, {self.restarts} PresentMon restarts")
+
+    def session(self, game: ProcInfo):
+        cfg = self.cfg
+        self.sessions += 1
+        started_at = time.monotonic()
+        print(f"[DAEMON] {game.name} started (pid {game.pid}); capture on")
+
+        ended = threading.Event()
+
+        def watch_exit():
+            self.watcher.wait_for_exit(game, stop=self.stop)
+            ended.set()
+
+        threading.Thread(target=watch_exit, name="game-exit", daemon=True).start()
+
+        def done() -> bool:
+            return ended.is_set() or self.stop.is_set()
+
+        state = load_state(cfg.state_path)
+        bridge = open_bridge(cfg)
+        warm = bootstrap(cfg, bridge, state)
+        metrics, export = open_metrics(cfg)
+        log = open_log(cfg)
+        recorder = open_recorder(cfg)
+        summary = open_summary(cfg)
+        ctrl = RateController(cfg, metrics)
+        if warm:
+            ctrl.seed(*warm)
+        state.game_exe_name = cfg.game_exe_name
+        state.presentmon_path = self.presentmon_exe
+        prev_rate = warm[1] if warm else None
+        attempt = 0
+        try:
+            while not done():
+                run_started = time.monotonic()
+                pm = start_presentmon(self.presentmon_exe, cfg)
+                log.info(f"[HD2] PresentMon running (pid {pm.pid})")
+                source = open_frame_source(cfg, pm, metrics)
+                try:
+                    prev_rate = run_frames(cfg, source, ctrl, bridge, log, state, metrics, prev_rate=prev_rate,
+                                           should_stop=lambda: done() or pm.poll() is not None,
+                                           recorder=recorder, summary=summary)
+                finally:
+                    source.close()
+                    stop_presentmon(pm)
+                if done():
+                    break
+                # PresentMon died under a running game
+                if time.monotonic() - run_started >= HEALTHY_RUN_S:
+                    attempt = 0
+                delay = RESTART_BACKOFF_S[min(attempt, len(RESTART_BACKOFF_S) - 1)]
+                attempt += 1
+                self.restarts += 1
+                log.info(f"[HD2] PresentMon exited ({pm.returncode}); restarting in {delay:g}s")
+                ended.wait(delay)
+        finally:
+            if state.last_rate is not None:
+                save_state(cfg.state_path, state)
+            bridge.close()
+            close_summary(summary, log)
+            log.close()
+            if recorder is not None:
+                recorder.close()
+            if export is not None:
+                export.close()
+            why = f"{game.name} exited" if ended.is_set() else "stopped"
+            print(f"[DAEMON] {why} after {time.monotonic() - started_at:.0f}s; capture off")
+
+
+def run_daemon(cfg: Config, presentmon_exe: str):
+    GameDaemon(cfg, presentmon_exe).run()
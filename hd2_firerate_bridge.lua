@@ -1,9 +1,19 @@
 -- === HD2 Fire Rate Bridge ===
--- Reads a number from a text file and writes it to the memory record
--- named exactly: "Enter Firerate For Force Apply"
+-- Reads the fire rate the controller publishes in a text file and writes it to
+-- the memory record named exactly: "Enter Firerate For Force Apply"
+--
+-- File format v2 (bridge.py): "HD2 2 <seq> <value>". seq changes with every new
+-- value and the controller never rewrites an identical one, so an unchanged seq
+-- means the memory record is already right and is left alone. A bare number
+-- (older controllers) still works; it is compared by its text.
+-- While nothing changes the timer backs off from POLL_MS to IDLE_MAX_MS; the
+-- first change puts it back to POLL_MS. bridge.BridgeFileReader mirrors this.
 
 local BRIDGE_FILE = [[C:\Users\Public\hd2_fire_rate.txt]]
 local TARGET_DESC = "Enter Firerate For Force Apply"
+local POLL_MS     = 200    -- while values are changing
+local IDLE_MAX_MS = 1000   -- slowest poll while nothing changes
+local IDLE_AFTER  = 5      -- unchanged polls before backing off
 
 local al = getAddressList()
 local mr = al.getMemoryRecordByDescription(TARGET_DESC)
@@ -15,18 +25,38 @@ else
     bridgeTimer.destroy()
   end
 
+  local lastKey = nil
+  local idle = 0
+
   bridgeTimer = createTimer()
-  bridgeTimer.Interval = 200 -- ms
+  bridgeTimer.Interval = POLL_MS
   bridgeTimer.OnTimer = function(t)
     local f = io.open(BRIDGE_FILE, "r")
-    if f then
-      local data = f:read("*all")
-      f:close()
-      local v = tonumber(data)
-      if v and v == v and v > 0 then
-        -- CE memory record .Value expects string; formats float OK
-        mr.Value = string.format("%.3f", v)
+    if not f then return end
+    local data = f:read("*all")
+    f:close()
+
+    local key, v
+    local ver, seq, val = string.match(data, "^HD2 (%d+) (%d+) (%S+)")
+    if ver then
+      key, v = seq, tonumber(val)
+    else
+      key, v = data, tonumber(data)
+    end
+    if not (v and v == v and v > 0) then return end
+
+    if key == lastKey then
+      -- Nothing new: no memory write, and poll less often the longer it stays that way
+      idle = idle + 1
+      if idle >= IDLE_AFTER and t.Interval < IDLE_MAX_MS then
+        t.Interval = math.min(IDLE_MAX_MS, t.Interval * 2)
       end
+      return
     end
+    lastKey = key
+    idle = 0
+    t.Interval = POLL_MS
+    -- CE memory record .Value expects string; formats float OK
+    mr.Value = string.format("%.3f", v)
   end
 end
@@ -1,16 +1,25 @@
 # hd2_firerate_controller.py
 
-import csv
 import os
 import signal
 import subprocess
+import threading
 import time
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 import argparse
 import shutil
 
+from bridge import (BRIDGE_KINDS, DEFAULT_PIPE, DEFAULT_PUSH_ADDR, PUSH_KINDS, Bridge, make_bridge,
+                    write_bridge_file)
+from control_law import Ema, RateCurve, make_law  # noqa: F401 (Ema re-exported)
+from ctrl_log import ControlLog, describe_fps, describe_update  # noqa: F401 (re-exported)
+from frame_stats import FrameWindow, WindowStats
+from frame_source import FrameSource, PresentMonCsvSource, PresentMonPipeSource
+from frame_tail import FrameTee, iter_frame_times, iter_pipe_batches, iter_process_batches
+from process_watch import ProcessWatcher, ProcInfo
+from warm_start import ControllerState, StartupTimer, load_state, save_state, warm_values
+
 # -----------------------------
 # CONFIG – tweak to your liking
 # -----------------------------
@@ -19,14 +28,29 @@ class Config:
     # Your NVIDIA FrameView PresentMon path (64-bit)
     presentmon_path: str = r"C:\Program Files\NVIDIA Corporation\FrameViewSDK\bin\PresentMon_x64.exe"
     game_exe_name: str = "helldivers2.exe"
+    extra_exe_names: Tuple[str, ...] = ()  # also capture these in the same session (own controller + bridge each)
     csv_path: str = r"C:\Users\Public\presentmon_hd2.csv"
+    capture_source: str = "csv"    # "csv" (PresentMon writes csv_path, we tail it) | "pipe" (-output_stdout, no disk)
+    tee_csv_path: Optional[str] = None  # pipe: keep a sampled CSV copy here
+    tee_every: int = 10            # pipe: tee every Nth frame row (1 = all)
     bridge_file: str = r"C:\Users\Public\hd2_fire_rate.txt"
+    bridge_kind: str = "file"      # "file" (Lua text bridge) | "mmap" (seqlock record) | "udp" | "pipe" (push)
+    bridge_file_versioned: bool = True  # file: "HD2 2 <seq> <value>"; False = bare number for pre-v2 Lua scripts
+    bridge_mmap_file: str = r"C:\Users\Public\hd2_fire_rate.bin"
+    bridge_push_addr: str = DEFAULT_PUSH_ADDR  # udp: receiver host:port
+    bridge_pipe: str = DEFAULT_PIPE            # pipe: named pipe / FIFO path
+    push_every_frame: bool = False  # push transports: send on every frame instead of every update_interval_s
 
     # Value Knobs
     change_eps: float = 10.0     # only log when rate changes by >= this amount
     verbose_each_update: bool = True  # True = print every update (spammy)
     show_fps_log: bool = True      # when True, print FPS periodically
     fps_log_interval_s: float = 10.0  # seconds between FPS logs
+    log_coalesce_s: float = 1.0    # merge runs of same-direction updates into one line per interval (0 = off)
+    log_json_path: Optional[str] = None  # also append every record as a JSON line here
+    metrics_port: int = 0          # >0: serve /metrics (Prometheus) and /stats (JSON) on 127.0.0.1:<port>
+    metrics_file: Optional[str] = None  # rewrite a JSON stats file here every metrics_interval_s
+    metrics_interval_s: float = 2.0
 
     # Controller behavior
     target_fps: float = 60.0       # FPS you consider "ideal"
@@ -36,6 +60,25 @@ class Config:
     response_gamma: float = 1.0     # 1.0 linear; >1 gentler below target
     ema_alpha: float = 0.2          # FPS smoothing (0..1). Higher = snappier.
     update_interval_s: float = 0.25 # How often to recompute/write fire-rate
+    control_law: str = "ema"        # "ema" (EMA + curve) | "pid" (frame-time observer + trend feedforward)
+    pid_kp: float = 0.8             # pid: level gain while frame time falls (FPS recovering)
+    pid_kp_drop: float = 1.0        # pid: level gain while frame time rises (FPS dropping)
+    pid_ki: float = 0.1             # pid: trend gain
+    pid_horizon_s: float = 0.125    # pid: how far ahead a rising frame-time trend is fed forward
+    window_frames: int = 4096       # Ring-buffer capacity for per-tick frame statistics
+    wait_for_game: bool = True      # don't start PresentMon until a capture target is running
+    process_poll_s: float = 2.0     # process scan interval while waiting
+    daemon_poll_s: float = 3.0      # --daemon: process scan interval between game sessions
+    record_dir: Optional[str] = None  # session_record.py: binary recordings (ring) in this folder
+    record_max_mb: float = 64.0     # total size of the recording ring
+    summary_csv_path: Optional[str] = None  # session_stats.py: FrameView_Summary.csv-style rows appended here
+    summary_interval_s: float = 0.0  # also append a row per interval (0 = session end only)
+
+    # Warm start (warm_start.py)
+    state_path: Optional[str] = r"C:\Users\Public\hd2_firerate_state.json"  # None = don't persist
+    warm_start: bool = True         # bootstrap with the last rate and seed the law with the last FPS
+    warm_start_max_age_s: float = 6 * 3600.0  # older state -> cold start from base_rate
+    state_save_interval_s: float = 30.0
 
 CONFIG = Config()
 
@@ -50,18 +93,8 @@ def _strip_quotes(p: Optional[str]) -> Optional[str]:
         return p[1:-1]
     return p
 
-class Ema:
-    def __init__(self, alpha: float, initial: Optional[float] = None):
-        self.alpha = alpha
-        self.value = initial
-    def update(self, x: float) -> float:
-        if self.value is None:
-            self.value = x
-        else:
-            self.value = self.alpha * x + (1 - self.alpha) * self.value
-        return self.value
-
 def fps_to_rate(fps: float, cfg: Config) -> float:
+    # Reference mapping; the controller uses control_law.RateCurve (same curve, gamma tabulated)
     if fps <= 0:
         return cfg.min_rate
     frac = fps / cfg.target_fps
@@ -70,19 +103,76 @@ def fps_to_rate(fps: float, cfg: Config) -> float:
     rate = cfg.base_rate * frac
     return max(cfg.min_rate, min(cfg.max_rate, rate))
 
+@dataclass
+class Tick:
+    rate: float
+    smoothed_fps: float
+    stats: WindowStats
+
+class RateController:
+    """Frame batches in, one fire-rate decision per update_interval_s out.
+
+    Time is passed in by the caller (wall clock live, log time in replay), so the
+    same object drives the live loop and deterministic replays. The FPS -> rate
+    law is pluggable (Config.control_law, see control_law.py). With a
+    metrics.Metrics attached, ticks record the smooth / map stages and gauges.
+    """
+    def __init__(self, cfg: Config, metrics=None):
+        self.cfg = cfg
+        self.metrics = metrics
+        self.law = make_law(cfg)
+        self.window = FrameWindow(cfg.window_frames)
+        self.last_tick: Optional[float] = None
+        self.rate: Optional[float] = None
+        self.fps: Optional[float] = None
+    def seed(self, fps: float, rate: float):
+        # Warm start: the first window blends into the last session's estimate
+        self.law.seed(fps)
+        self.fps, self.rate = fps, rate
+    def push(self, ms_batch, dropped: int = 0):
+        self.window.extend(ms_batch, dropped)
+    def due(self, now: float) -> bool:
+        return self.last_tick is None or now - self.last_tick >= self.cfg.update_interval_s
+    def tick(self, now: float) -> Optional[Tick]:
+        # One pass over everything that arrived since the last tick
+        m = self.metrics
+        if m is not None:
+            t0 = time.perf_counter()
+        stats = self.window.tick()
+        if stats is None:
+            return None
+        if m is None:
+            self.rate, smoothed = self.law.update(stats, now)
+        else:
+            smoothed = self.law.estimate(stats, now)
+            t1 = time.perf_counter()
+            self.rate = self.law.curve(smoothed)
+            m.observe("smooth", t1 - t0)
+            m.observe("map", time.perf_counter() - t1)
+        self.last_tick = now
+        self.fps = smoothed
+        if m is not None:
+            m.set("fps", smoothed)
+            m.set("rate", self.rate)
+            m.inc("frames", stats.frames)
+            m.inc("ticks")
+        return Tick(self.rate, smoothed, stats)
+
 # -----------------------------
 # PresentMon runner & CSV tail
 # -----------------------------
-def resolve_presentmon_path(cfg_path: str, cli_override: Optional[str]) -> str:
-    # Priority: CLI > env var > config default > PATH
-    for candidate in (
-        _strip_quotes(cli_override),
-        _strip_quotes(os.environ.get("PRESENTMON")),
-        _strip_quotes(cfg_path),
-        shutil.which("PresentMon_x64.exe"),
-        shutil.which("PresentMon.exe"),
-        shutil.which("presentmon.exe"),
-    ):
+def _presentmon_candidates(cfg_path: str, cli_override: Optional[str], cached: Optional[str]):
+    # Priority: CLI > env var > config default > cached from the last run > PATH.
+    # A generator, so the PATH scans only happen when everything before them missed.
+    yield _strip_quotes(cli_override)
+    yield _strip_quotes(os.environ.get("PRESENTMON"))
+    yield _strip_quotes(cfg_path)
+    yield cached
+    for name in ("PresentMon_x64.exe", "PresentMon.exe", "presentmon.exe"):
+        yield shutil.which(name)
+
+def resolve_presentmon_path(cfg_path: str, cli_override: Optional[str], cached: Optional[str] = None) -> str:
+    for candidate in _presentmon_candidates(cfg_path, cli_override, cached):
         if candidate and os.path.isfile(candidate):
             return candidate
 
@@ -92,138 +182,369 @@ def resolve_presentmon_path(cfg_path: str, cli_override: Optional[str]) -> str:
         "or put PresentMon on PATH."
     )
 
-def start_presentmon(presentmon_exe: str, cfg: Config) -> subprocess.Popen:
+def capture_targets(cfg: Config) -> List[str]:
+    targets = [cfg.game_exe_name]
+    targets += [n for n in cfg.extra_exe_names if n.lower() != cfg.game_exe_name.lower()]
+    return targets
+
+def presentmon_args(presentmon_exe: str, cfg: Config) -> List[str]:
+    # One session for every target; rows are told apart by Application/ProcessID
+    args = [presentmon_exe]
+    for name in capture_targets(cfg):
+        args += ["-process_name", name]
+    if cfg.capture_source == "pipe":
+        return args + ["-output_stdout"]
+    return args + ["-output_file", cfg.csv_path]
+
+def remove_csv(cfg: Config):
     # Fresh CSV
     try:
         os.remove(cfg.csv_path)
     except FileNotFoundError:
         pass
 
-    args = [
-        presentmon_exe,
-        "-process_name", cfg.game_exe_name,
-        "-output_file", cfg.csv_path,
-    ]
+def start_presentmon(presentmon_exe: str, cfg: Config) -> subprocess.Popen:
+    if cfg.capture_source == "pipe":
+        # Frame rows come back on stdout; nothing touches the disk unless a tee is configured
+        return subprocess.Popen(
+            presentmon_args(presentmon_exe, cfg),
+            stdout=subprocess.PIPE,
+            bufsize=0,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    remove_csv(cfg)
     return subprocess.Popen(
-        args,
+        presentmon_args(presentmon_exe, cfg),
         creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
     )
 
+def open_tee(cfg: Config) -> Optional[FrameTee]:
+    return FrameTee(cfg.tee_csv_path, cfg.tee_every) if cfg.capture_source == "pipe" and cfg.tee_csv_path else None
+
+def open_frame_source(cfg: Config, pm: subprocess.Popen, metrics=None) -> FrameSource:
+    """FrameSource for a PresentMon started by start_presentmon (pipe mode: exhausted when it exits)."""
+    if cfg.capture_source == "pipe":
+        return PresentMonPipeSource(pm.stdout, open_tee(cfg), metrics=metrics).start()
+    return PresentMonCsvSource(cfg.csv_path, metrics=metrics).start()
+
+def open_capture(cfg: Config, pm: subprocess.Popen, metrics=None):
+    """(per-process batch iterator, tee or None) for a multi-target capture.
+
+    Yields what iter_process_batches yields. In pipe mode the iterator ends when
+    PresentMon exits.
+    """
+    if cfg.capture_source != "pipe":
+        return iter_process_batches(cfg.csv_path, metrics=metrics), None
+    tee = open_tee(cfg)
+    return iter_pipe_batches(pm.stdout, metrics=metrics, tee=tee, split_processes=True), tee
+
 def iter_fps_from_presentmon(csv_path: str):
-    while not os.path.exists(csv_path):
-        time.sleep(0.1)
-
-    with open(csv_path, "r", newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-
-        # Read header
-        header = None
-        while header is None:
-            try:
-                header = next(reader)
-            except StopIteration:
-                time.sleep(0.05)
-
-        header_lc = [h.lower() for h in header]
-        # 'msBetweenPresents' is the canonical column name
-        try:
-            mbp_idx = header_lc.index("msbetweenpresents")
-        except ValueError:
-            # Fallback: locate any close variant
-            mbp_idx = next((i for i, h in enumerate(header_lc) if "msbetweenpresent" in h), None)
-            if mbp_idx is None:
-                raise RuntimeError(
-                    "Couldn't find 'msBetweenPresents' in PresentMon CSV header:\n" + ",".join(header)
-                )
-
-        # Follow appended rows
-        f.seek(0, os.SEEK_END)
-        while True:
-            pos = f.tell()
-            line = f.readline()
-            if not line:
-                time.sleep(0.05)
-                f.seek(pos)
-                continue
-
-            row = next(csv.reader([line]))
-            if len(row) <= mbp_idx:
-                continue
-
-            try:
-                ms = float(row[mbp_idx])
-                if ms > 0:
-                    yield 1000.0 / ms
-            except (ValueError, ZeroDivisionError):
-                continue
+    # Rows arrive in batches from the chunked tailer; flatten to per-frame FPS
+    for batch in iter_frame_times(csv_path, "msBetweenPresents"):
+        for ms in batch:
+            yield 1000.0 / ms
 
 def write_bridge_value(path: str, value: float):
-    p = Path(path)
-    tmp = p.with_suffix(".tmp")
-    with open(tmp, "w", encoding="utf-8") as w:
-        w.write(f"{value:.3f}")
+    write_bridge_file(path, value)
+
+def bridge_target(cfg: Config, app: Optional[str] = None, index: int = 0) -> str:
+    """Bridge target for the main game, or a per-process one for capture target #index."""
+    target = {
+        "mmap": cfg.bridge_mmap_file,
+        "udp": cfg.bridge_push_addr,
+        "pipe": cfg.bridge_pipe,
+    }.get(cfg.bridge_kind, cfg.bridge_file)
+    if app is None or app.lower() == cfg.game_exe_name.lower():
+        return target
+    stem = os.path.splitext(app)[0].lower()
+    if cfg.bridge_kind == "udp":
+        host, _, port = target.rpartition(":")
+        return f"{host}:{int(port) + index}"
+    if cfg.bridge_kind == "pipe":
+        return f"{target}.{stem}"
+    root, ext = os.path.splitext(target)
+    return f"{root}.{stem}{ext}"   # hd2_fire_rate.txt -> hd2_fire_rate.chrome.txt
+
+def open_bridge(cfg: Config, app: Optional[str] = None, index: int = 0) -> Bridge:
+    opts = {"versioned": cfg.bridge_file_versioned} if cfg.bridge_kind == "file" else {}
+    return make_bridge(cfg.bridge_kind, bridge_target(cfg, app, index), **opts)
+
+def open_metrics(cfg: Config):
+    """(Metrics, exporter) when an endpoint or stats file is configured, else (None, None)."""
+    if not (cfg.metrics_port or cfg.metrics_file):
+        return None, None
+    from metrics import Metrics, MetricsExport
+    m = Metrics()
+    export = MetricsExport(m, cfg.metrics_port, cfg.metrics_file, cfg.metrics_interval_s)
+    if export.server is not None:
+        print(f"[METRICS] http://127.0.0.1:{export.server.port}/metrics")
+    return m, export
+
+def timed_write(bridge: Bridge, metrics, rate: float, observed: Optional[float]) -> bool:
+    """bridge.write with bridge / loop latency metrics; True if the value was published."""
+    if metrics is None:
+        return bridge.write(rate, observed)
+    t0 = time.perf_counter()
+    published = bridge.write(rate, observed)
+    if not published:
+        metrics.inc("bridge_skipped")   # unchanged value or dropped packet: not a write
+        return False
+    t1 = time.perf_counter()
+    metrics.observe("bridge", t1 - t0)
+    if observed is not None:
+        metrics.observe("loop", t1 - observed)
+    metrics.inc("bridge_writes")
+    return True
+
+def bootstrap(cfg: Config, bridge: Bridge, state: ControllerState) -> Optional[Tuple[float, float]]:
+    """Write the initial rate: the last known good one on a warm start, else base_rate.
+
+    Returns the (fps, rate) warm start, or None when it was a cold start.
+    """
+    warm = warm_values(state, cfg)
+    init_rate = warm[1] if warm else max(min(cfg.base_rate, cfg.max_rate), cfg.min_rate)
+    bridge.write(init_rate)
+    if warm:
+        print(f"[CTRL] BOOTSTRAP write ({bridge.kind}) → {init_rate:.1f}  "
+              f"(warm: FPS {warm[0]:.1f}, saved {state.age_s:.0f}s ago)")
+    else:
+        print(f"[CTRL] BOOTSTRAP write ({bridge.kind}) → {init_rate:.1f}")
+    return warm
+
+def wait_for_game(cfg: Config, watcher: Optional[ProcessWatcher] = None,
+                  stop: Optional[threading.Event] = None) -> Optional[ProcInfo]:
+    """Block (one cheap process scan per process_poll_s) until a capture target runs.
+
+    None if `stop` was set, or if this platform has no process discovery
+    backend, in which case capture just starts.
+    """
     try:
-        os.replace(tmp, p)
-    except PermissionError:
-        time.sleep(0.05)
-        os.replace(tmp, p)
+        watcher = watcher or ProcessWatcher()
+    except OSError as e:
+        print(f"[HD2] process discovery unavailable ({e}); starting capture now")
+        return None
+    targets = capture_targets(cfg)
+    proc = watcher.wait_for_start(targets, timeout=0)
+    if proc is None:
+        print(f"[HD2] Waiting for {' / '.join(targets)} to start...")
+        proc = watcher.wait_for_start(targets, interval_s=cfg.process_poll_s, stop=stop)
+    if proc is not None:
+        print(f"[HD2] {proc.name} running (pid {proc.pid})")
+    return proc
+
+def open_recorder(cfg: Config):
+    """SessionRecorder when record_dir is set, else None."""
+    if not cfg.record_dir:
+        return None
+    from session_record import SessionRecorder
+    meta = {"game": cfg.game_exe_name, "control_law": cfg.control_law, "target_fps": cfg.target_fps,
+            "base_rate": cfg.base_rate, "update_interval_s": cfg.update_interval_s}
+    return SessionRecorder(cfg.record_dir, int(cfg.record_max_mb * (1 << 20)), meta)
+
+def open_summary(cfg: Config):
+    """LiveSummary when summary_csv_path is set, else None."""
+    if not cfg.summary_csv_path:
+        return None
+    from session_stats import LiveSummary
+    return LiveSummary(cfg.summary_csv_path, cfg.game_exe_name, cfg.summary_interval_s)
+
+def close_summary(summary, log: ControlLog):
+    """Appends the session row and logs it."""
+    if summary is not None:
+        log.info(f"[FPS] session {summary.close().describe()}")
+
+def open_log(cfg: Config) -> ControlLog:
+    return ControlLog(verbose=cfg.verbose_each_update, change_eps=cfg.change_eps,
+                      coalesce_s=cfg.log_coalesce_s, json_path=cfg.log_json_path)
+
+# -----------------------------
+# Frame loop
+# -----------------------------
+def run_frames(cfg: Config, source: FrameSource, ctrl: RateController, bridge: Bridge, log: ControlLog,
+               state: ControllerState, metrics=None, timer: Optional[StartupTimer] = None,
+               prev_rate: Optional[float] = None,
+               should_stop: Optional[Callable[[], bool]] = None, recorder=None, summary=None) -> Optional[float]:
+    """FrameSource batches -> RateController -> bridge, with logging and periodic state saves.
+
+    With a session_record.SessionRecorder, every batch, decision and bridge write is recorded;
+    with a session_stats.LiveSummary, every frame feeds the session summary.
+
+    Runs until the source is exhausted or should_stop() (checked per batch and on
+    idle heartbeats) is true. Returns the last logged rate.
+    """
+    last_fps_log = 0.0
+    last_save = time.time()
+    push_each_frame = cfg.push_every_frame and bridge.kind in PUSH_KINDS
+    for batch in source:
+        if should_stop is not None and should_stop():
+            break
+        if batch is None:
+            continue  # idle
+        if timer is not None and not timer.seen("first frames"):
+            timer.mark("first frames")
+        observed = batch.observed
+        ctrl.push(batch.frame_ms, batch.dropped)
+        if recorder is not None:
+            recorder.batch(observed, batch.frame_ms, batch.dropped)
+        if summary is not None:
+            summary.add(batch.frame_ms)
+        now = time.time()
+        update_due = ctrl.due(now)
+        if not (update_due or push_each_frame):
+            continue
+
+        last_tick = ctrl.last_tick
+        t = ctrl.tick(now)
+        rate, smoothed, stats = t.rate, t.smoothed_fps, t.stats
+        if timed_write(bridge, metrics, rate, observed) and recorder is not None:
+            recorder.write(time.perf_counter(), rate, observed)
+        if not update_due:
+            # push-every-frame tick between updates: keep the update schedule
+            ctrl.last_tick = last_tick
+            continue
+        if timer is not None and not timer.seen("first update"):
+            timer.mark("first update")
+            log.info(timer.report())
+        if recorder is not None:
+            recorder.tick(time.perf_counter(), smoothed, rate)
+        if summary is not None:
+            summary.maybe_flush(now)
+
+        state.last_fps, state.last_rate = smoothed, rate
+        if now - last_save >= cfg.state_save_interval_s:
+            save_state(cfg.state_path, state)
+            last_save = now
+
+        # Periodic FPS logging (EMA view of FPS + last window)
+        if cfg.show_fps_log and (now - last_fps_log >= cfg.fps_log_interval_s):
+            log.fps(smoothed, stats)
+            last_fps_log = now
+
+        # ---- Logging logic (formatted and printed on the log thread) ----
+        log.update(prev_rate, rate, smoothed)
+
+        prev_rate = rate
+    return prev_rate
 
 # -----------------------------
 # Main
 # -----------------------------
 def main(cfg: Config = CONFIG):
+    timer = StartupTimer()
     parser = argparse.ArgumentParser()
     parser.add_argument("--presentmon", help="Path to PresentMon.exe or PresentMon_x64.exe", default=None)
+    parser.add_argument("--bridge", choices=sorted(BRIDGE_KINDS), default=None,
+                        help="Bridge transport (default: CONFIG.bridge_kind)")
+    parser.add_argument("--log-json", default=None, help="Append controller records as JSON lines to this file")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve /metrics and /stats on this port")
+    parser.add_argument("--metrics-file", default=None, help="Periodically rewrite a JSON stats file here")
+    parser.add_argument("--control-law", choices=("ema", "pid"), default=None,
+                        help="FPS -> rate law (default: CONFIG.control_law; compare with control_law.py)")
+    parser.add_argument("--also", nargs="+", default=None, metavar="EXE",
+                        help="Capture these processes too, in the same PresentMon session (one bridge each)")
+    parser.add_argument("--runtime", choices=("loop", "async"), default="loop",
+                        help="async: separate tail/control/bridge/log tasks and a supervised PresentMon")
+    parser.add_argument("--source", choices=("csv", "pipe"), default=None,
+                        help="pipe: read PresentMon's -output_stdout directly instead of tailing csv_path")
+    parser.add_argument("--tee", default=None, metavar="CSV",
+                        help="pipe source: keep a sampled copy of the frame rows in this file")
+    parser.add_argument("--tee-every", type=int, default=None, metavar="N", help="Tee every Nth row")
+    parser.add_argument("--cold", action="store_true", help="Ignore the saved state (bootstrap from base_rate)")
+    parser.add_argument("--no-wait", action="store_true", help="Start PresentMon without waiting for the game")
+    parser.add_argument("--record", default=None, metavar="DIR",
+                        help="Record frames/decisions/bridge writes to a size-bounded binary ring in DIR")
+    parser.add_argument("--summary", default=None, metavar="CSV",
+                        help="Append FrameView_Summary.csv-style rows (Avg FPS, 1%% Low, ...) to CSV at session end")
+    parser.add_argument("--summary-every", type=float, default=None, metavar="S",
+                        help="With --summary, also append a row every S seconds")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Stay resident: capture only while the game runs, restart PresentMon if it crashes")
     args = parser.parse_args()
+    if args.cold:
+        cfg.warm_start = False
+    if args.no_wait:
+        cfg.wait_for_game = False
+    if args.record:
+        cfg.record_dir = args.record
+    if args.summary:
+        cfg.summary_csv_path = args.summary
+    if args.summary_every is not None:
+        cfg.summary_interval_s = args.summary_every
+    if args.source:
+        cfg.capture_source = args.source
+    if args.tee:
+        cfg.tee_csv_path = args.tee
+    if args.tee_every:
+        cfg.tee_every = args.tee_every
+    if args.bridge:
+        cfg.bridge_kind = args.bridge
+    if args.log_json:
+        cfg.log_json_path = args.log_json
+    if args.metrics_port is not None:
+        cfg.metrics_port = args.metrics_port
+    if args.metrics_file:
+        cfg.metrics_file = args.metrics_file
+    if args.control_law:
+        cfg.control_law = args.control_law
+    if args.also:
+        cfg.extra_exe_names = tuple(args.also)
+    state = load_state(cfg.state_path)
+    timer.mark("state")
+    if args.daemon:
+        if len(capture_targets(cfg)) > 1 or args.runtime == "async":
+            print("[CTRL] --daemon runs one target on the loop runtime")
+        from game_daemon import run_daemon
+        run_daemon(cfg, resolve_presentmon_path(cfg.presentmon_path, args.presentmon, state.presentmon_path))
+        return
+    if cfg.wait_for_game:
+        try:
+            wait_for_game(cfg)
+        except KeyboardInterrupt:
+            return
+        timer.mark("game")
+    if len(capture_targets(cfg)) > 1:
+        if args.runtime == "async":
+            print("[CTRL] multi-process capture runs on the loop runtime")
+        from multi_capture import run_multi
+        run_multi(cfg, resolve_presentmon_path(cfg.presentmon_path, args.presentmon, state.presentmon_path))
+        return
+    if args.runtime == "async":
+        if cfg.capture_source == "pipe":
+            print("[CTRL] async runtime tails the CSV; --source pipe is ignored")
+            cfg.capture_source = "csv"
+        from controller_async import run
+        run(cfg, resolve_presentmon_path(cfg.presentmon_path, args.presentmon, state.presentmon_path))
+        return
 
     # Bootstrap: write a sane, clamped value immediately so stale 11000 gets replaced
-    init_rate = max(min(cfg.base_rate, cfg.max_rate), cfg.min_rate)
-    write_bridge_value(cfg.bridge_file, init_rate)
-    print(f"[CTRL] BOOTSTRAP write → {init_rate:.1f}")
+    # (warm start: the last session's rate, which is usually right already)
+    bridge = open_bridge(cfg)
+    warm = bootstrap(cfg, bridge, state)
+    timer.mark("bootstrap", f"warm {warm[1]:.1f}" if warm else "cold")
 
-    last_fps_log = 0.0
-
-    pm_exe = resolve_presentmon_path(cfg.presentmon_path, args.presentmon)
+    pm_exe = resolve_presentmon_path(cfg.presentmon_path, args.presentmon, state.presentmon_path)
+    timer.mark("resolve", "cached" if pm_exe == state.presentmon_path else "probed")
 
     print(f"[HD2] Starting PresentMon: {pm_exe}")
     pm = start_presentmon(pm_exe, cfg)
+    timer.mark("presentmon")
 
-    ema = Ema(cfg.ema_alpha)
-    last_write = 0.0
-    prev_rate: Optional[float] = None
+    metrics, export = open_metrics(cfg)
+    ctrl = RateController(cfg, metrics)
+    if warm:
+        ctrl.seed(*warm)
+    state.game_exe_name = cfg.game_exe_name
+    state.presentmon_path = pm_exe
+    log = open_log(cfg)
+    recorder = open_recorder(cfg)
+    summary = open_summary(cfg)
+    source = open_frame_source(cfg, pm, metrics)
 
     try:
-        for fps in iter_fps_from_presentmon(cfg.csv_path):
-            smoothed = ema.update(fps)
-            # Periodic FPS logging (EMA view of FPS)
-            if cfg.show_fps_log and (time.time() - last_fps_log >= cfg.fps_log_interval_s):
-                if smoothed is None:
-                    print("[FPS] — (no frames yet)")
-                else:
-                    print(f"[FPS] {smoothed:6.1f}")
-                last_fps_log = time.time()
-            now = time.time()
-            if now - last_write >= cfg.update_interval_s:
-                rate = fps_to_rate(smoothed, cfg)
-                write_bridge_value(cfg.bridge_file, rate)
-
-                # ---- Logging logic ----
-                if cfg.verbose_each_update and prev_rate is not None:
-                    direction = "↑ RAISE" if rate > prev_rate else ("↓ LOWER" if rate < prev_rate else "→ HOLD")
-                    print(f"{direction}: {prev_rate:7.1f} → {rate:7.1f}  (FPS {smoothed:6.1f})")
-                elif prev_rate is None:
-                    print(f"INIT:  Rate={rate:7.1f}  (FPS {smoothed:6.1f})")
-                else:
-                    delta = rate - prev_rate
-                    if abs(delta) >= cfg.change_eps:
-                        if delta > 0:
-                            print(f"↑ RAISE: {prev_rate:7.1f} → {rate:7.1f}  (FPS {smoothed:6.1f})")
-                        else:
-                            print(f"↓ LOWER: {prev_rate:7.1f} → {rate:7.1f}  (FPS {smoothed:6.1f})")
-                    # else: small jitter, stay quiet
-
-                prev_rate = rate
-                last_write = now
+        run_frames(cfg, source, ctrl, bridge, log, state, metrics, timer, prev_rate=warm[1] if warm else None,
+                   recorder=recorder, summary=summary)
+        if cfg.capture_source == "pipe":
+            log.info(f"[HD2] PresentMon exited (code {pm.wait()})")
     except KeyboardInterrupt:
         pass
     finally:
@@ -231,7 +552,19 @@ def main(cfg: Config = CONFIG):
             pm.send_signal(signal.SIGTERM)
         except Exception:
             pass
-
+        source.close()
+        if state.last_rate is not None:
+            save_state(cfg.state_path, state)
+        if source.dropped_frames:
+            print(f"[CTRL] fell behind: {source.dropped_frames} stale frames skipped")
+        bridge.close()
+        close_summary(summary, log)
+        log.close()
+        if recorder is not None:
+            recorder.close()
+            print(f"[REC] {recorder.records} records -> {recorder.path}")
+        if export is not None:
+            export.close()
 
 if __name__ == "__main__":
     main()
@@ -1,64 +1,359 @@
 # hd2_firerate_controller_test.py
-# Writes increasing values to the same bridge file used by the controller,
-# so Cheat Engine (via your Lua bridge) should display the new value each tick.
+# Bridge load and consistency tester. Drives the controller's own bridge writer
+# (bridge.make_bridge) at a series of update rates while reader threads or
+# processes poll the bridge the way the CE Lua timer does, and reports per rate:
+#   writer   write attempts, published writes/s, write call time, retried and
+#            failed writes (os.replace hitting a reader that holds the file open
+#            on Windows: write_bridge_file retries once, then the write fails)
+#   readers  polls, values seen, read age (write call -> first poll that sees the
+#            value: mostly the poll interval, not the write's own visibility
+#            delay), unparseable / missing / locked reads, and values going
+#            backwards (a torn or stale read)
+# For push transports (udp / pipe) there is one receiver (bridge_receiver.py),
+# which measures delivery latency (the observed time carried in each packet ->
+# received) and lost packets instead. With --adaptive, text
+# bridge readers are bridge.BridgeFileReader (the Lua timer's change-skipping and
+# idle back-off) and also report how many polls were applied vs skipped.
+# The last line per backend is the highest tested rate with no errors at which
+# the writer kept up: the safe update rate for that backend on this machine.
+#
+#   python hd2_firerate_controller_test.py --bridge file --rates 4 20 100 500 2000
+#   python hd2_firerate_controller_test.py --bridge mmap --readers 4 --reader-mode process --poll-ms 0
+#   python hd2_firerate_controller_test.py --bridge file --adaptive --rates 0.5 4 20 --seconds 10
+#   python hd2_firerate_controller_test.py --smoke      # old CE check: +1000 every second, 10 steps
 
-import time
 import argparse
-from pathlib import Path
+import multiprocessing as mp
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from bridge import (BRIDGE_KINDS, BRIDGE_POLL_MS, DEFAULT_PIPE, DEFAULT_PUSH_ADDR, PUSH_KINDS, BridgeFileReader,
+                    FileBridge, MmapBridgeReader, make_bridge, parse_bridge_text)
+from metrics import LogHistogram
 
 DEFAULT_FILE = r"C:\Users\Public\hd2_fire_rate.txt"
+DEFAULT_RATES = (4.0, 20.0, 100.0, 500.0, 2000.0)
+LUA_POLL_MS = float(BRIDGE_POLL_MS)  # hd2_firerate_bridge.lua bridgeTimer.Interval while values change
+KEPT_UP = 0.95           # achieved/target write rate below this = the writer couldn't keep up
 
-def write_bridge_value(path: str, value: float):
-    p = Path(path)
-    tmp = p.with_suffix(".tmp")
-    with open(tmp, "w", encoding="utf-8") as w:
-        w.write(f"{value:.3f}")
-    # Atomic replace to avoid CE reading partial writes
-    tmp.replace(p)
 
-def read_bridge_value(path: str):
+# -----------------------------
+# Readers (threads or processes)
+# -----------------------------
+@dataclass
+class ReaderResult:
+    polls: int = 0
+    unparseable: int = 0    # empty / partial text: Lua's tonumber() gives nil
+    missing: int = 0        # file absent between unlink and replace
+    locked: int = 0         # PermissionError opening the file (Windows sharing)
+    busy: int = 0           # mmap record stayed mid-write for max_retries
+    backwards: int = 0      # a value older than one already seen
+    skipped: int = 0        # --adaptive: polls that found nothing new (no memory-record write)
+    seen: List[Tuple[float, float]] = field(default_factory=list)  # (value, perf_counter first seen)
+
+
+def _read_file(path: str, res: ReaderResult) -> Optional[float]:
+    # Same steps as the Lua timer: open, read all, close, parse (v2 line or bare number)
     try:
-        with open(path, "r", encoding="utf-8") as r:
-            s = r.read().strip()
-            return float(s)
-    except Exception:
+        with open(path, "r", encoding="utf-8") as f:
+            data = f.read()
+    except FileNotFoundError:
+        res.missing += 1
         return None
+    except PermissionError:
+        res.locked += 1
+        return None
+    parsed = parse_bridge_text(data)
+    if parsed is None:
+        res.unparseable += 1
+        return None
+    return parsed[1]
 
-def main():
-    ap = argparse.ArgumentParser(description="CE bridge smoke test: step value by +step each interval.")
-    ap.add_argument("--file", default=DEFAULT_FILE, help="Bridge file path")
-    ap.add_argument("--start", type=float, default=1000.0, help="Starting value if file unreadable/missing")
-    ap.add_argument("--step", type=float, default=1000.0, help="Increment per tick")
-    ap.add_argument("--interval", type=float, default=1.0, help="Seconds between writes")
-    ap.add_argument("--count", type=int, default=10, help="Number of steps (use 0 for infinite)")
-    args = ap.parse_args()
 
-    # Baseline: use existing file value if valid, else --start
-    current = read_bridge_value(args.file)
-    if current is None:
-        current = float(args.start)
-        write_bridge_value(args.file, current)
-        print(f"[TEST] Initialized bridge to {current:.1f} ({args.file})")
+def poll_reader(kind: str, target: str, poll_s: float, stop, out_q, adaptive: bool = False):
+    """Poll the bridge until stop is set; puts one ReaderResult on out_q."""
+    res = ReaderResult()
+    mm = MmapBridgeReader(target) if kind == "mmap" else None
+    lua = BridgeFileReader(target) if adaptive and kind == "file" else None
+    last = 0.0
+    try:
+        while not stop.is_set():
+            res.polls += 1
+            if lua is not None:
+                value = lua.poll()
+                res.unparseable, res.skipped = lua.unreadable, lua.skipped
+                poll_s = lua.interval_ms / 1000.0
+            elif mm is not None:
+                s = mm.read()
+                value = s.value if s is not None else None
+                if s is None:
+                    res.busy += 1
+            else:
+                value = _read_file(target, res)
+            now = time.perf_counter()
+            if value is not None:
+                if value < last:
+                    res.backwards += 1
+                elif value > last:
+                    res.seen.append((value, now))
+                    last = value
+            if poll_s > 0:
+                time.sleep(poll_s)
+    finally:
+        if mm is not None:
+            mm.close()
+    out_q.put(res)
+
+
+def push_receiver(kind: str, target: str, stop, out_q):
+    """One receiver for udp / pipe: (value, delivery latency) per packet; a value <= 0 ends it."""
+    from bridge_receiver import make_receiver
+    res = ReaderResult()
+    rx = make_receiver(kind, target)
+    out_q.put(None)  # listening
+    last = 0.0
+    try:
+        while not stop.is_set():
+            got = rx.recv(0.1)
+            if got is None:
+                continue
+            sample, now = got
+            if sample.value <= 0:
+                break
+            res.polls += 1
+            if sample.value < last:
+                res.backwards += 1
+            res.seen.append((sample.value, now - sample.observed))
+            last = sample.value
+    finally:
+        rx.close()
+    out_q.put(res)
+
+
+# -----------------------------
+# One rate step
+# -----------------------------
+@dataclass
+class RunResult:
+    kind: str
+    rate_hz: float
+    seconds: float
+    attempts: int = 0       # write() calls
+    writes: int = 0         # values published
+    retries: int = 0        # os.replace retried after a PermissionError (reader contention, text bridge)
+    failed_writes: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    write_time: LogHistogram = field(default_factory=LogHistogram)
+    read_age: LogHistogram = field(default_factory=LogHistogram)   # polling readers: write call -> first seen
+    latency: LogHistogram = field(default_factory=LogHistogram)    # push receiver: observed -> received
+    readers: List[ReaderResult] = field(default_factory=list)
+    values_seen: int = 0
+
+    @property
+    def achieved_hz(self) -> float:
+        return self.writes / self.seconds if self.seconds else 0.0
+
+    @property
+    def bad_reads(self) -> int:
+        return sum(r.unparseable + r.missing + r.locked + r.busy + r.backwards for r in self.readers)
+
+    @property
+    def ok(self) -> bool:
+        return (self.failed_writes == 0 and self.retries == 0 and self.bad_reads == 0
+                and self.achieved_hz >= KEPT_UP * self.rate_hz)
+
+
+def run_rate(kind: str, target: str, rate_hz: float, seconds: float, readers: int, mode: str,
+             poll_s: float, first_value: float, adaptive: bool = False) -> RunResult:
+    res = RunResult(kind, rate_hz, seconds)
+    push = kind in PUSH_KINDS
+    if mode == "process":
+        stop, out_q = mp.Event(), mp.Queue()
+        spawn = lambda fn, args: mp.Process(target=fn, args=args, daemon=True)  # noqa: E731
     else:
-        print(f"[TEST] Starting from existing bridge value {current:.1f} ({args.file})")
+        stop, out_q = threading.Event(), queue.Queue()
+        spawn = lambda fn, args: threading.Thread(target=fn, args=args, daemon=True)  # noqa: E731
 
-    steps_done = 0
+    bridge = make_bridge(kind, target)
+    if push:
+        workers = [spawn(push_receiver, (kind, target, stop, out_q))]
+        workers[0].start()
+        out_q.get(timeout=10.0)
+    else:
+        bridge.write(first_value - 1)   # readers start from a valid bridge
+        workers = [spawn(poll_reader, (kind, target, poll_s, stop, out_q, adaptive)) for _ in range(readers)]
+        for w in workers:
+            w.start()
+        time.sleep(0.05)
+
+    written: Dict[float, float] = {}
+    period = 1.0 / rate_hz
+    value = first_value
+    t0 = time.perf_counter()
+    deadline = t0
+    end = t0 + seconds
     try:
         while True:
-            time.sleep(args.interval)
-            next_val = current + args.step
-            write_bridge_value(args.file, next_val)
+            now = time.perf_counter()
+            if now >= end:
+                break
+            if deadline > now:
+                time.sleep(deadline - now)
+            deadline += period
+            start = time.perf_counter()
+            res.attempts += 1
+            try:
+                published = bridge.write(value, start)
+            except OSError as e:
+                res.failed_writes += 1
+                name = type(e).__name__
+                res.errors[name] = res.errors.get(name, 0) + 1
+            else:
+                if published:
+                    written[value] = start
+                    res.writes += 1
+            res.write_time.add(time.perf_counter() - start)
+            value += 1.0
+        res.seconds = time.perf_counter() - t0
+        res.retries = getattr(bridge, "retries", 0)
+        if push:
+            time.sleep(0.1)       # let the last packets land
+            bridge.write(0.0)     # wakes and ends a receiver blocked in recv()
+    finally:
+        stop.set()
+        res.readers = [out_q.get(timeout=10.0) for _ in workers]
+        for w in workers:
+            w.join(timeout=2.0)
+        bridge.close()
+
+    seen = set()
+    for r in res.readers:
+        for v, t in r.seen:
+            if push:
+                res.latency.add(t)     # receiver already measured observed -> received
+            elif v in written:
+                res.read_age.add(t - written[v])
+            seen.add(v)
+    res.values_seen = len(seen & written.keys())
+    return res
+
+
+def print_run(res: RunResult, readers: int, mode: str, poll_s: float, adaptive: bool = False):
+    w = res.write_time.summary(1000.0)
+    errs = "".join(f" {k}={v}" for k, v in res.errors.items())
+    print(f"[{res.kind} @ {res.rate_hz:g} Hz] attempts {res.attempts}  writes {res.writes} ({res.achieved_hz:.0f}/s)  "
+          f"write p50 {w['p50']:.3f} ms  p99 {w['p99']:.3f} ms  max {w['max']:.2f} ms  "
+          f"retried {res.retries}  failed {res.failed_writes}{errs}")
+    polls = sum(r.polls for r in res.readers)
+    if res.kind in PUSH_KINDS:
+        lat = res.latency.summary(1000.0)
+        print(f"    receiver: got {res.values_seen}/{res.writes}  lost {res.writes - res.values_seen}  "
+              f"latency p50 {lat['p50']:.3f} ms  p99 {lat['p99']:.3f} ms  max {lat['max']:.2f} ms  "
+              f"backwards {sum(r.backwards for r in res.readers)}")
+    else:
+        bad = {k: sum(getattr(r, k) for r in res.readers) for k in ("unparseable", "missing", "locked", "busy",
+                                                                    "backwards")}
+        poll = "adaptive" if adaptive else f"{1000 * poll_s:g} ms"
+        age = res.read_age.summary(1000.0)
+        bad["skipped"] = sum(r.skipped for r in res.readers)
+        print(f"    {readers} {mode} readers, poll {poll}: {polls} polls, "
+              f"saw {res.values_seen}/{res.writes} values  read age p50 {age['p50']:.3f} ms  p99 {age['p99']:.3f} ms  "
+              f"max {age['max']:.2f} ms  " + "  ".join(f"{k} {v}" for k, v in bad.items()))
+
+
+# -----------------------------
+# Smoke test (the original tool)
+# -----------------------------
+def read_bridge_value(path: str) -> Optional[float]:
+    try:
+        with open(path, "r", encoding="utf-8") as r:
+            parsed = parse_bridge_text(r.read().strip())
+    except OSError:
+        return None
+    return parsed[1] if parsed is not None else None
 
-            direction = "↑ RAISE"
-            print(f"[TEST] {direction}: {current:7.1f} → {next_val:7.1f}")
 
+def smoke(path: str, start: float, step: float, interval: float, count: int):
+    """Step the text bridge by +step each interval so CE visibly picks up each value."""
+    current = read_bridge_value(path)
+    bridge = FileBridge(path)
+    if current is None:
+        current = float(start)
+        bridge.write(current)
+        print(f"[TEST] Initialized bridge to {current:.1f} ({path})")
+    else:
+        print(f"[TEST] Starting from existing bridge value {current:.1f} ({path})")
+    steps_done = 0
+    try:
+        while True:
+            time.sleep(interval)
+            next_val = current + step
+            bridge.write(next_val)
+            print(f"[TEST] ↑ RAISE: {current:7.1f} → {next_val:7.1f}")
             current = next_val
             steps_done += 1
-            if args.count and steps_done >= args.count:
+            if count and steps_done >= count:
                 print("[TEST] Done.")
                 break
     except KeyboardInterrupt:
         print("\n[TEST] Stopped by user.")
 
+
+def main():
+    ap = argparse.ArgumentParser(description="Bridge load / consistency test (or --smoke for the CE step test).")
+    ap.add_argument("--bridge", nargs="+", choices=sorted(BRIDGE_KINDS), default=["file"],
+                    help="Backends to test, one after another")
+    ap.add_argument("--target", default=None,
+                    help="Bridge path / host:port (default: a temp file, or the push defaults)")
+    ap.add_argument("--rates", nargs="+", type=float, default=list(DEFAULT_RATES), help="Write rates (Hz) to step through")
+    ap.add_argument("--seconds", type=float, default=2.0, help="Duration per rate")
+    ap.add_argument("--readers", type=int, default=3, help="Polling readers (file / mmap)")
+    ap.add_argument("--reader-mode", choices=("thread", "process"), default="thread")
+    ap.add_argument("--poll-ms", type=float, default=LUA_POLL_MS,
+                    help=f"Reader poll interval (default {LUA_POLL_MS:g}, the Lua timer's; 0 = busy poll)")
+    ap.add_argument("--adaptive", action="store_true",
+                    help="Text bridge readers behave like the Lua timer (skip unchanged, back off while idle)")
+    ap.add_argument("--smoke", action="store_true", help="Original CE smoke test on --file instead")
+    ap.add_argument("--file", default=DEFAULT_FILE, help="--smoke: bridge file path")
+    ap.add_argument("--start", type=float, default=1000.0, help="--smoke: starting value if file unreadable/missing")
+    ap.add_argument("--step", type=float, default=1000.0, help="--smoke: increment per tick")
+    ap.add_argument("--interval", type=float, default=1.0, help="--smoke: seconds between writes")
+    ap.add_argument("--count", type=int, default=10, help="--smoke: number of steps (0 = infinite)")
+    args = ap.parse_args()
+
+    if args.smoke:
+        smoke(args.file, args.start, args.step, args.interval, args.count)
+        return
+
+    poll_s = args.poll_ms / 1000.0
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in args.bridge:
+            target = args.target or {"udp": DEFAULT_PUSH_ADDR, "pipe": DEFAULT_PIPE}.get(
+                kind, os.path.join(tmp, f"bridge.{kind}"))
+            safe = None
+            value = 1000.0
+            for rate in args.rates:
+                res = run_rate(kind, target, rate, args.seconds, args.readers, args.reader_mode, poll_s, value,
+                               args.adaptive)
+                value += res.attempts + 2
+                print_run(res, args.readers, args.reader_mode, poll_s, args.adaptive)
+                if res.ok:
+                    safe = rate
+                else:
+                    failed = failed or res.failed_writes > 0 or res.retries > 0 or res.bad_reads > 0
+            verdict = f"safe up to {safe:g} Hz" if safe is not None else "no tested rate was clean"
+            print(f"[BRIDGE] {kind}: {verdict} (clean reads/writes, no retries and >= {KEPT_UP:.0%} of the target rate)\n")
+    raise SystemExit(1 if failed else 0)
+
+
 if __name__ == "__main__":
+    if sys.platform == "win32":
+        mp.freeze_support()
     main()
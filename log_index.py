@@ -0,0 +1,330 @@
+# log_index.py
+# SQLite index over a FrameView benchmark folder (BENCHMARK_DIR) and session
+# recordings, so comparing sessions is a query instead of re-reading CSVs.
+#
+# A scan walks the folder for
+#   FrameView_<app>_<timestamp>_Log.csv   per-frame logs  -> one `sessions` row each
+#   *.hd2rec                              session_record segments -> one `sessions` row each,
+#                                         with the fire rate the controller chose
+#   FrameView_Summary.csv                 -> `summary` rows: GPU / CPU / driver / OS / RAM per log
+# and only opens files whose size or mtime_ns differ from the `files` table
+# (frame_cache keys its sidecars the same way), so a rescan of an unchanged
+# archive is a few stat() calls. New and changed logs are parsed in parallel
+# worker processes (session_stats.SessionStats: exact avg/min/max, sketch 1% and
+# 0.1% lows); only the main process writes to the database.
+#
+# `session_info` joins each session to its summary row (by log file name), and
+# `hd2_sessions` pairs every helldivers2.exe FrameView log with the recordings
+# that overlap it in time, for fire rate vs FPS.
+#
+#   python log_index.py "C:\Users\Gaming\Documents\FrameView" C:\Users\Public\hd2_sessions
+#   python log_index.py DIR --report driver          # 1% low by driver version
+#   python log_index.py DIR --report firerate        # fire rate vs FPS, HD2 sessions
+#   python log_index.py DIR --sql "SELECT application, COUNT(*) FROM sessions GROUP BY 1"
+
+import argparse
+import csv
+import glob
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+DB_NAME = "log_index.sqlite"
+SCHEMA_VERSION = 1
+LOG_GLOB = "FrameView_*_Log.csv"
+SUMMARY_NAME = "FrameView_Summary.csv"
+REC_GLOB = "*.hd2rec"
+COMMIT_EVERY = 64   # parsed files per transaction: a killed scan keeps what it finished
+_LOG_NAME = re.compile(r"^FrameView_(?P<app>.+)_(?P<ts>\d{4}_\d{2}_\d{2}T\d{6})_Log\.csv$", re.IGNORECASE)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, kind TEXT, size INTEGER, mtime_ns INTEGER, indexed_at REAL);
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY, kind TEXT, log_name TEXT, application TEXT, session TEXT,
+    started REAL, ended REAL, frames INTEGER, duration_s REAL,
+    avg_fps REAL, low_1pct REAL, low_01pct REAL, min_fps REAL, max_fps REAL,
+    present_latency_ms REAL, fire_rate_mean REAL, fire_rate_min REAL, fire_rate_max REAL, writes INTEGER);
+CREATE INDEX IF NOT EXISTS sessions_app ON sessions (application, started);
+CREATE INDEX IF NOT EXISTS sessions_log ON sessions (log_name);
+CREATE TABLE IF NOT EXISTS summary (
+    log_name TEXT PRIMARY KEY, timestamp TEXT, application TEXT, gpu TEXT, cpu TEXT, resolution TEXT,
+    runtime TEXT, os TEXT, driver TEXT, driver_package TEXT, ram TEXT, motherboard TEXT,
+    fv_avg_fps REAL, fv_low_1pct REAL, fv_low_01pct REAL);
+CREATE VIEW IF NOT EXISTS session_info AS
+    SELECT s.*, m.gpu, m.cpu, m.resolution, m.runtime, m.os, m.driver, m.driver_package, m.ram, m.motherboard
+    FROM sessions s LEFT JOIN summary m ON m.log_name = s.log_name;
+CREATE VIEW IF NOT EXISTS hd2_sessions AS
+    SELECT f.*,
+           (SELECT SUM(r.fire_rate_mean * r.duration_s) / SUM(r.duration_s) FROM sessions r
+             WHERE r.kind = 'hd2rec' AND r.fire_rate_mean IS NOT NULL AND r.duration_s > 0
+               AND r.started < f.ended AND r.ended > f.started) AS recorded_fire_rate
+    FROM session_info f WHERE f.kind = 'frameview' AND f.application = 'helldivers2.exe';
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+# FrameView_Summary.csv column -> summary column (text)
+SUMMARY_TEXT = {"TimeStamp": "timestamp", "Application": "application", "GPU0": "gpu", "CPU": "cpu",
+                "Resolution": "resolution", "Runtime": "runtime", "OS": "os", "GPU Base Driver": "driver",
+                "GPU Driver Package": "driver_package", "System RAM": "ram", "Motherboard": "motherboard"}
+SUMMARY_REAL = {"Avg FPS": "fv_avg_fps", "1% Low": "fv_low_1pct", "0.1% Low FPS": "fv_low_01pct"}
+
+REPORTS = {
+    "sessions": """
+        SELECT application, log_name, datetime(started, 'unixepoch', 'localtime') AS started,
+               frames, ROUND(duration_s, 1) AS secs, ROUND(avg_fps, 1) AS avg_fps,
+               ROUND(low_1pct, 1) AS low_1pct, ROUND(low_01pct, 1) AS low_01pct, ROUND(fire_rate_mean) AS fire_rate
+        FROM sessions ORDER BY started""",
+    "driver": """
+        SELECT application, driver, COUNT(*) AS sessions, SUM(frames) AS frames,
+               ROUND(SUM(avg_fps * frames) / SUM(frames), 1) AS avg_fps,
+               ROUND(AVG(low_1pct), 1) AS low_1pct, ROUND(MIN(low_1pct), 1) AS worst_1pct,
+               ROUND(AVG(low_01pct), 1) AS low_01pct
+        FROM session_info WHERE kind = 'frameview' AND frames > 0
+        GROUP BY application, driver ORDER BY application, driver""",
+    "firerate": """
+        SELECT log_name AS session, datetime(started, 'unixepoch', 'localtime') AS started,
+               ROUND(avg_fps, 1) AS avg_fps, ROUND(low_1pct, 1) AS low_1pct,
+               ROUND(COALESCE(fire_rate_mean, recorded_fire_rate)) AS fire_rate, driver
+        FROM (SELECT *, NULL AS recorded_fire_rate FROM session_info
+               WHERE kind = 'hd2rec' AND fire_rate_mean IS NOT NULL
+              UNION ALL SELECT * FROM hd2_sessions)
+        ORDER BY avg_fps""",
+}
+
+
+def _real(s: Optional[str]) -> Optional[float]:
+    try:
+        v = float(s)
+    except (TypeError, ValueError):
+        return None
+    return v if v == v else None
+
+
+def log_start_time(path: str) -> Optional[float]:
+    """Local start time encoded in a FrameView log name (FrameView_<app>_YYYY_MM_DDTHHMMSS_Log.csv)."""
+    m = _LOG_NAME.match(os.path.basename(path))
+    if not m:
+        return None
+    return time.mktime(time.strptime(m.group("ts"), "%Y_%m_%dT%H%M%S"))
+
+
+# -----------------------------
+# Parsing (worker processes)
+# -----------------------------
+def _stats_row(path: str, kind: str, st) -> dict:
+    f = st.fps()
+    return {"path": path, "kind": kind, "log_name": os.path.basename(path), "application": st.application,
+            "session": None, "started": st.started, "ended": st.ended, "frames": st.count,
+            "duration_s": st.frames.total, "avg_fps": f.get("avg"), "low_1pct": f.get("low_1pct"),
+            "low_01pct": f.get("low_01pct"), "min_fps": f.get("min"), "max_fps": f.get("max"),
+            "present_latency_ms": st.latency.mean * 1000.0 if st.latency.count else None,
+            "fire_rate_mean": None, "fire_rate_min": None, "fire_rate_max": None, "writes": None}
+
+
+def parse_frame_log(path: str, sidecar: bool = False) -> dict:
+    from session_stats import summarize_log
+    m = _LOG_NAME.match(os.path.basename(path))
+    st = summarize_log(path, sidecar=sidecar)
+    if m:
+        st.application = m.group("app")
+    started = log_start_time(path)
+    if started is not None:
+        st.started = started
+    return _stats_row(path, "frameview", st)
+
+
+def parse_recording(path: str) -> dict:
+    from session_record import FRAME, TICK, WRITE, iter_records, read_meta
+    from session_stats import SessionStats
+    meta = read_meta(path)
+    started = meta.get("started", os.path.getmtime(path))
+    st = SessionStats(meta.get("game", "unknown"), started)
+    ms: List[float] = []
+    rates: List[float] = []
+    writes = 0
+    span = 0.0
+    for kind, _flags, _n, a, t, b in iter_records(path):
+        if kind == FRAME:
+            ms.append(a)
+            if len(ms) >= 8192:
+                st.add(ms)
+                ms = []
+        elif kind == TICK:
+            rates.append(b)   # ticks are evenly spaced (update_interval_s): a plain mean is time-weighted
+        elif kind == WRITE:
+            writes += 1
+        span = max(span, t)
+    st.add(ms)
+    row = _stats_row(path, "hd2rec", st)
+    row.update(session=meta.get("session"), started=started, ended=started + span, writes=writes)
+    if rates:
+        row.update(fire_rate_mean=sum(rates) / len(rates), fire_rate_min=min(rates), fire_rate_max=max(rates))
+    return row
+
+
+def parse_file(args) -> dict:
+    """Worker entry point: a sessions row, or {'path', 'error'} so one bad file doesn't end the scan."""
+    path, sidecar = args
+    try:
+        if path.endswith(".hd2rec"):
+            return parse_recording(path)
+        return parse_frame_log(path, sidecar)
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def read_summary(path: str) -> List[dict]:
+    """FrameView_Summary.csv rows as `summary` table rows (text cells stripped, NA -> NULL)."""
+    rows = []
+    with open(path, "r", newline="", encoding="utf-8", errors="replace") as f:
+        for rec in csv.DictReader(f):
+            name = (rec.get("Log Name") or "").strip()
+            if not name:
+                continue
+            row = {"log_name": name}
+            for src, dst in SUMMARY_TEXT.items():
+                v = (rec.get(src) or "").strip()
+                row[dst] = None if v in ("", "NA") else v
+            for src, dst in SUMMARY_REAL.items():
+                row[dst] = _real(rec.get(src))
+            rows.append(row)
+    return rows
+
+
+# -----------------------------
+# Index
+# -----------------------------
+def open_index(db_path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+def _upsert(con: sqlite3.Connection, table: str, row: dict):
+    cols = ", ".join(row)
+    marks = ", ".join("?" * len(row))
+    con.execute(f"INSERT OR REPLACE INTO {table} ({cols}) VALUES ({marks})", list(row.values()))
+
+
+def _mark(con: sqlite3.Connection, path: str, kind: str, key):
+    con.execute("INSERT OR REPLACE INTO files (path, kind, size, mtime_ns, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (path, kind, key[0], key[1], time.time()))
+
+
+def find_files(folders: Sequence[str]) -> Dict[str, str]:
+    """abs path -> kind ('frameview' / 'hd2rec' / 'summary') for every indexable file in the folders."""
+    found: Dict[str, str] = {}
+    for d in folders:
+        for pattern, kind in ((LOG_GLOB, "frameview"), (REC_GLOB, "hd2rec"), (SUMMARY_NAME, "summary")):
+            for p in glob.glob(os.path.join(d, pattern)):
+                found[os.path.abspath(p)] = kind
+    return found
+
+
+def scan(con: sqlite3.Connection, folders: Sequence[str], workers: Optional[int] = None,
+         sidecar: bool = False, prune: bool = False) -> dict:
+    """Index new / changed files. Returns counts: seen, unchanged, parsed, failed, pruned."""
+    known = {p: (s, m) for p, s, m in con.execute("SELECT path, size, mtime_ns FROM files")}
+    found = find_files(folders)
+    todo: List[str] = []
+    summaries: List[str] = []
+    keys = {}
+    for path, kind in sorted(found.items()):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        keys[path] = (st.st_size, st.st_mtime_ns)
+        if known.get(path) == keys[path]:
+            continue
+        (summaries if kind == "summary" else todo).append(path)
+    counts = {"seen": len(found), "unchanged": len(found) - len(todo) - len(summaries),
+              "parsed": 0, "failed": 0, "pruned": 0}
+
+    with con:
+        for path in summaries:
+            for row in read_summary(path):
+                _upsert(con, "summary", row)
+            _mark(con, path, "summary", keys[path])
+            counts["parsed"] += 1
+
+    def store(results):
+        n = 0
+        for row in results:
+            if "error" in row:
+                print(f"[INDEX] skipped {os.path.basename(row['path'])}: {row['error']}")
+                counts["failed"] += 1
+                continue
+            _upsert(con, "sessions", row)
+            _mark(con, row["path"], row["kind"], keys[row["path"]])
+            counts["parsed"] += 1
+            n += 1
+            if n % COMMIT_EVERY == 0:
+                con.commit()
+        con.commit()
+
+    jobs = [(p, sidecar) for p in todo]
+    if workers == 1 or len(jobs) <= 1:
+        store(map(parse_file, jobs))
+    elif jobs:
+        with ProcessPoolExecutor(workers) as pool:
+            store(pool.map(parse_file, jobs))
+
+    if prune:
+        gone = [p for p in known if p not in found]
+        with con:
+            for p in gone:
+                con.execute("DELETE FROM files WHERE path = ?", (p,))
+                con.execute("DELETE FROM sessions WHERE path = ?", (p,))
+        counts["pruned"] = len(gone)
+    return counts
+
+
+def print_query(con: sqlite3.Connection, sql: str):
+    t0 = time.perf_counter()
+    cur = con.execute(sql)
+    names = [d[0] for d in cur.description or ()]
+    rows = [["" if v is None else str(v) for v in r] for r in cur.fetchall()]
+    ms = 1000.0 * (time.perf_counter() - t0)
+    widths = [max([len(n)] + [len(r[i]) for r in rows]) for i, n in enumerate(names)]
+    print("  ".join(n.ljust(w) for n, w in zip(names, widths)))
+    for r in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+    print(f"[INDEX] {len(rows)} rows in {ms:.2f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Index FrameView logs and session recordings into SQLite.")
+    ap.add_argument("folders", nargs="+", help="BENCHMARK_DIR and/or recording folders")
+    ap.add_argument("--db", default=None, help=f"Index database (default: <first folder>/{DB_NAME})")
+    ap.add_argument("--workers", type=int, default=None, help="Parser processes (default: all cores)")
+    ap.add_argument("--sidecar", action="store_true",
+                    help="Parse through frame_cache sidecars (faster later analysis, ~8 bytes/cell on disk)")
+    ap.add_argument("--prune", action="store_true", help="Forget files that are no longer on disk")
+    ap.add_argument("--no-scan", action="store_true", help="Query the index as it is")
+    ap.add_argument("--report", choices=sorted(REPORTS), default=None)
+    ap.add_argument("--sql", default=None, help="Run this query against the index")
+    args = ap.parse_args()
+
+    con = open_index(args.db or os.path.join(args.folders[0], DB_NAME))
+    try:
+        if not args.no_scan:
+            t0 = time.perf_counter()
+            c = scan(con, args.folders, args.workers, args.sidecar, args.prune)
+            print(f"[INDEX] {c['seen']} files: {c['unchanged']} unchanged, {c['parsed']} indexed, "
+                  f"{c['failed']} failed, {c['pruned']} pruned in {time.perf_counter() - t0:.2f}s")
+        if args.report:
+            print_query(con, REPORTS[args.report])
+        if args.sql:
+            print_query(con, args.sql)
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
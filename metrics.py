@@ -0,0 +1,264 @@
+# metrics.py
+# Constant-memory latency histograms and a tiny local metrics endpoint.
+#
+# Each pipeline stage (append detection, read, parse, FrameSource queue wait,
+# smoothing, fps_to_rate, bridge write) feeds a LogHistogram: fixed log-spaced
+# buckets (~4.4% wide), so memory is the same after a minute or a week and two
+# histograms merge by adding counts. Gauges hold the latest FPS / rate / backlog / CPU%.
+#
+# Exposed either way (or both):
+#   MetricsServer -> http://127.0.0.1:<port>/metrics  (Prometheus text format)
+#                    http://127.0.0.1:<port>/stats    (JSON)
+#   StatsFileWriter -> rewrites a JSON stats file every interval (temp + os.replace)
+
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+
+# -----------------------------
+# Histogram
+# -----------------------------
+HIST_MIN = 1e-7          # 100 ns; smaller values land in bucket 0
+HIST_MAX = 1e3           # larger values land in the last bucket
+HIST_GROWTH = 2 ** (1 / 16)
+_LOG_GROWTH = math.log(HIST_GROWTH)
+HIST_BUCKETS = int(math.ceil(math.log(HIST_MAX / HIST_MIN) / _LOG_GROWTH)) + 1
+
+
+class LogHistogram:
+    """Log-bucketed histogram of positive values. Quantiles are within one bucket (~4.4%)."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * HIST_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @staticmethod
+    def bucket(value: float) -> int:
+        if value <= HIST_MIN:
+            return 0
+        return min(HIST_BUCKETS - 1, int(math.log(value / HIST_MIN) / _LOG_GROWTH) + 1)
+
+    def add(self, value: float, n: int = 1):
+        self.counts[self.bucket(value)] += n
+        self.count += n
+        self.total += value * n
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def extend(self, values: Iterable[float]):
+        for v in values:
+            self.add(v)
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..1): geometric middle of the bucket holding it, clamped to min/max."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen > rank:
+                if i == 0:
+                    v = HIST_MIN
+                else:
+                    v = HIST_MIN * HIST_GROWTH ** (i - 0.5)
+                return max(self.min, min(self.max, v))
+        return self.max
+
+    def summary(self, scale: float = 1.0) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean * scale,
+            "p50": self.quantile(0.50) * scale,
+            "p90": self.quantile(0.90) * scale,
+            "p99": self.quantile(0.99) * scale,
+            "max": (self.max if self.count else 0.0) * scale,
+        }
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+STAGES = ("detect", "read", "parse", "queue", "smooth", "map", "bridge", "loop")
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Metrics:
+    """Stage histograms (seconds) + gauges + counters for one controller process."""
+
+    def __init__(self, stages: Iterable[str] = STAGES):
+        self.stages: Dict[str, LogHistogram] = {s: LogHistogram() for s in stages}
+        self.gauges: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.time()
+        self._cpu_mark = (time.perf_counter(), time.process_time())
+
+    def observe(self, stage: str, seconds: float):
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages[stage] = LogHistogram()
+        h.add(seconds)
+
+    def set(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def inc(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def sample_cpu(self) -> float:
+        """Process CPU% (all threads, 100 = one core) since the previous sample."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        wall0, cpu0 = self._cpu_mark
+        self._cpu_mark = (wall, cpu)
+        pct = 100.0 * (cpu - cpu0) / (wall - wall0) if wall > wall0 else 0.0
+        self.gauges["cpu_percent"] = pct
+        return pct
+
+    def snapshot(self) -> dict:
+        return {
+            "time": time.time(),
+            "uptime_s": time.time() - self.started,
+            "gauges": dict(self.gauges),
+            "counters": dict(self.counters),
+            "stages_ms": {name: h.summary(1000.0) for name, h in self.stages.items()},
+        }
+
+    def prometheus(self, prefix: str = "hd2") -> str:
+        out = []
+        for name, value in sorted(self.gauges.items()):
+            out.append(f"# TYPE {prefix}_{name} gauge")
+            out.append(f"{prefix}_{name} {value:.6g}")
+        for name, value in sorted(self.counters.items()):
+            out.append(f"# TYPE {prefix}_{name}_total counter")
+            out.append(f"{prefix}_{name}_total {value}")
+        metric = f"{prefix}_stage_seconds"
+        out.append(f"# TYPE {metric} summary")
+        for stage, h in self.stages.items():
+            for q in QUANTILES:
+                out.append(f'{metric}{{stage="{stage}",quantile="{q:g}"}} {h.quantile(q):.9g}')
+            out.append(f'{metric}_sum{{stage="{stage}"}} {h.total:.9g}')
+            out.append(f'{metric}_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(out) + "\n"
+
+
+# -----------------------------
+# Exporters
+# -----------------------------
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /stats (JSON) on a daemon thread."""
+
+    def __init__(self, metrics: Metrics, port: int, host: str = "127.0.0.1"):
+        m = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                m.sample_cpu()
+                if self.path.startswith("/metrics"):
+                    body, ctype = m.prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path.startswith("/stats"):
+                    body, ctype = json.dumps(m.snapshot(), indent=1).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep the console for the controller
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class StatsFileWriter:
+    """Rewrites a JSON stats file every `interval_s` on a daemon thread."""
+
+    def __init__(self, metrics: Metrics, path: str, interval_s: float = 2.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def write(self):
+        self.metrics.sample_cpu()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as w:
+            json.dump(self.metrics.snapshot(), w, indent=1)
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.write()
+            except OSError:
+                pass  # stats are best-effort; next interval retries
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+class MetricsExport:
+    """Whichever exporters the config asks for, closed together."""
+
+    def __init__(self, metrics: Metrics, port: int = 0, path: Optional[str] = None, interval_s: float = 2.0):
+        self.server = MetricsServer(metrics, port) if port else None
+        self.writer = StatsFileWriter(metrics, path, interval_s) if path else None
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def format_stage_table(metrics: Metrics) -> str:
+    lines = [f"  {'stage':<8s} {'count':>8s} {'mean':>9s} {'p50':>9s} {'p90':>9s} {'p99':>9s} {'max':>9s}  (ms)"]
+    for name, h in metrics.stages.items():
+        if not h.count:
+            continue
+        s = h.summary(1000.0)
+        lines.append(f"  {name:<8s} {s['count']:>8d} {s['mean']:>9.3f} {s['p50']:>9.3f} {s['p90']:>9.3f} "
+                     f"{s['p99']:>9.3f} {s['max']:>9.3f}")
+    return "\n".join(lines)
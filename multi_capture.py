@@ -0,0 +1,169 @@
+# multi_capture.py
+# One PresentMon session, several target processes.
+# PresentMon is started once with a -process_name per target (Config.game_exe_name
+# plus Config.extra_exe_names); every read of the shared CSV is split by the
+# Application / ProcessID columns and each target gets its own RateController
+# and its own bridge output:
+#   game_exe_name        -> the normal bridge target (what the Lua bridge reads)
+#   other targets        -> hd2_fire_rate.<stem>.txt / .bin, pipe.<stem>, udp port + n
+#
+# One live process per target app owns its channel. When a different PID of the
+# same app shows up (the app restarted) it takes over once the old PID has been
+# silent for HANDOVER_S, with fresh controller state.
+#
+#   python hd2_firerate_controller.py --also chrome.exe Code.exe
+
+import os
+import re
+import signal
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bridge import PUSH_KINDS, Bridge
+from ctrl_log import ControlLog
+from frame_tail import ProcessKey
+from hd2_firerate_controller import (Config, RateController, Tick, bridge_target, capture_targets, open_bridge,
+                                     open_capture, open_log, open_metrics, start_presentmon, timed_write)
+
+HANDOVER_S = 2.0      # silence after which another PID of the same app takes the channel over
+IDLE_CLOSE_S = 30.0   # channels silent this long are closed (bridge released)
+
+
+def _gauge_suffix(app: str) -> str:
+    return re.sub(r"[^a-z0-9_]", "_", os.path.splitext(app)[0].lower())
+
+
+class ProcessChannel:
+    """Controller state and bridge for one captured process."""
+
+    def __init__(self, key: ProcessKey, cfg: Config, bridge: Bridge, metrics=None):
+        self.key = key
+        self.app, self.pid = key
+        self.bridge = bridge
+        self.ctrl = RateController(cfg, metrics)
+        self.prev_rate: Optional[float] = None
+        self.last_seen = 0.0
+        self.last_fps_log = 0.0
+
+    def close(self):
+        self.bridge.close()
+
+
+class MultiController:
+    def __init__(self, cfg: Config, log: ControlLog, metrics=None):
+        self.cfg = cfg
+        self.log = log
+        self.metrics = metrics
+        self.targets = {name.lower(): i for i, name in enumerate(capture_targets(cfg))}
+        self.channels: Dict[str, ProcessChannel] = {}   # app (lower) -> live channel
+        self.ignored_frames = 0
+
+    def _open(self, key: ProcessKey) -> ProcessChannel:
+        app = key[0]
+        index = self.targets[app.lower()]
+        bridge = open_bridge(self.cfg, app, index)
+        ch = ProcessChannel(key, self.cfg, bridge, self.metrics)
+        init_rate = max(min(self.cfg.base_rate, self.cfg.max_rate), self.cfg.min_rate)
+        bridge.write(init_rate)
+        self.log.info(f"[{app}] pid {key[1]} → {bridge.kind} {bridge_target(self.cfg, app, index)} "
+                      f"(bootstrap {init_rate:.1f})")
+        return ch
+
+    def channel(self, key: ProcessKey, now: float) -> Optional[ProcessChannel]:
+        app = key[0].lower()
+        if app not in self.targets:
+            return None
+        ch = self.channels.get(app)
+        if ch is not None and ch.key == key:
+            return ch
+        if ch is not None:
+            if now - ch.last_seen < HANDOVER_S:
+                return None  # another instance is still presenting; the first one keeps the bridge
+            self.log.info(f"[{key[0]}] pid {ch.pid} → {key[1]}: new process, resetting controller")
+            ch.close()
+        ch = self.channels[app] = self._open(key)
+        return ch
+
+    def feed(self, batches: Dict[ProcessKey, Tuple[List[float], int]], now: float) -> List[Tuple[ProcessChannel, Tick]]:
+        """Push one read's worth of rows; returns the (channel, tick) pairs that are due."""
+        due = []
+        for key, (ms_batch, dropped) in batches.items():
+            ch = self.channel(key, now)
+            if ch is None:
+                self.ignored_frames += len(ms_batch)
+                continue
+            ch.last_seen = now
+            ch.ctrl.push(ms_batch, dropped)
+            if ch.ctrl.due(now):
+                t = ch.ctrl.tick(now)
+                if t is not None:
+                    due.append((ch, t))
+        return due
+
+    def reap(self, now: float):
+        for app, ch in list(self.channels.items()):
+            if now - ch.last_seen >= IDLE_CLOSE_S:
+                self.log.info(f"[{ch.app}] pid {ch.pid} idle for {IDLE_CLOSE_S:.0f}s, channel closed")
+                ch.close()
+                del self.channels[app]
+
+    def close(self):
+        for ch in self.channels.values():
+            ch.close()
+        self.channels.clear()
+
+
+def run_multi(cfg: Config, presentmon_exe: str):
+    """Loop runtime for a multi-target capture (one PresentMon, one tail, N controllers)."""
+    metrics, export = open_metrics(cfg)
+    log = open_log(cfg)
+    multi = MultiController(cfg, log, metrics)
+    print(f"[HD2] Starting PresentMon for {', '.join(capture_targets(cfg))}: {presentmon_exe}")
+    pm = start_presentmon(presentmon_exe, cfg)
+    push_each_frame = cfg.push_every_frame and cfg.bridge_kind in PUSH_KINDS
+    last_reap = time.time()
+    source, tee = open_capture(cfg, pm, metrics)
+    try:
+        for batches in source:
+            observed = time.perf_counter()
+            now = time.time()
+            for ch, t in multi.feed(batches, now):
+                timed_write(ch.bridge, metrics, t.rate, observed)
+                if metrics is not None:
+                    suffix = _gauge_suffix(ch.app)
+                    metrics.set(f"fps_{suffix}", t.smoothed_fps)
+                    metrics.set(f"rate_{suffix}", t.rate)
+                if cfg.show_fps_log and now - ch.last_fps_log >= cfg.fps_log_interval_s:
+                    log.fps(t.smoothed_fps, t.stats, tag=ch.app)
+                    ch.last_fps_log = now
+                log.update(ch.prev_rate, t.rate, t.smoothed_fps, tag=ch.app)
+                ch.prev_rate = t.rate
+            if push_each_frame:
+                # Between scheduled ticks, forward the newest estimate for every process that got frames
+                for key in batches:
+                    ch = multi.channels.get(key[0].lower())
+                    if ch is None or ch.key != key or ch.ctrl.last_tick == now:
+                        continue
+                    last_tick = ch.ctrl.last_tick
+                    t = ch.ctrl.tick(now)
+                    ch.ctrl.last_tick = last_tick
+                    if t is not None:
+                        timed_write(ch.bridge, metrics, t.rate, observed)
+            if now - last_reap >= HANDOVER_S:
+                multi.reap(now)
+                last_reap = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            pm.send_signal(signal.SIGTERM)
+        except Exception:
+            pass
+        if tee is not None:
+            tee.close()
+        multi.close()
+        log.close()
+        if export is not None:
+            export.close()
+        if multi.ignored_frames:
+            print(f"[CTRL] {multi.ignored_frames} frames from untracked/duplicate processes ignored")
@@ -0,0 +1,367 @@
+# process_watch.py
+# Cheap process discovery: "is helldivers2.exe running", "tell me when it starts /
+# exits". Replaces wetwork.py's full process walk (exe + create_time for every
+# process, list-based dedupe).
+#
+# A ProcessWatcher keeps a {pid: ProcInfo} snapshot. Each poll() lists PIDs,
+# re-checks only the create_time of PIDs it has seen before (a changed one means
+# the PID was reused) and fully describes (name, create_time) just the new ones,
+# then diffs by (pid, create_time) into started/exited lists. Exit waits block on the
+# one process (WaitForSingleObject / pidfd) instead of rescanning.
+#   psutil   -> psutil.pids() + Process.oneshot() for new PIDs (if installed)
+#   Linux    -> /proc/<pid>/stat
+#   Windows  -> Toolhelp32 snapshot (names for every PID in one call)
+#
+#   w = ProcessWatcher()
+#   game = w.wait_for_start("helldivers2.exe", stop=stop)   # polls every interval_s
+#   w.wait_for_exit(game)
+
+import ctypes
+import os
+import select
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+try:
+    import psutil
+except ImportError:  # optional; the platform backends below cover Linux and Windows
+    psutil = None
+
+POLL_INTERVAL_S = 2.0
+
+
+class ProcInfo(NamedTuple):
+    pid: int
+    name: str
+    create_time: float  # backend-specific clock; only compared for identity (PID reuse)
+
+
+class ProcessBackend:
+    """scan(known) -> {pid: ProcInfo}; entries of `known` whose PID still exists with the
+    same create_time are reused, anything else is described afresh."""
+
+    backend = "base"
+    name_limit = 0  # >0: names are truncated to this many characters (Linux comm)
+
+    def scan(self, known: Dict[int, ProcInfo]) -> Dict[int, ProcInfo]:
+        raise NotImplementedError
+
+    def describe(self, pid: int) -> Optional[ProcInfo]:
+        raise NotImplementedError
+
+    def wait_exit(self, proc: ProcInfo, timeout: float) -> bool:
+        """True once `proc` has exited; False after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.describe(proc.pid) != proc:
+                return True
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            time.sleep(min(0.5, left))
+
+
+# -----------------------------
+# psutil
+# -----------------------------
+class PsutilBackend(ProcessBackend):
+    backend = "psutil"
+
+    def scan(self, known):
+        out = {}
+        for pid in psutil.pids():
+            p = known.get(pid)
+            if p is None or self._create_time(pid) != p.create_time:
+                p = self.describe(pid)
+            if p is not None:
+                out[pid] = p
+        return out
+
+    def _create_time(self, pid):
+        try:
+            return psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    def describe(self, pid):
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                return ProcInfo(pid, proc.name(), proc.create_time())
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    def wait_exit(self, proc, timeout):
+        try:
+            p = psutil.Process(proc.pid)
+            if p.create_time() != proc.create_time:
+                return True  # PID reused
+            p.wait(timeout)
+            return True
+        except psutil.TimeoutExpired:
+            return False
+        except psutil.NoSuchProcess:
+            return True
+
+
+# -----------------------------
+# Linux: /proc
+# -----------------------------
+class ProcfsBackend(ProcessBackend):
+    """Known PIDs only have their starttime re-checked, so a process that exec()s
+    into a new program keeps the name it had when first seen (starttime doesn't
+    change on exec)."""
+
+    backend = "procfs"
+    name_limit = 15  # TASK_COMM_LEN - 1
+
+    def __init__(self):
+        if not os.path.isdir("/proc/self"):
+            raise OSError("no /proc")
+
+    def scan(self, known):
+        out = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            p = self._parse(pid, self._stat(pid), known.get(pid))
+            if p is not None:
+                out[pid] = p
+        return out
+
+    def describe(self, pid):
+        return self._parse(pid, self._stat(pid))
+
+    @staticmethod
+    def _stat(pid: int) -> Optional[bytes]:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _parse(pid: int, stat: Optional[bytes], known: Optional[ProcInfo] = None) -> Optional[ProcInfo]:
+        """ProcInfo from a stat line; `known` is returned as-is if its starttime still matches."""
+        if not stat:
+            return None
+        # "pid (comm) state ..."; comm may itself contain spaces and parentheses
+        lp, rp = stat.find(b"("), stat.rfind(b")")
+        fields = stat[rp + 2:].split()
+        if lp < 0 or len(fields) < 20:
+            return None
+        start = float(fields[19])  # starttime (field 22)
+        if known is not None and known.create_time == start:
+            return known
+        return ProcInfo(pid, stat[lp + 1:rp].decode("utf-8", "replace"), start)
+
+    def wait_exit(self, proc, timeout):
+        pidfd_open = getattr(os, "pidfd_open", None)
+        if pidfd_open is None:
+            return super().wait_exit(proc, timeout)
+        try:
+            fd = pidfd_open(proc.pid)
+        except OSError:
+            return True  # already gone
+        try:
+            if self.describe(proc.pid) != proc:
+                return True  # PID reused before we opened it
+            readable, _, _ = select.select([fd], [], [], timeout)
+            return bool(readable)
+        finally:
+            os.close(fd)
+
+
+# -----------------------------
+# Windows: Toolhelp32
+# -----------------------------
+TH32CS_SNAPPROCESS = 0x2
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+SYNCHRONIZE = 0x100000
+WAIT_OBJECT_0 = 0x0
+INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+
+class PROCESSENTRY32W(ctypes.Structure):
+    _fields_ = [
+        ("dwSize", ctypes.c_uint32),
+        ("cntUsage", ctypes.c_uint32),
+        ("th32ProcessID", ctypes.c_uint32),
+        ("th32DefaultHeapID", ctypes.c_size_t),
+        ("th32ModuleID", ctypes.c_uint32),
+        ("cntThreads", ctypes.c_uint32),
+        ("th32ParentProcessID", ctypes.c_uint32),
+        ("pcPriClassBase", ctypes.c_long),
+        ("dwFlags", ctypes.c_uint32),
+        ("szExeFile", ctypes.c_wchar * 260),
+    ]
+
+
+class ToolhelpBackend(ProcessBackend):
+    """One CreateToolhelp32Snapshot per scan gives every PID with its exe name;
+    creation time (GetProcessTimes) is re-read for known PIDs to catch reuse."""
+
+    backend = "toolhelp"
+
+    def __init__(self):
+        k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        k32.CreateToolhelp32Snapshot.restype = ctypes.c_void_p
+        k32.CreateToolhelp32Snapshot.argtypes = [ctypes.c_uint32, ctypes.c_uint32]
+        k32.Process32FirstW.argtypes = [ctypes.c_void_p, ctypes.POINTER(PROCESSENTRY32W)]
+        k32.Process32NextW.argtypes = [ctypes.c_void_p, ctypes.POINTER(PROCESSENTRY32W)]
+        k32.OpenProcess.restype = ctypes.c_void_p
+        k32.OpenProcess.argtypes = [ctypes.c_uint32, ctypes.c_int, ctypes.c_uint32]
+        k32.GetProcessTimes.argtypes = [ctypes.c_void_p] + [ctypes.POINTER(ctypes.c_uint64)] * 4
+        k32.WaitForSingleObject.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+        k32.WaitForSingleObject.restype = ctypes.c_uint32
+        k32.CloseHandle.argtypes = [ctypes.c_void_p]
+        self._k32 = k32
+
+    def _names(self) -> Dict[int, str]:
+        k32 = self._k32
+        snap = k32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+        if not snap or snap == INVALID_HANDLE_VALUE:
+            raise OSError(ctypes.get_last_error(), "CreateToolhelp32Snapshot failed")
+        out = {}
+        try:
+            entry = PROCESSENTRY32W()
+            entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+            ok = k32.Process32FirstW(snap, ctypes.byref(entry))
+            while ok:
+                out[entry.th32ProcessID] = entry.szExeFile
+                ok = k32.Process32NextW(snap, ctypes.byref(entry))
+        finally:
+            k32.CloseHandle(snap)
+        return out
+
+    def _create_time(self, pid: int) -> Optional[float]:
+        h = self._k32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not h:
+            return None
+        try:
+            created, t1, t2, t3 = (ctypes.c_uint64() for _ in range(4))
+            if not self._k32.GetProcessTimes(h, ctypes.byref(created), ctypes.byref(t1), ctypes.byref(t2),
+                                             ctypes.byref(t3)):
+                return None
+            return created.value / 1e7  # FILETIME, 100 ns units
+        finally:
+            self._k32.CloseHandle(h)
+
+    def scan(self, known):
+        out = {}
+        for pid, name in self._names().items():
+            p = known.get(pid)
+            # Protected processes refuse OpenProcess (0.0); their name is still good for matching
+            created = self._create_time(pid) or 0.0
+            if p is None or p.name != name or p.create_time != created:
+                p = ProcInfo(pid, name, created)
+            out[pid] = p
+        return out
+
+    def describe(self, pid):
+        name = self._names().get(pid)
+        return None if name is None else ProcInfo(pid, name, self._create_time(pid) or 0.0)
+
+    def wait_exit(self, proc, timeout):
+        h = self._k32.OpenProcess(SYNCHRONIZE | PROCESS_QUERY_LIMITED_INFORMATION, False, proc.pid)
+        if not h:
+            return True
+        try:
+            if proc.create_time and self._create_time(proc.pid) != proc.create_time:
+                return True  # PID reused
+            return self._k32.WaitForSingleObject(h, max(0, int(timeout * 1000))) == WAIT_OBJECT_0
+        finally:
+            self._k32.CloseHandle(h)
+
+
+# -----------------------------
+# Factory
+# -----------------------------
+def make_backend(backend: str = "auto") -> ProcessBackend:
+    """psutil if installed, else the platform backend; OSError if nothing works here."""
+    if backend in ("auto", "psutil") and psutil is not None:
+        return PsutilBackend()
+    if backend in ("auto", "procfs") and sys.platform.startswith("linux"):
+        return ProcfsBackend()
+    if backend in ("auto", "toolhelp") and sys.platform == "win32":
+        return ToolhelpBackend()
+    raise OSError(f"no process discovery backend for {sys.platform!r} (backend={backend!r}); install psutil")
+
+
+# -----------------------------
+# Watcher
+# -----------------------------
+class ProcessWatcher:
+    def __init__(self, backend: Union[str, ProcessBackend] = "auto"):
+        self.backend = make_backend(backend) if isinstance(backend, str) else backend
+        self.procs: Dict[int, ProcInfo] = {}
+        self.scans = 0
+
+    def matches(self, proc: ProcInfo, name: str) -> bool:
+        """Case-insensitive exact name match (prefix match where the backend truncates names)."""
+        have, want = proc.name.lower(), name.lower()
+        if have == want:
+            return True
+        limit = self.backend.name_limit
+        return bool(limit) and len(have) == limit and want.startswith(have)
+
+    def poll(self) -> Tuple[List[ProcInfo], List[ProcInfo]]:
+        """Rescan; returns (started, exited) since the previous poll (everything is 'started' on the first)."""
+        old = self.procs
+        new = self.backend.scan(old)
+        started = [p for pid, p in new.items() if old.get(pid) != p]
+        exited = [p for pid, p in old.items() if new.get(pid) != p]
+        self.procs = new
+        self.scans += 1
+        return started, exited
+
+    def find(self, name: str) -> List[ProcInfo]:
+        """Processes named `name` in the current snapshot (polls once if there is none yet)."""
+        if not self.scans:
+            self.poll()
+        return [p for p in self.procs.values() if self.matches(p, name)]
+
+    def names(self) -> Set[str]:
+        if not self.scans:
+            self.poll()
+        return {p.name for p in self.procs.values()}
+
+    def wait_for_start(self, names: Union[str, Iterable[str]], timeout: Optional[float] = None,
+                       interval_s: float = POLL_INTERVAL_S,
+                       stop: Optional[threading.Event] = None) -> Optional[ProcInfo]:
+        """First process matching any of `names` (already running counts); None on timeout or `stop`."""
+        wanted = [names] if isinstance(names, str) else list(names)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        candidates = list(self.procs.values()) if self.scans else self.poll()[0]
+        while True:
+            hits = [p for p in candidates if any(self.matches(p, n) for n in wanted)]
+            if hits:
+                return min(hits, key=lambda p: p.create_time)
+            wait = interval_s if deadline is None else min(interval_s, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            if stop is not None:
+                if stop.wait(wait):
+                    return None
+            else:
+                time.sleep(wait)
+            candidates = self.poll()[0]  # only new PIDs can be a new match
+
+    def wait_for_exit(self, proc: ProcInfo, timeout: Optional[float] = None,
+                      stop: Optional[threading.Event] = None, slice_s: float = 1.0) -> bool:
+        """Block until `proc` exits (True) or timeout / `stop` (False). Blocks on the process itself."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if stop is None:
+            slice_s = 3600.0  # nothing to check between slices
+        while True:
+            wait = slice_s if deadline is None else min(slice_s, deadline - time.monotonic())
+            if wait <= 0:
+                return False
+            if self.backend.wait_exit(proc, wait):
+                self.procs.pop(proc.pid, None)
+                return True
+            if stop is not None and stop.is_set():
+                return False
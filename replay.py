@@ -0,0 +1,200 @@
+# replay.py
+# Deterministic replay of recorded PresentMon / FrameView frame logs through the
+# real controller pipeline: LineTailer + parse -> RateController (FrameWindow,
+# control law, rate curve) -> bridge.
+#
+#   python replay.py FrameView/FrameView_Code.exe_2025_09_01T161025_Log.csv
+#   python replay.py LOG --mode paced --bridge udp --target 127.0.0.1:47800
+#   python replay.py hd2_sessions/session_20250901_161025_000.hd2rec
+#
+# Session recordings (session_record.py) replay their recorded tailer reads
+# as-is; --batch-ms only applies to CSV logs.
+#
+# Rows are grouped into batches by TimeInSeconds (--batch-ms, modelling one
+# tailer wake-up) and the controller clock is the log's own time, so decided
+# rates are identical run to run and in both modes:
+#   fast  -> as fast as possible (throughput benchmark)
+#   paced -> sleeps to reproduce the original frame timing for live consumers
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from bridge import BRIDGE_KINDS, DEFAULT_PIPE, DEFAULT_PUSH_ADDR, Bridge, make_bridge
+from frame_tail import MAX_FRAME_MS, ColumnProjector, LineTailer, find_column
+from hd2_firerate_controller import CONFIG, Config, RateController
+from session_record import is_recording, iter_recording_batches
+
+# (log_time_s, [frame_ms...], dropped_count)
+Batch = Tuple[float, List[float], int]
+
+
+@dataclass
+class ReplayResult:
+    log: str
+    rows: int = 0
+    frames: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    log_span_s: float = 0.0
+    bridge_writes: int = 0
+    decisions: List[Tuple[float, float, float]] = field(default_factory=list)  # (log_t, smoothed_fps, rate)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.wall_s if self.wall_s else 0.0
+
+    @property
+    def cpu_us_per_frame(self) -> float:
+        return 1e6 * self.cpu_s / self.frames if self.frames else 0.0
+
+    @property
+    def writes_per_s(self) -> float:
+        return self.bridge_writes / self.wall_s if self.wall_s else 0.0
+
+
+def iter_log_batches(path: str, batch_ms: float = 10.0, chunk_bytes: int = 256 * 1024) -> Iterator[Batch]:
+    """Parse a frame log in chunks and group rows into tailer-sized batches by log time."""
+    if os.path.getsize(path) == 0:
+        raise RuntimeError(f"{path}: empty log")
+    with open(path, "rb") as f:
+        tail = LineTailer(f, chunk_bytes=chunk_bytes)
+        header = tail.read_header(0.0)
+        ms_idx = find_column(header, "msBetweenPresents")
+        if ms_idx is None:
+            raise RuntimeError(f"{path}: no MsBetweenPresents column")
+        t_idx = find_column(header, "TimeInSeconds")
+        lc = [h.strip().lower() for h in header]
+        dropped_idx = lc.index("dropped") if "dropped" in lc else None
+        # Project (ms, time, dropped); absent optional columns read as ms and are ignored
+        projector = ColumnProjector([ms_idx,
+                                     t_idx if t_idx is not None else ms_idx,
+                                     dropped_idx if dropped_idx is not None else ms_idx])
+
+        clock = 0.0
+        batch_end = None
+        ms_buf: List[float] = []
+        dropped = 0
+        while True:
+            lines = tail.read_lines() or tail.take_partial()
+            if not lines:
+                break
+            for ms_s, t_s, dropped_s in projector.project(lines):
+                try:
+                    ms = float(ms_s)
+                    t = float(t_s) if t_idx is not None else None
+                except ValueError:
+                    continue
+                if not 0 < ms < MAX_FRAME_MS:
+                    continue
+                clock = t if t is not None else clock + ms / 1000.0
+                if batch_end is None:
+                    batch_end = clock + batch_ms / 1000.0
+                elif clock >= batch_end:
+                    yield batch_end, ms_buf, dropped
+                    ms_buf, dropped = [], 0
+                    while batch_end <= clock:
+                        batch_end += batch_ms / 1000.0
+                ms_buf.append(ms)
+                if dropped_idx is not None and dropped_s.strip() == "1":
+                    dropped += 1
+        if ms_buf:
+            yield clock, ms_buf, dropped
+
+
+def iter_batches(path: str, batch_ms: float = 10.0) -> Iterator[Batch]:
+    """iter_log_batches for CSV logs, the recorded reads for .hd2rec session recordings."""
+    if is_recording(path):
+        return iter_recording_batches(path)
+    return iter_log_batches(path, batch_ms)
+
+
+def replay(path: str, cfg: Config = CONFIG, mode: str = "fast", speed: float = 1.0,
+           batch_ms: float = 10.0, bridge: Optional[Bridge] = None) -> ReplayResult:
+    res = ReplayResult(log=path)
+    ctrl = RateController(cfg)
+    batches = iter_batches(path, batch_ms)
+    first_t = None
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    for t, ms_batch, dropped in batches:
+        if first_t is None:
+            first_t = t
+        if mode == "paced":
+            delay = wall0 + (t - first_t) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        res.rows += len(ms_batch)
+        ctrl.push(ms_batch, dropped)
+        if not ctrl.due(t):
+            continue
+        tick = ctrl.tick(t)
+        if tick is None:
+            continue
+        if bridge is not None and bridge.write(tick.rate, time.perf_counter()):
+            res.bridge_writes += 1
+        res.decisions.append((t, tick.smoothed_fps, tick.rate))
+    res.wall_s = time.perf_counter() - wall0
+    res.cpu_s = time.process_time() - cpu0
+    res.frames = ctrl.window.total_frames
+    res.log_span_s = (t - first_t) if first_t is not None else 0.0
+    return res
+
+
+def print_report(res: ReplayResult):
+    print(f"\n[REPLAY] {os.path.basename(res.log)}")
+    print(f"  rows         {res.rows:>10d}   ({res.log_span_s:.1f} s of log)")
+    print(f"  throughput   {res.rows_per_s:>10.0f} rows/s   wall {res.wall_s * 1000:.1f} ms")
+    print(f"  cpu          {res.cpu_us_per_frame:>10.2f} µs/frame")
+    print(f"  bridge       {res.bridge_writes:>10d} writes   ({res.writes_per_s:.1f}/s wall)")
+    if res.decisions:
+        rates = [r for _, _, r in res.decisions]
+        print(f"  rates        {len(rates):>10d} decisions   min {min(rates):.1f}  max {max(rates):.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay recorded frame logs through the controller pipeline.")
+    ap.add_argument("logs", nargs="+")
+    ap.add_argument("--mode", choices=("fast", "paced"), default="fast")
+    ap.add_argument("--speed", type=float, default=1.0, help="Paced mode time scale (2 = twice as fast)")
+    ap.add_argument("--batch-ms", type=float, default=10.0, help="Log time per tailer batch")
+    ap.add_argument("--bridge", choices=sorted(BRIDGE_KINDS) + ["none"], default="file",
+                    help="Bridge to drive (default: a temp text file)")
+    ap.add_argument("--target", default=None, help="Bridge target (file path, host:port, pipe)")
+    ap.add_argument("--out", default=None, help="Write the decided-rate series to this CSV")
+    ap.add_argument("--print-rates", action="store_true", help="Print every decided rate")
+    ap.add_argument("--law", choices=("ema", "pid"), default=None, help="Control law (default: CONFIG.control_law)")
+    args = ap.parse_args()
+    if args.law:
+        CONFIG.control_law = args.law
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for log in args.logs:
+            bridge = None
+            if args.bridge != "none":
+                default = {"udp": DEFAULT_PUSH_ADDR, "pipe": DEFAULT_PIPE}.get(
+                    args.bridge, os.path.join(tmp, f"bridge.{args.bridge}"))
+                bridge = make_bridge(args.bridge, args.target or default)
+            try:
+                res = replay(log, CONFIG, args.mode, args.speed, args.batch_ms, bridge)
+            finally:
+                if bridge is not None:
+                    bridge.close()
+            print_report(res)
+            if args.print_rates:
+                for t, fps, rate in res.decisions:
+                    print(f"    t={t:10.3f}  fps={fps:7.1f}  rate={rate:7.1f}")
+            if args.out:
+                out = args.out if len(args.logs) == 1 else f"{os.path.splitext(args.out)[0]}_{os.path.basename(log)}"
+                with open(out, "w", newline="", encoding="utf-8") as w:
+                    wr = csv.writer(w)
+                    wr.writerow(["TimeInSeconds", "SmoothedFPS", "Rate"])
+                    wr.writerows((f"{t:.6f}", f"{fps:.3f}", f"{rate:.3f}") for t, fps, rate in res.decisions)
+
+
+if __name__ == "__main__":
+    main()
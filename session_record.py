@@ -0,0 +1,331 @@
+# session_record.py
+# Compact binary recording of what the controller saw and did, in a size-bounded
+# ring on disk. Instead of keeping PresentMon's ever-growing CSV (or FrameView's
+# ~150 columns per frame), the controller records only:
+#   BATCH  one per tailer read: when it was observed, frame count, dropped count
+#          (repeated, flagged CONTINUED, at the start of a chunk that carries on a read)
+#   FRAME  one per frame: MsBetweenPresents
+#   TICK   one per decision: smoothed FPS, rate
+#   WRITE  one per bridge write: rate, observed -> written latency
+# as fixed-width 24-byte records (REC), zlib-compressed in chunks of
+# CHUNK_RECORDS. Times are seconds since the session started (perf_counter).
+#
+# File = MAGIC + u32 meta length + JSON meta, then chunks of
+#   u32 compressed bytes, u32 record count, zlib(records)
+# Each file is one segment (<= max_bytes / SEGMENTS_PER_RING); when the folder
+# holds more than max_bytes the oldest segments are deleted, so disk use is
+# bounded whatever the session length. Compression and file I/O happen on a
+# writer thread; the frame loop only packs records.
+#
+#   rec = SessionRecorder(r"C:\Users\Public\hd2_sessions", max_bytes=64 << 20)
+#   rec.batch(observed, ms_batch, dropped); rec.tick(t, fps, rate); rec.write(t, rate, observed)
+#   rec.close()
+#
+#   python session_record.py DIR_OR_FILE...      # summary of recordings
+#   python replay.py DIR/session_..._000.hd2rec  # replays like a CSV log
+
+import argparse
+import glob
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+MAGIC = b"HD2REC\x00\x01"
+SUFFIX = ".hd2rec"
+REC = struct.Struct("<BBHfdd")   # kind, flags, n, a (f32), t (f64), b (f64)
+CHUNK = struct.Struct("<II")     # compressed bytes, record count
+A_OFFSET = 4                     # byte offset of `a` in a REC
+SCATTER_MIN_FRAMES = 16          # batches at least this long are packed with slice copies
+CHUNK_RECORDS = 4096
+SEGMENTS_PER_RING = 8
+
+BATCH, FRAME, TICK, WRITE = 1, 2, 3, 4
+KINDS = {BATCH: "batch", FRAME: "frame", TICK: "tick", WRITE: "write"}
+CONTINUED = 1   # BATCH flag: repeats the header of a batch split across chunks (n = frames left)
+
+
+def _session_name(directory: str) -> str:
+    """session_<date>_<time>_<ms>, unique in `directory` (restarts can land in the same second)."""
+    ms = int(time.time() * 1000)
+    while True:
+        # Names must keep sorting by start time (prune_ring), so a taken name moves to the
+        # next millisecond, carrying into the next second past 999
+        sec, frac = divmod(ms, 1000)
+        name = time.strftime("session_%Y%m%d_%H%M%S", time.localtime(sec)) + f"_{frac:03d}"
+        if not glob.glob(os.path.join(directory, glob.escape(name) + "_*" + SUFFIX)):
+            return name
+        ms += 1
+
+
+def prune_ring(directory: str, max_bytes: int, keep: Optional[str] = None) -> int:
+    """Delete the oldest recordings until the folder fits max_bytes; returns bytes freed."""
+    files = sorted(glob.glob(os.path.join(directory, "*" + SUFFIX)))  # names sort by start time
+    sizes = {}
+    for f in files:
+        try:
+            sizes[f] = os.path.getsize(f)
+        except OSError:
+            pass
+    total = sum(sizes.values())
+    freed = 0
+    for f in files:
+        if total <= max_bytes:
+            break
+        if f == keep or f not in sizes:
+            continue
+        try:
+            os.remove(f)
+        except OSError:
+            continue
+        total -= sizes[f]
+        freed += sizes[f]
+    return freed
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+class SessionRecorder:
+    def __init__(self, directory: str, max_bytes: int = 64 << 20, meta: Optional[dict] = None,
+                 chunk_records: int = CHUNK_RECORDS, level: int = 6):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = max(256 << 10, max_bytes // SEGMENTS_PER_RING)
+        self.meta = dict(meta or {})
+        self.chunk_records = chunk_records
+        self.level = level
+        self.t0 = time.perf_counter()
+        self.records = 0
+        self.dropped_chunks = 0
+        self.path: Optional[str] = None
+        self._part = 0
+        self._f = None
+        # Claim the name by creating the first segment now (exclusively): a daemon
+        # restarting within the same millisecond, or a second recorder, moves on
+        while True:
+            self.session = _session_name(directory)
+            self.meta.update(session=self.session, started=time.time(), record=REC.format)
+            self._part = 0
+            try:
+                self._open_segment()
+                break
+            except FileExistsError:
+                continue
+        prune_ring(directory, max_bytes, keep=self.path)
+        self._buf = bytearray(chunk_records * REC.size)
+        self._n = 0
+        self._q: queue.Queue = queue.Queue(maxsize=32)
+        self._thread = threading.Thread(target=self._writer, name="recorder", daemon=True)
+        self._thread.start()
+
+    # ---- producer side (frame loop) ----
+    def _put(self, kind: int, flags: int, n: int, a: float, t: float, b: float):
+        REC.pack_into(self._buf, self._n * REC.size, kind, flags, n, a, t, b)
+        self._n += 1
+        if self._n == self.chunk_records:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self._n:
+            return
+        data = bytes(self._buf[:self._n * REC.size])
+        try:
+            self._q.put_nowait((self._n, data))
+            self.records += self._n
+        except queue.Full:
+            self.dropped_chunks += 1  # disk stalled; losing history beats stalling the loop
+        self._n = 0
+
+    def _put_frames(self, ms_batch, t: float):
+        # FRAME records of one batch differ only in `a`: lay down the shared record n
+        # times, then scatter the float32 frame times into the `a` slots with four
+        # strided slice copies (one per byte), so the cost per frame is C copies, not
+        # bytecode. A handful of frames is cheaper packed one by one.
+        # Every chunk (and so every segment) that holds frames of a batch also holds
+        # its BATCH header: a batch split by a chunk flush is re-headed (CONTINUED).
+        i, total = 0, len(ms_batch)
+        if self._n == 0 and total:
+            self._put(BATCH, CONTINUED, total, 0.0, t, 0)
+        if total < SCATTER_MIN_FRAMES and self._n + total < self.chunk_records:
+            pack, buf, off = REC.pack_into, self._buf, self._n * REC.size
+            for ms in ms_batch:
+                pack(buf, off, FRAME, 0, 0, ms, t, 0.0)
+                off += REC.size
+            self._n += total
+            return
+        template = REC.pack(FRAME, 0, 0, 0.0, t, 0.0)
+        while i < total:
+            n = min(total - i, self.chunk_records - self._n)
+            off = self._n * REC.size
+            end = off + n * REC.size
+            a = array("f", ms_batch[i:i + n])
+            if sys.byteorder != "little":
+                a.byteswap()
+            raw = a.tobytes()
+            self._buf[off:end] = template * n
+            for k in range(4):
+                self._buf[off + A_OFFSET + k:end:REC.size] = raw[k::4]
+            self._n += n
+            i += n
+            if self._n == self.chunk_records:
+                self._flush_chunk()
+                if i < total:
+                    self._put(BATCH, CONTINUED, total - i, 0.0, t, 0)
+
+    def batch(self, observed: float, ms_batch, dropped: int = 0):
+        t = observed - self.t0
+        for i in range(0, len(ms_batch), 0xFFFF):
+            part = ms_batch[i:i + 0xFFFF]
+            self._put(BATCH, 0, len(part), 0.0, t, dropped if i == 0 else 0)
+            self._put_frames(part, t)
+
+    def tick(self, t: float, smoothed_fps: float, rate: float):
+        self._put(TICK, 0, 0, smoothed_fps, t - self.t0, rate)
+
+    def write(self, t: float, rate: float, observed: Optional[float] = None):
+        self._put(WRITE, 0, 0, rate, t - self.t0, (t - observed) if observed is not None else -1.0)
+
+    def close(self):
+        self._flush_chunk()
+        self._q.put(None)
+        self._thread.join(timeout=5.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- writer thread ----
+    def _open_segment(self):
+        if self._f is not None:
+            self._f.close()
+        self.path = os.path.join(self.directory, f"{self.session}_{self._part:03d}{SUFFIX}")
+        self._part += 1
+        meta = json.dumps({**self.meta, "part": self._part - 1}).encode()
+        self._f = open(self.path, "xb")   # never overwrite another recorder's segment
+        self._f.write(MAGIC + struct.pack("<I", len(meta)) + meta)
+
+    def _writer(self):
+        try:
+            while True:
+                item = self._q.get()
+                if item is None:
+                    return
+                n, data = item
+                if self._f is None or self._f.tell() >= self.segment_bytes:
+                    self._open_segment()
+                    prune_ring(self.directory, self.max_bytes, keep=self.path)
+                z = zlib.compress(data, self.level)
+                self._f.write(CHUNK.pack(len(z), n) + z)
+                self._f.flush()
+        except OSError as e:
+            print(f"[REC] recording stopped: {e}")
+        finally:
+            if self._f is not None:
+                self._f.close()
+            if self.path is not None:
+                prune_ring(self.directory, self.max_bytes, keep=self.path)
+
+
+# -----------------------------
+# Reader
+# -----------------------------
+def read_meta(path: str) -> dict:
+    with open(path, "rb") as f:
+        return _read_header(f, path)
+
+
+def _read_header(f, path: str) -> dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise RuntimeError(f"{path}: not a session recording")
+    (n,) = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(n))
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, int, int, float, float, float]]:
+    """(kind, flags, n, a, t, b) for every record; a truncated last chunk (crash) ends the file."""
+    with open(path, "rb") as f:
+        _read_header(f, path)
+        while True:
+            head = f.read(CHUNK.size)
+            if len(head) < CHUNK.size:
+                return
+            size, _n = CHUNK.unpack(head)
+            z = f.read(size)
+            if len(z) < size:
+                return
+            try:
+                data = zlib.decompress(z)
+            except zlib.error:
+                return
+            yield from REC.iter_unpack(data)
+
+
+def iter_recording_batches(path: str) -> Iterator[Tuple[float, List[float], int]]:
+    """Recorded tailer reads as replay batches: (session_time_s, [frame_ms...], dropped).
+
+    A batch split across chunks comes back whole; a segment that starts with the
+    rest of a batch begins with its CONTINUED header. Frames with no header at all
+    (recordings made before CONTINUED existed) are skipped.
+    """
+    t = None
+    ms: List[float] = []
+    dropped = 0
+    for kind, flags, _n, a, rt, b in iter_records(path):
+        if kind == BATCH:
+            if flags & CONTINUED and t == rt:
+                continue   # same batch, next chunk
+            if ms:
+                yield t, ms, dropped
+            t, ms, dropped = rt, [], int(b)
+        elif kind == FRAME and t is not None:
+            ms.append(a)
+    if ms:
+        yield t, ms, dropped
+
+
+def is_recording(path: str) -> bool:
+    return path.endswith(SUFFIX)
+
+
+def summarize(path: str) -> dict:
+    counts = dict.fromkeys(KINDS.values(), 0)
+    span = 0.0
+    lat = []
+    for kind, _flags, _n, _a, t, b in iter_records(path):
+        counts[KINDS.get(kind, "?")] = counts.get(KINDS.get(kind, "?"), 0) + 1
+        span = max(span, t)
+        if kind == WRITE and b >= 0:
+            lat.append(b)
+    lat.sort()
+    return {"file": path, "bytes": os.path.getsize(path), "span_s": span, **counts,
+            "write_p50_ms": 1000.0 * lat[len(lat) // 2] if lat else None}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarize session recordings.")
+    ap.add_argument("paths", nargs="+", help="Recording files or folders")
+    args = ap.parse_args()
+    files: List[str] = []
+    for p in args.paths:
+        files += sorted(glob.glob(os.path.join(p, "*" + SUFFIX))) if os.path.isdir(p) else [p]
+    for f in files:
+        s = summarize(f)
+        raw = REC.size * (s["batch"] + s["frame"] + s["tick"] + s["write"])
+        p50 = f"{s['write_p50_ms']:.3f} ms" if s["write_p50_ms"] is not None else "-"
+        print(f"{os.path.basename(f)}  {s['bytes'] / 1024:8.1f} KiB ({raw / max(1, s['bytes']):4.1f}x)  "
+              f"{s['span_s']:8.1f} s  frames {s['frame']:>8d}  ticks {s['tick']:>6d}  writes {s['write']:>6d}  "
+              f"frame->bridge p50 {p50}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# session_stats.py
+# Streaming session summary in FrameView_Summary.csv's format.
+# FrameView only reports Avg FPS / 1% Low / 0.1% Low / Min / Max / present
+# latency after the fact, from its own per-frame log. SessionStats keeps the same
+# numbers as a stream: frame times go into metrics.LogHistogram sketches (fixed
+# log buckets, ~2.2% worst-case quantile error, constant memory however long the
+# session), and two sketches merge by adding counts, so interval rows fold into
+# the session row without keeping any frames.
+#
+#   Avg FPS            frames / total frame time (exact)
+#   1% Low, 0.1% Low   1000 / 99th, 99.9th percentile frame time (sketch,
+#                      interpolated between ranks like frame_stats.compute_stats)
+#   Min FPS, Max FPS   1000 / longest, shortest frame (exact)
+#   RenderPresentLatency (ms)  mean, when a latency column is fed (offline logs)
+#
+# The live controller only sees MsBetweenPresents, so its rows report that in both
+# the FPS and the Present FPS columns; latency/GPU/CPU columns are NA.
+#
+#   python session_stats.py FrameView/FrameView_chrome.exe_*_Log.csv --out summary.csv
+#   python Benchmarks/bench_session_stats.py     # sketch vs exact on the sample logs
+
+import argparse
+import csv
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from frame_tail import MAX_FRAME_MS
+from metrics import HIST_GROWTH, HIST_MIN, LogHistogram
+
+FRAMEVIEW_SUMMARY_COLUMNS = [
+    "TimeStamp", "Application", "Log Name", "GPU0", "GPU1", "CPU", "Resolution", "Runtime", "Avg FPS", "1% Low",
+    "AvgPCLatency (ms)", "    ", "Min FPS", "Max FPS", "0.1% Low FPS", "Time (ms)", "MinPCLatency (ms)",
+    "MaxPCLatency (ms)", "RenderPresentLatency (ms)", "Min Present FPS", "Max Present FPS", "1% Low Present FPS",
+    "0.1% Low Present FPS", "GPU0Clk(MHz)", "GPU0MemClk(MHz)", "GPU0 Util%", "GPU0 Temp (C)", "GPU1Clk(MHz)",
+    "GPU1MemClk(MHz)", "GPU1 Util%", "GPU1 Temp (C)", "Perf/Watt (F/J) (PCAT)", "PCAT Power (Watts)",
+    "GPU NV Power (Watts) (API)", "CPUClk(MHz)", "CPU Util %", "CPU Temp (C)", "CPU Package Power(Watts)",
+    "Current Battery Capacity(Wh)", "Total Battery Capacity(Wh)", "Battery Percentage", "Battery Drain Rate(W)",
+    "Battery Charge Rate(W)", "OS", "GPU Base Driver", "GPU Driver Package", "System RAM", "Motherboard",
+]
+LOW_1PCT = 0.99
+LOW_01PCT = 0.999
+NAN = float("nan")
+
+
+def _add_ms(h: LogHistogram, ms_batch: Iterable[float]):
+    add = h.add
+    for ms in ms_batch:
+        if 0 < ms < MAX_FRAME_MS:   # also skips NaN (NA cells) and timer wrap-around garbage
+            add(ms * 0.001)         # LogHistogram's range is in seconds
+
+
+def _value_at_rank(h: LogHistogram, rank: int) -> float:
+    if rank <= 0:
+        return h.min
+    if rank >= h.count - 1:
+        return h.max
+    seen = 0
+    for i, c in enumerate(h.counts):
+        seen += c
+        if seen > rank:
+            v = HIST_MIN * HIST_GROWTH ** (i - 0.5) if i else HIST_MIN   # bucket's geometric middle
+            return max(h.min, min(h.max, v))
+    return h.max
+
+
+def quantile(h: LogHistogram, q: float) -> float:
+    """Like frame_stats' percentile: linear between the two ranks around q*(n-1), each read from the sketch.
+
+    Without the interpolation a 0.1% Low over a few thousand frames jumps between
+    two (often very different) hitches, which the exact value does not.
+    """
+    pos = q * (h.count - 1)
+    lo = int(pos)
+    a = _value_at_rank(h, lo)
+    if pos == lo:
+        return a
+    return a + (_value_at_rank(h, lo + 1) - a) * (pos - lo)
+
+
+def _fps_columns(h: LogHistogram) -> Dict[str, float]:
+    if not h.count:
+        return {}
+    return {
+        "avg": h.count / h.total if h.total > 0 else 0.0,
+        "low_1pct": 1.0 / quantile(h, LOW_1PCT),
+        "low_01pct": 1.0 / quantile(h, LOW_01PCT),
+        "min": 1.0 / h.max,
+        "max": 1.0 / h.min,
+    }
+
+
+# -----------------------------
+# Sketch
+# -----------------------------
+class SessionStats:
+    """Constant-memory running FrameView summary for one session (or one interval of it)."""
+
+    def __init__(self, application: str, started: Optional[float] = None):
+        self.application = application
+        self.started = started if started is not None else time.time()
+        self.ended = self.started
+        self.frames = LogHistogram()     # frame times (s): Avg FPS, 1% Low, ...
+        self.presents = LogHistogram()   # MsBetweenPresents (s) when fed separately: the Present FPS columns
+        self.latency = LogHistogram()    # present latency (s)
+
+    def add(self, ms_batch: Iterable[float], present_ms: Optional[Iterable[float]] = None,
+            latency_ms: Optional[Iterable[float]] = None):
+        _add_ms(self.frames, ms_batch)
+        if present_ms is not None:
+            _add_ms(self.presents, present_ms)
+        if latency_ms is not None:
+            _add_ms(self.latency, latency_ms)
+        self.ended = time.time()
+
+    def merge(self, other: "SessionStats") -> "SessionStats":
+        self.frames.merge(other.frames)
+        self.presents.merge(other.presents)
+        self.latency.merge(other.latency)
+        self.started = min(self.started, other.started)
+        self.ended = max(self.ended, other.ended)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.frames.count
+
+    def fps(self) -> Dict[str, float]:
+        return _fps_columns(self.frames)
+
+    def row(self, log_name: str = "") -> Dict[str, str]:
+        """One FrameView_Summary.csv row; columns this pipeline can't know are NA."""
+        row = dict.fromkeys(FRAMEVIEW_SUMMARY_COLUMNS, "NA")
+        row["    "] = "  "
+        row["TimeStamp"] = time.strftime("%Y-%m-%dT%H%M%S", time.localtime(self.ended))
+        row["Application"] = self.application
+        row["Log Name"] = log_name
+        f = self.fps()
+        p = _fps_columns(self.presents if self.presents.count else self.frames)
+        for col, d, key in (("Avg FPS", f, "avg"), ("1% Low", f, "low_1pct"), ("Min FPS", f, "min"),
+                            ("Max FPS", f, "max"), ("0.1% Low FPS", f, "low_01pct"),
+                            ("Min Present FPS", p, "min"), ("Max Present FPS", p, "max"),
+                            ("1% Low Present FPS", p, "low_1pct"), ("0.1% Low Present FPS", p, "low_01pct")):
+            if key in d:
+                row[col] = f"{d[key]:.3f}"
+        if self.frames.count:
+            row["Time (ms)"] = f"{self.frames.total:.3f}"   # FrameView writes seconds here despite the name
+        if self.latency.count:
+            row["RenderPresentLatency (ms)"] = f"{self.latency.mean * 1000.0:.3f}"
+        return row
+
+    def describe(self) -> str:
+        f = self.fps()
+        if not f:
+            return f"{self.application}: no frames"
+        return (f"{self.application}: {self.count} frames over {self.frames.total:.0f}s  "
+                f"avg {f['avg']:.1f}  1% low {f['low_1pct']:.1f}  0.1% low {f['low_01pct']:.1f}  "
+                f"min {f['min']:.1f}  max {f['max']:.1f} FPS")
+
+
+def append_summary_row(path: str, row: Dict[str, str]):
+    """Append to a FrameView_Summary.csv-style file, writing the header if it is new or empty."""
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=FRAMEVIEW_SUMMARY_COLUMNS)
+        if new:
+            w.writeheader()
+        w.writerow(row)
+
+
+# -----------------------------
+# Live (controller pipeline)
+# -----------------------------
+class LiveSummary:
+    """Session stats for the controller: optional interval rows, one session row at close()."""
+
+    def __init__(self, path: str, application: str, interval_s: float = 0.0, log_name: str = "hd2_firerate_controller"):
+        self.path = path
+        self.interval_s = interval_s
+        self.log_name = log_name
+        self.session = SessionStats(application)
+        self.window = SessionStats(application)
+        self.intervals = 0
+
+    def add(self, ms_batch: List[float]):
+        _add_ms(self.window.frames, ms_batch)
+
+    def maybe_flush(self, now: float):
+        if self.interval_s <= 0 or now - self.window.started < self.interval_s:
+            return
+        self.window.ended = now
+        self.intervals += 1
+        if self.window.count:
+            append_summary_row(self.path, self.window.row(f"{self.log_name} interval {self.intervals}"))
+        self.session.merge(self.window)
+        self.window = SessionStats(self.session.application, now)
+
+    def close(self) -> SessionStats:
+        self.window.ended = time.time()
+        self.session.merge(self.window)
+        self.window = SessionStats(self.session.application, self.window.ended)
+        if self.session.count:
+            append_summary_row(self.path, self.session.row(f"{self.log_name} session"))
+        return self.session
+
+
+# -----------------------------
+# Offline (per-frame logs)
+# -----------------------------
+LOG_COLUMNS = ("MsBetweenDisplayChange", "MsBetweenPresents", "MsRenderPresentLatency")
+STREAM_ROWS = 8192   # rows per SessionStats.add when streaming a CSV without the sidecar
+
+
+def _float_or_nan(s: str) -> float:
+    try:
+        return float(s)
+    except ValueError:
+        return NAN
+
+
+def _stream_columns(path: str, st: SessionStats):
+    """Feeds only LOG_COLUMNS straight from the CSV: no sidecar on disk, one pass, constant memory.
+
+    Lines go through frame_tail's LineTailer and ColumnProjector, so only the
+    leading fields up to the last wanted column of each ~150-column FrameView row
+    are split out.
+    """
+    from frame_tail import ColumnProjector, LineTailer
+    with open(path, "rb") as f:
+        tail = LineTailer(f, chunk_bytes=1024 * 1024)
+        header = tail.read_header(0.0) if os.path.getsize(path) else []
+        lc = [h.strip().lower() for h in header]
+        present = [c for c in LOG_COLUMNS if c.lower() in lc]
+        if not present:
+            return
+        projector = ColumnProjector.from_header(header, present)
+        cols: Dict[str, List[float]] = {c: [] for c in present}
+        lists = [cols[c] for c in present]
+
+        def flush():
+            display, presents, latency = (cols.get(c) for c in LOG_COLUMNS)
+            st.add(display if display is not None else presents, presents if display is not None else None, latency)
+            for c in lists:
+                c.clear()
+
+        while True:
+            lines = tail.read_lines() or tail.take_partial()
+            if not lines:
+                break
+            for fields in projector.project(lines):
+                for c, v in zip(lists, fields):
+                    c.append(_float_or_nan(v))
+            if len(lists[0]) >= STREAM_ROWS:
+                flush()
+        flush()
+
+
+def summarize_log(path: str, sidecar: bool = True) -> SessionStats:
+    """Streams a FrameView/PresentMon per-frame log into a SessionStats.
+
+    sidecar=True reads through frame_cache (parses every column once, later loads
+    are memory-mapped); sidecar=False reads just the columns needed, once.
+    """
+    app = os.path.basename(path).split("_")[1] if os.path.basename(path).startswith("FrameView_") else "unknown"
+    st = SessionStats(app, os.path.getmtime(path))
+    if sidecar:
+        from frame_cache import column_names, load_columns
+        names = {n.lower(): n for n in column_names(path)}
+        want = [names.get(key.lower()) for key in LOG_COLUMNS]
+        cols = load_columns(path, [n for n in want if n])
+        display, presents, latency = (cols[n] if n else None for n in want)
+        st.add(display if display is not None else presents, presents if display is not None else None, latency)
+    else:
+        _stream_columns(path, st)
+    st.ended = os.path.getmtime(path)
+    return st
+
+
+def main():
+    ap = argparse.ArgumentParser(description="FrameView-style summary rows from per-frame logs.")
+    ap.add_argument("logs", nargs="+", help="FrameView / PresentMon per-frame CSV logs")
+    ap.add_argument("--out", default=None, help="Append rows to this summary CSV")
+    args = ap.parse_args()
+    for path in args.logs:
+        st = summarize_log(path)
+        print(st.describe())
+        if args.out:
+            append_summary_row(args.out, st.row(os.path.basename(path)))
+
+
+if __name__ == "__main__":
+    main()
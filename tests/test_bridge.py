@@ -0,0 +1,129 @@
+# test_bridge.py
+# mmap seqlock bridge under contention (one writer process, several reader processes),
+# and the FIFO push transport.
+#
+#   python -m pytest tests        (or: python -m unittest discover tests)
+
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge import MmapBridge, MmapBridgeReader, PipeBridge  # noqa: E402
+from bridge_receiver import PipeReceiver  # noqa: E402
+
+READERS = 3
+WRITES = 200_000
+SECONDS = 1.0
+
+
+def _writer(path, count, start_evt):
+    with MmapBridge(path) as b:
+        start_evt.wait()
+        for n in range(1, count + 1):
+            # value and timestamp are written as a pair; a torn read breaks value == ts
+            b.write(float(n), timestamp=float(n))
+
+
+def _reader(path, duration, start_evt, out_q):
+    r = MmapBridgeReader(path)
+    reads = torn = backwards = mismatched = 0
+    last_seq = 0
+    start_evt.wait()
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        s = r.read()
+        if s is None:
+            continue
+        reads += 1
+        if s.value != s.timestamp:
+            torn += 1
+        if s.seq != 2 * int(s.value):  # fresh record: the n-th write ends at seq 2n
+            mismatched += 1
+        if s.seq < last_seq:
+            backwards += 1
+        last_seq = s.seq
+    out_q.put((reads, torn, backwards, mismatched))
+    r.close()
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "needs fork and a shared mmap")
+class MmapSeqlockTest(unittest.TestCase):
+    def test_concurrent_readers_never_see_torn_or_stale_records(self):
+        ctx = mp.get_context("fork")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bridge.bin")
+            MmapBridge(path).close()
+            start_evt, out_q = ctx.Event(), ctx.Queue()
+            procs = [ctx.Process(target=_writer, args=(path, WRITES, start_evt))]
+            procs += [ctx.Process(target=_reader, args=(path, SECONDS, start_evt, out_q))
+                      for _ in range(READERS)]
+            for p in procs:
+                p.start()
+            start_evt.set()
+            results = [out_q.get(timeout=30) for _ in range(READERS)]
+            for p in procs:
+                p.join(30)
+                self.assertEqual(p.exitcode, 0)
+
+            r = MmapBridgeReader(path)
+            final = r.read()
+            r.close()
+        self.assertEqual((final.value, final.seq), (float(WRITES), 2 * WRITES))
+        for reads, torn, backwards, mismatched in results:
+            self.assertGreater(reads, 0)
+            self.assertEqual((torn, backwards, mismatched), (0, 0, 0))
+
+    def test_sequence_continues_across_writers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bridge.bin")
+            with MmapBridge(path) as b:
+                b.write(1.0)
+                b.write(2.0)
+            with MmapBridge(path) as b:
+                self.assertEqual(b.seq, 4)
+                b.write(3.0)
+            r = MmapBridgeReader(path)
+            s = r.read()
+            r.close()
+        self.assertEqual((s.value, s.seq), (3.0, 6))
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "POSIX FIFO")
+class FifoPushTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "push.fifo")
+        self.rx = PipeReceiver(self.path)
+        self.addCleanup(self.rx.close)
+        self.tx = PipeBridge(self.path)
+        self.addCleanup(self.tx.close)
+
+    def test_garbage_is_skipped_not_returned(self):
+        self.assertTrue(self.tx.write(1.5, observed=1.0))
+        os.write(self.tx._fd, b"junk-HD2-bytes")
+        self.assertTrue(self.tx.write(2.5, observed=2.0))
+        got = [self.rx.recv(1.0)[0] for _ in range(2)]
+        self.assertEqual([(s.seq, s.value) for s in got], [(1, 1.5), (2, 2.5)])
+        self.assertIsNone(self.rx.recv(0.05))
+
+    def test_full_fifo_drops_instead_of_blocking(self):
+        sent = 0
+        start = time.monotonic()
+        while self.tx.write(float(sent)):
+            sent += 1
+        self.assertLess(time.monotonic() - start, 5.0)
+        self.assertEqual(self.tx.dropped, 1)
+        self.assertFalse(self.tx.write(-1.0))
+        self.assertIsNotNone(self.tx._fd)  # kept open: a full pipe is not a lost receiver
+        self.assertEqual(self.rx.recv(1.0)[0].value, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
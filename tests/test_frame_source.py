@@ -0,0 +1,50 @@
+# test_frame_source.py
+# FrameSource iteration contract: heartbeats, clean end, producer errors.
+#
+#   python -m pytest tests        (or: python -m unittest discover tests)
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from frame_source import FrameBatch, FrameSource  # noqa: E402
+
+
+class _Scripted(FrameSource):
+    def __init__(self, batches, error=None, **kwargs):
+        super().__init__(idle_s=0.01, **kwargs)
+        self.batches = batches
+        self.failure = error
+
+    def produce(self):
+        for ms in self.batches:
+            yield FrameBatch(ms)
+        if self.failure is not None:
+            raise self.failure
+
+
+class FrameSourceIterTest(unittest.TestCase):
+    def test_clean_end(self):
+        src = _Scripted([[10.0], [11.0]])
+        got = [b.frame_ms for b in src if b is not None]
+        self.assertEqual([x for ms in got for x in ms], [10.0, 11.0])
+
+    def test_producer_error_reaches_consumer(self):
+        src = _Scripted([[10.0]], error=OSError("pipe broken"))
+        seen = []
+        with self.assertRaises(OSError):
+            for b in src:
+                if b is not None:
+                    seen.extend(b.frame_ms)
+        self.assertEqual(seen, [10.0])   # data read before the failure is still delivered
+
+    def test_error_without_data(self):
+        with self.assertRaises(RuntimeError):
+            for _ in _Scripted([], error=RuntimeError("PresentMon failed")):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+# test_process_watch.py
+# ProcessWatcher identity: a PID whose create_time changed is a new process.
+#
+#   python -m pytest tests        (or: python -m unittest discover tests)
+
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from process_watch import ProcInfo, ProcessWatcher  # noqa: E402
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "procfs backend")
+class ProcfsReuseTest(unittest.TestCase):
+    def setUp(self):
+        self.w = ProcessWatcher("procfs")
+        self.w.poll()
+        self.me = self.w.procs[os.getpid()]
+
+    def test_known_pid_is_reused(self):
+        started, exited = self.w.poll()
+        self.assertIs(self.w.procs[os.getpid()], self.me)
+        self.assertNotIn(self.me, started + exited)
+
+    def test_changed_create_time_is_exit_plus_start(self):
+        stale = ProcInfo(self.me.pid, "helldivers2.exe", self.me.create_time - 1)
+        self.w.procs[stale.pid] = stale
+        started, exited = self.w.poll()
+        self.assertIn(stale, exited)
+        self.assertIn(self.me, started)
+        self.assertEqual(self.w.procs[self.me.pid], self.me)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# test_session_record.py
+# Recordings that roll over into several segments: every segment replays on its own.
+#
+#   python -m pytest tests        (or: python -m unittest discover tests)
+
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import session_record  # noqa: E402
+from replay import replay  # noqa: E402
+from session_record import SUFFIX, SessionRecorder, iter_recording_batches  # noqa: E402
+
+
+def _record(directory: str, batches):
+    rec = SessionRecorder(directory, max_bytes=1 << 30, chunk_records=97, level=1)
+    rec.segment_bytes = 2048   # roll over every few chunks
+    for i, ms in enumerate(batches):
+        while rec._q.qsize() > 16:   # let the writer keep up: a full queue drops chunks by design
+            time.sleep(0.001)
+        rec.batch(rec.t0 + 0.01 * i, ms, dropped=i % 2)
+        rec.tick(rec.t0 + 0.01 * i, 100.0, 3000.0)
+    rec.close()
+    assert rec.dropped_chunks == 0
+    return sorted(glob.glob(os.path.join(directory, "*" + SUFFIX)))
+
+
+class SegmentTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rnd = random.Random(7)
+        # Mix of tailer-sized and large batches so chunk flushes land mid-batch on both packing paths
+        self.batches = [[round(rnd.uniform(5, 20), 2) for _ in range(rnd.choice((1, 3, 40, 150)))]
+                        for _ in range(200)]
+        self.segments = _record(self.tmp.name, self.batches)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rolls_over(self):
+        self.assertGreater(len(self.segments), 2)
+
+    def test_every_segment_starts_with_a_batch(self):
+        for seg in self.segments:
+            for t, ms, _dropped in iter_recording_batches(seg):
+                self.assertIsNotNone(t, seg)
+                self.assertTrue(ms)
+
+    def test_segments_rejoin_to_the_recording(self):
+        got = [x for seg in self.segments for _t, ms, _d in iter_recording_batches(seg) for x in ms]
+        want = [x for ms in self.batches for x in ms]
+        self.assertEqual(len(got), len(want))
+        for g, w in zip(got, want):
+            self.assertAlmostEqual(g, w, places=4)   # stored as float32
+
+    def test_each_segment_replays(self):
+        for seg in self.segments[1:]:
+            res = replay(seg, mode="paced", speed=1000.0)
+            self.assertGreater(res.rows, 0, seg)
+
+    def test_headerless_frames_are_skipped(self):
+        # A segment from before CONTINUED headers: frames ahead of the first BATCH
+        path = os.path.join(self.tmp.name, "old" + SUFFIX)
+        rec = session_record
+        rows = [rec.REC.pack(rec.FRAME, 0, 0, 9.0, 1.0, 0.0), rec.REC.pack(rec.BATCH, 0, 1, 0.0, 2.0, 0.0),
+                rec.REC.pack(rec.FRAME, 0, 0, 11.0, 2.0, 0.0)]
+        z = zlib.compress(b"".join(rows))
+        with open(path, "wb") as f:
+            meta = b"{}"
+            f.write(rec.MAGIC + len(meta).to_bytes(4, "little") + meta + rec.CHUNK.pack(len(z), len(rows)) + z)
+        self.assertEqual(list(iter_recording_batches(path)), [(2.0, [11.0], 0)])
+
+
+class SessionNameTest(unittest.TestCase):
+    def test_taken_name_carries_into_next_second(self):
+        with tempfile.TemporaryDirectory() as d:
+            real = session_record.time.time
+            session_record.time.time = lambda: 1_700_000_000.999
+            try:
+                first = session_record._session_name(d)
+                open(os.path.join(d, first + "_000" + SUFFIX), "wb").close()
+                second = session_record._session_name(d)
+            finally:
+                session_record.time.time = real
+            self.assertTrue(first.endswith("_999"))
+            self.assertTrue(second.endswith("_000"))
+            self.assertLess(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
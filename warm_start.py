@@ -0,0 +1,110 @@
+# warm_start.py
+# Persisted controller state and startup timing.
+#
+# The state file (Config.state_path, small JSON, rewritten atomically) keeps
+#   presentmon_path  the executable resolve_presentmon_path settled on
+#   last_fps         the last smoothed FPS
+#   last_rate        the last rate written to the bridge
+# so the next launch can skip the PATH probing, write the last known good rate as
+# its bootstrap value and seed the control law with last_fps instead of waiting
+# for PresentMon's first frames (Config.warm_start, bounded by
+# warm_start_max_age_s: a stale state is ignored).
+#
+# StartupTimer collects named marks from process start and prints one line:
+#   [START] state 0.2ms | bootstrap 0.4ms (warm 7120.0) | resolve 0.1ms (cached) | presentmon 11.8ms | ...
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import List, Optional, Tuple
+
+STATE_VERSION = 1
+
+
+@dataclass
+class ControllerState:
+    game_exe_name: str = ""
+    presentmon_path: Optional[str] = None
+    last_fps: Optional[float] = None
+    last_rate: Optional[float] = None
+    saved_at: float = 0.0
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.saved_at if self.saved_at else float("inf")
+
+
+def load_state(path: Optional[str]) -> ControllerState:
+    """Saved state, or an empty one if the file is missing, unreadable or from another version."""
+    if not path:
+        return ControllerState()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return ControllerState()
+    if not isinstance(raw, dict) or raw.get("version") != STATE_VERSION:
+        return ControllerState()
+    names = {f.name for f in fields(ControllerState)}
+    try:
+        return ControllerState(**{k: v for k, v in raw.items() if k in names})
+    except TypeError:
+        return ControllerState()
+
+
+def save_state(path: Optional[str], state: ControllerState):
+    """Atomic rewrite (temp + os.replace); best-effort, a failed save keeps the previous file."""
+    if not path:
+        return
+    state.saved_at = time.time()
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, **asdict(state)}, f, indent=1)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def warm_values(state: ControllerState, cfg) -> Optional[Tuple[float, float]]:
+    """(fps, rate) to warm-start from, or None for a cold start."""
+    if not cfg.warm_start or state.last_fps is None or state.last_rate is None:
+        return None
+    if state.game_exe_name.lower() != cfg.game_exe_name.lower() or state.age_s > cfg.warm_start_max_age_s:
+        return None
+    if state.last_fps <= 0:
+        return None
+    rate = max(min(state.last_rate, cfg.max_rate), cfg.min_rate)
+    return state.last_fps, rate
+
+
+class StartupTimer:
+    """Named marks relative to construction time (create it first thing in main)."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.marks: List[Tuple[str, float, str]] = []
+        self._last = self.t0
+
+    def mark(self, name: str, note: str = "") -> float:
+        """Record `name`; returns ms since start."""
+        now = time.perf_counter()
+        self.marks.append((name, now - self._last, note))
+        self._last = now
+        return (now - self.t0) * 1000.0
+
+    def seen(self, name: str) -> bool:
+        return any(m[0] == name for m in self.marks)
+
+    def since_start_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def report(self) -> str:
+        parts = []
+        total = 0.0
+        for name, dt, note in self.marks:
+            total += dt
+            part = f"{name} {dt * 1000.0:.1f}ms"
+            parts.append(f"{part} ({note})" if note else part)
+        return f"[START] {' | '.join(parts)} | total {total * 1000.0:.1f}ms"
@@ -1,28 +1,57 @@
-import psutil 
-
-def find_pid_by_name(name: int) -> None:
-    for p in psutil.process_iter(['pid','name','exe','create_time']): 
-        try: 
-            if (p.info['name'] or '').lower().startswith(name): 
-                print(p.info) 
-        except psutil.NoSuchProcess: 
-            pass
+# wetwork.py
+# List running process names (to find what to put in game_exe_name / --also), or
+# look one up / wait for it. Thin CLI over process_watch.ProcessWatcher.
+#
+#   python wetwork.py                     # unique process names, sorted
+#   python wetwork.py --find helldivers   # processes whose name starts with this
+#   python wetwork.py --wait helldivers2.exe
+
+import argparse
+from typing import List
+
+from process_watch import ProcessWatcher, ProcInfo
+
+
+def find_pid_by_name(name: str, watcher: ProcessWatcher = None) -> List[ProcInfo]:
+    """Processes whose name starts with `name` (case-insensitive)."""
+    watcher = watcher or ProcessWatcher()
+    if not watcher.scans:
+        watcher.poll()
+    prefix = name.lower()
+    return sorted((p for p in watcher.procs.values() if p.name.lower().startswith(prefix)), key=lambda p: p.pid)
 
-def find_unique_pid_names(print_info=None) -> list[str]:
-    unique_process_names = []
-    for p in psutil.process_iter(['pid','name','exe','create_time']): 
-        try: 
-            if p.info['name'] not in unique_process_names:
-                unique_process_names.append(p.info['name'])
-                if print_info:
-                    print(p.info) 
-        except psutil.NoSuchProcess: 
+
+def find_unique_pid_names(watcher: ProcessWatcher = None) -> List[str]:
+    watcher = watcher or ProcessWatcher()
+    return sorted(watcher.names(), key=str.lower)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="List / find / wait for processes.")
+    ap.add_argument("--find", metavar="PREFIX", help="Show processes whose name starts with PREFIX")
+    ap.add_argument("--wait", metavar="NAME", help="Block until NAME is running, then until it exits")
+    ap.add_argument("--backend", default="auto", choices=("auto", "psutil", "procfs", "toolhelp"))
+    args = ap.parse_args()
+
+    watcher = ProcessWatcher(args.backend)
+    if args.find:
+        for p in find_pid_by_name(args.find, watcher):
+            print(p)
+        return
+    if args.wait:
+        try:
+            proc = watcher.wait_for_start(args.wait)
+            print(f"started: {proc}")
+            watcher.wait_for_exit(proc)
+            print(f"exited:  {proc}")
+        except KeyboardInterrupt:
             pass
-    return unique_process_names
+        return
+
+    print("================ PID NAMES ================")
+    for name in find_unique_pid_names(watcher):
+        print(name)
 
-names = find_unique_pid_names()
-names.sort(key=str.lower)
 
-print("================ PID NAMES ================")
-for name in names:
-    print(name)
+if __name__ == "__main__":
+    main()